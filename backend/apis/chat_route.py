@@ -1,9 +1,12 @@
-from fastapi import Depends, APIRouter
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Depends, APIRouter, Header
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from models import get_db
-from models.schemas import ChatHistoryResponse, ChatMessageResponse
+from models.schemas import ChatHistoryResponse, ChatMessageResponse, DEFAULT_SESSION_ID
 from services.chat_service import ChatService
 
 router = APIRouter(
@@ -12,19 +15,21 @@ router = APIRouter(
 
 
 @router.get("/stream")
-async def chat_stream(message: str, db: Session = Depends(get_db)):
-    service = ChatService(db)
+async def chat_stream(message: str, session_id: str = DEFAULT_SESSION_ID, last_event_id: Optional[str] = Header(None)):
+    service = ChatService()
 
     return StreamingResponse(
-        service.stream_chat_response(message),
+        service.stream_chat_response(message, last_event_id, session_id),
         media_type="text/event-stream",
     )
 
 
 @router.get("/history", response_model=ChatHistoryResponse)
-def get_chat_history(db: Session = Depends(get_db)):
+def get_chat_history(session_id: str = DEFAULT_SESSION_ID, limit: Optional[int] = None,
+                     before: Optional[datetime] = None, before_id: Optional[str] = None,
+                     db: Session = Depends(get_db)):
     service = ChatService(db)
-    messages = service.get_chat_history()
+    messages = service.get_chat_history(session_id, limit, before, before_id)
 
     return ChatHistoryResponse(
         messages=[
@@ -42,9 +47,9 @@ def get_chat_history(db: Session = Depends(get_db)):
 
 
 @router.delete("/history")
-def clear_chat_history(db: Session = Depends(get_db)):
+def clear_chat_history(session_id: str = DEFAULT_SESSION_ID, db: Session = Depends(get_db)):
     service = ChatService(db)
-    service.clear_chat_history()
+    service.clear_chat_history(session_id)
     return {"message": "Chat history cleared successfully"}
 
 
@@ -8,6 +8,7 @@ from models.schemas import IntegrationCreate, IntegrationResponse, DataSourceTyp
 from repositories.customer_repository import CustomerRepository
 from services.customer_sync_service import CustomerSyncService
 from services.integration_service import IntegrationService
+from services.sql_plan_cache import sql_plan_cache
 
 router = APIRouter(
     tags=["integrations"],
@@ -66,6 +67,7 @@ def remove_integration(data_source: DataSourceTypes, db: Session = Depends(get_d
 
     if success:
         customer_repo.delete_customers_by_source(data_source.value)
+        sql_plan_cache.invalidate("integration_removed")
         return IntegrationDeleteResponse(
             message=f"Integration for {data_source.value} removed successfully",
             customers_removed=customer_count,
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+
+from core.metrics import metrics
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+
+@router.get("")
+def get_metrics():
+    return metrics.snapshot()
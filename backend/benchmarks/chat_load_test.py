@@ -0,0 +1,223 @@
+"""
+End-to-end load test for ``/api/chat/stream``.
+
+Opens ``--sessions`` concurrent SSE sessions (``--requests`` in total) and reports p50/p95/p99 of
+time to first frame, time to first LLM_RESPONSE frame, total stream time and frames per second,
+plus how many query generations each request needed (orchestrator iterations times
+SQL_GENERATION_CANDIDATES; 0 when the SQL plan cache answered).
+
+By default the app from ``main.py`` and ``benchmarks.llm_stub_server`` are started in-process on
+local ports, with the agents' LLM client pointed at the stub, and customer data is seeded by
+connecting every integration through ``/api/integrations``. Chat history and customers go to
+whatever DATABASE_URL points to. Pass ``--base-url`` to load an already running server instead;
+it then talks to whatever LLM that server is configured with.
+
+Usage (from the backend directory):
+    python -m benchmarks.chat_load_test --sessions 20 --requests 100 --stub-latency-ms 300
+    python -m benchmarks.chat_load_test --base-url http://127.0.0.1:8000 --sessions 50
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import socket
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from benchmarks.llm_stub_server import LlmStub, create_app
+from models.schemas import DataSourceTypes, LlmResponseTypes
+
+DEFAULT_MESSAGES = [
+    "Show me customers with high engagement scores",
+    "Find high-value customers who haven't purchased recently",
+    "Create a campaign for customers who added items to cart but didn't buy in last 7 days",
+    "Get customers who accept marketing from Shopify",
+    "What can you help me with?",
+]
+
+# QueryGeneratorAgent.generate_query announces itself once per orchestrator iteration.
+_ITERATION_MARKER = "Query Generator analyzing"
+
+
+class SessionResult(BaseModel):
+    message: str
+    ok: bool = False
+    status_code: Optional[int] = None
+    time_to_first_frame: Optional[float] = None
+    time_to_first_llm_response: Optional[float] = None
+    total_time: float = 0.0
+    frames: int = 0
+    iterations: int = 0
+    server_errors: int = 0
+    error: Optional[str] = None
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve_in_thread(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _seed(client: httpx.AsyncClient):
+    response = await client.get("/api/integrations")
+    response.raise_for_status()
+    connected = {integration["dataSource"] for integration in response.json()}
+    for data_source in DataSourceTypes:
+        if data_source.value not in connected:
+            (await client.post("/api/integrations", json={"dataSource": data_source.value})).raise_for_status()
+
+
+async def _run_session(client: httpx.AsyncClient, message: str, session_id: str) -> SessionResult:
+    result = SessionResult(message=message)
+    started = time.perf_counter()
+    try:
+        async with client.stream("GET", "/api/chat/stream", params={"message": message, "session_id": session_id}) as response:
+            result.status_code = response.status_code
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                elapsed = time.perf_counter() - started
+                frame = json.loads(line[len("data: "):])
+                result.frames += 1
+                if result.time_to_first_frame is None:
+                    result.time_to_first_frame = elapsed
+                response_type = frame.get("responseType")
+                if response_type == LlmResponseTypes.LLM_RESPONSE and result.time_to_first_llm_response is None:
+                    result.time_to_first_llm_response = elapsed
+                elif response_type == LlmResponseTypes.AGENT_STATUS and frame.get("content", "").startswith(
+                        _ITERATION_MARKER):
+                    result.iterations += 1
+                elif response_type == LlmResponseTypes.SERVER_ERROR:
+                    result.server_errors += 1
+        result.ok = response.status_code == 200 and result.time_to_first_llm_response is not None
+    except httpx.HTTPError as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.total_time = time.perf_counter() - started
+    return result
+
+
+def _report(results: List[SessionResult], wall: float, sessions: int):
+    ok = [result for result in results if result.ok]
+    print(f"Requests: {len(results)} at concurrency {sessions}, completed with an LLM response: {len(ok)}, "
+          f"wall time {wall:.2f}s ({len(results) / wall:.2f} req/s)")
+    failures = [result for result in results if not result.ok]
+    if failures:
+        first = failures[0]
+        print(f"Failed: {len(failures)} (first: status {first.status_code}, {first.error or 'no LLM_RESPONSE'})")
+    if not ok:
+        return
+
+    series = {
+        "time to first frame (s)": [result.time_to_first_frame for result in ok],
+        "time to first LLM_RESPONSE (s)": [result.time_to_first_llm_response for result in ok],
+        "total stream time (s)": [result.total_time for result in ok],
+        "frames per second": [result.frames / result.total_time for result in ok],
+    }
+    print(f"{'metric':<32}{'p50':>10}{'p95':>10}{'p99':>10}{'mean':>10}")
+    for name, values in series.items():
+        print(f"{name:<32}{_percentile(values, 50):>10.3f}{_percentile(values, 95):>10.3f}"
+              f"{_percentile(values, 99):>10.3f}{statistics.mean(values):>10.3f}")
+
+    iterations = [result.iterations for result in ok]
+    distribution: Dict[int, int] = {}
+    for count in iterations:
+        distribution[count] = distribution.get(count, 0) + 1
+    print(f"Query generations per request: mean {statistics.mean(iterations):.2f}, max {max(iterations)}, "
+          f"distribution {dict(sorted(distribution.items()))}")
+    print(f"Aggregate frames: {sum(result.frames for result in ok)} "
+          f"({sum(result.frames for result in ok) / wall:,.0f} frames/s), "
+          f"SERVER_ERROR frames: {sum(result.server_errors for result in results)}")
+
+
+async def main(args: argparse.Namespace):
+    servers: List[uvicorn.Server] = []
+    stub: Optional[LlmStub] = None
+    base_url = args.base_url
+    if base_url is None:
+        from core.llm_handler import llm_handler
+        from main import app
+
+        stub = LlmStub(
+            recordings_path=args.recordings,
+            latency_ms=args.stub_latency_ms,
+            jitter_ms=args.stub_jitter_ms,
+            tokens_per_second=args.stub_tokens_per_second,
+            error_rate=args.stub_error_rate,
+        )
+        stub_port = _free_port()
+        servers.append(_serve_in_thread(create_app(stub), stub_port))
+        llm_handler.client = AsyncOpenAI(api_key="stub", base_url=f"http://127.0.0.1:{stub_port}/v1")
+        app_port = _free_port()
+        servers.append(_serve_in_thread(app, app_port))
+        base_url = f"http://127.0.0.1:{app_port}"
+
+    messages = args.message or DEFAULT_MESSAGES
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.sessions)
+    limits = httpx.Limits(max_connections=args.sessions, max_keepalive_connections=args.sessions)
+
+    async def bounded(message: str, session_id: str) -> SessionResult:
+        async with semaphore:
+            return await _run_session(client, message, session_id)
+
+    quiet = contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext()
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        with quiet:
+            if not args.no_seed:
+                await _seed(client)
+            started = time.perf_counter()
+            results = await asyncio.gather(*(bounded(rng.choice(messages), f"load-test-{index % args.sessions}")
+                                             for index in range(args.requests)))
+            wall = time.perf_counter() - started
+
+    _report(results, wall, args.sessions)
+    if stub is not None:
+        print(f"LLM stub responses: {stub.served}")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump([result.model_dump() for result in results], file, indent=2)
+
+    for server in servers:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent SSE sessions")
+    parser.add_argument("--requests", type=int, default=50, help="total chat requests")
+    parser.add_argument("--message", action="append", help="chat message to send (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for picking messages")
+    parser.add_argument("--base-url", help="load an already running server instead of starting one")
+    parser.add_argument("--no-seed", action="store_true", help="do not connect integrations before the run")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--recordings", help="LLM stub recordings to replay")
+    parser.add_argument("--stub-latency-ms", type=float, default=300)
+    parser.add_argument("--stub-jitter-ms", type=float, default=100)
+    parser.add_argument("--stub-tokens-per-second", type=float, default=80)
+    parser.add_argument("--stub-error-rate", type=float, default=0)
+    parser.add_argument("--output", help="write per-request results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's console output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Benchmark for tokens/sec through the full ``/api/chat/stream`` path.
+
+The orchestrator is replaced by a synthetic producer that pushes LLM_RESPONSE tokens onto the
+StreamService as fast as possible, so the numbers measure StreamService -> ChatService -> SSE
+overhead rather than provider speed. Chat history is persisted to whatever DATABASE_URL points to.
+
+Also reports the per-frame codec cost of the previous JSON round-trip between StreamService and
+ChatService against the single serialization done now.
+
+Usage (from the backend directory):
+    python -m benchmarks.chat_stream_benchmark --tokens 2000 --sessions 10
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+
+import httpx
+
+from core.settings import settings
+from main import app
+from models.schemas import LlmResponseTypes, QueryRequest
+from services.agents.orchestrator_service import OrchestratorService
+from services.stream_service import StreamMessage
+
+
+def _synthetic_process_query(tokens: int):
+    async def process_query(self: OrchestratorService, request: QueryRequest):
+        for i in range(tokens):
+            self.stream_service.add_message(StreamMessage(
+                response_type=LlmResponseTypes.LLM_RESPONSE,
+                content=f"tok{i} "
+            ))
+            if i % 64 == 0:
+                await asyncio.sleep(0)
+        self.stream_service.end_streaming()
+
+    return process_query
+
+
+async def _run_session(client: httpx.AsyncClient) -> tuple[int, int, float]:
+    frames = 0
+    tokens = 0
+    started = time.perf_counter()
+    async with client.stream("GET", "/api/chat/stream", params={"message": "benchmark"}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: ") and '"LLM_RESPONSE"' in line:
+                frames += 1
+                tokens += json.loads(line[len("data: "):])["content"].count("tok")
+    return frames, tokens, time.perf_counter() - started
+
+
+def _codec_cost(frames: int) -> tuple[float, float]:
+    messages = [StreamMessage(response_type=LlmResponseTypes.LLM_RESPONSE, content=f"tok{i} ")
+                for i in range(frames)]
+
+    started = time.perf_counter()
+    for message in messages:
+        sse_message = f"data: {message.model_dump_json()}\n\n"
+        stream_msg = StreamMessage(**json.loads(sse_message.replace("data: ", "").strip()))
+        stream_msg.message_id = "benchmark"
+        f"data: {json.dumps(stream_msg.model_dump())}\n\n"
+    legacy = (time.perf_counter() - started) / frames * 1e6
+
+    started = time.perf_counter()
+    for message in messages:
+        message.message_id = "benchmark"
+        message.to_sse()
+    current = (time.perf_counter() - started) / frames * 1e6
+    return legacy, current
+
+
+async def main(tokens: int, sessions: int, coalesce_interval_ms: float):
+    OrchestratorService.process_query = _synthetic_process_query(tokens)
+    settings.stream_coalesce_interval_ms = coalesce_interval_ms
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await _run_session(client)
+            started = time.perf_counter()
+            results = await asyncio.gather(*(_run_session(client) for _ in range(sessions)))
+            wall = time.perf_counter() - started
+
+    total_frames = sum(frames for frames, _, _ in results)
+    total_tokens = sum(received for _, received, _ in results)
+    per_session = [received / elapsed for _, received, elapsed in results]
+    print(f"Sessions: {sessions}, tokens per session: {tokens}, coalescing interval: {coalesce_interval_ms:.0f} ms")
+    print(f"Tokens received: {total_tokens} ({'complete' if total_tokens == tokens * sessions else 'INCOMPLETE'}) "
+          f"in {total_frames} LLM_RESPONSE frames")
+    print(f"Aggregate throughput: {total_tokens / wall:,.0f} tokens/sec over {wall:.2f}s")
+    print(f"Per-session throughput: min {min(per_session):,.0f}, max {max(per_session):,.0f} tokens/sec")
+
+    legacy, current = _codec_cost(tokens)
+    print(f"Per-frame codec cost: JSON round-trip {legacy:.1f} us, single serialization {current:.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--coalesce-interval-ms", type=float, default=settings.stream_coalesce_interval_ms)
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens, args.sessions, args.coalesce_interval_ms))
@@ -0,0 +1,126 @@
+"""
+Benchmark for event-loop isolation of database work: stream frame lateness while heavy queries run.
+
+A StreamService producer schedules one frame every --interval-ms and a consumer records how late
+each frame arrives relative to its schedule, the delay every SSE client on the worker would see.
+The run is repeated with no queries, with heavy queries on the synchronous Session (as the agents
+used to run them) and with the same queries on the async engine (AsyncSessionLocal).
+
+The heavy query is ``pg_sleep`` on PostgreSQL and a recursive CTE on SQLite (which needs the
+aiosqlite driver for the async run).
+
+Usage (from the backend directory, with the same .env as the server):
+    python -m benchmarks.db_isolation_benchmark --queries 20 --concurrency 4 --query-seconds 0.5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+from typing import List, Tuple
+
+from rich import print
+from sqlalchemy import text
+
+from models import AsyncSessionLocal, SessionLocal, engine
+from models.schemas import LlmResponseTypes
+from services.stream_service import StreamMessage, StreamService
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _heavy_query(query_seconds: float) -> str:
+    if engine.dialect.name == "postgresql":
+        return f"SELECT pg_sleep({query_seconds})"
+    # Roughly a million recursion steps per half second on a typical machine.
+    steps = int(query_seconds * 2_000_000)
+    return (f"WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < {steps}) "
+            f"SELECT COUNT(*) FROM counter")
+
+
+async def _run_sync_query(sql: str):
+    db = SessionLocal()
+    try:
+        db.execute(text(sql)).scalar()
+    finally:
+        db.close()
+
+
+async def _run_async_query(sql: str):
+    async with AsyncSessionLocal() as db:
+        (await db.execute(text(sql))).scalar()
+
+
+async def _measure(mode: str, args: argparse.Namespace) -> Tuple[List[float], float]:
+    """Frame lateness in ms while ``args.queries`` heavy queries run, and the wall time of those queries."""
+    service = StreamService(coalesce_interval_ms=0)
+    interval = args.interval_ms / 1000
+    scheduled_at = {}
+    lateness = []
+    sql = _heavy_query(args.query_seconds)
+    run_query = {"sync": _run_sync_query, "async": _run_async_query}.get(mode)
+
+    async def produce():
+        started = time.perf_counter()
+        for index in range(args.frames):
+            scheduled_at[index] = started + index * interval
+            await asyncio.sleep(max(0.0, scheduled_at[index] - time.perf_counter()))
+            service.add_message(StreamMessage(response_type=LlmResponseTypes.LLM_RESPONSE, content=str(index)))
+        service.end_streaming()
+
+    async def consume():
+        async for frame in service.stream_messages():
+            if '"LLM_RESPONSE"' in frame:
+                index = int(frame.split('"content":"', 1)[1].split('"', 1)[0])
+                lateness.append((time.perf_counter() - scheduled_at[index]) * 1000)
+
+    async def load() -> float:
+        if run_query is None:
+            return 0.0
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def bounded():
+            async with semaphore:
+                await run_query(sql)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(args.queries)))
+        return time.perf_counter() - started
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0)
+    query_wall, _ = await asyncio.gather(load(), produce())
+    await consumer
+    return lateness, query_wall
+
+
+async def main(args: argparse.Namespace):
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
+    results = []
+    for mode in ("idle", "sync", "async"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results.append((mode, *await _measure(mode, args)))
+
+    print(f"Database: {engine.dialect.name}, {args.queries} heavy queries of ~{args.query_seconds:g}s at "
+          f"concurrency {args.concurrency}, one frame every {args.interval_ms:g} ms")
+    print(f"{'queries':<8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'mean ms':>10}{'query wall s':>14}")
+    for mode, lateness, query_wall in results:
+        print(f"{mode:<8}{_percentile(lateness, 50):>10.2f}{_percentile(lateness, 95):>10.2f}"
+              f"{_percentile(lateness, 99):>10.2f}{max(lateness):>10.2f}{statistics.mean(lateness):>10.2f}"
+              f"{query_wall:>14.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20, help="heavy queries per run")
+    parser.add_argument("--concurrency", type=int, default=4, help="heavy queries in flight")
+    parser.add_argument("--query-seconds", type=float, default=0.5, help="approximate duration of each query")
+    parser.add_argument("--frames", type=int, default=300, help="stream frames per run")
+    parser.add_argument("--interval-ms", type=float, default=20.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,77 @@
+"""
+Accuracy and LLM-call rate of the rule-based dependency analysis fast path.
+
+Runs DependencyRuleAnalyzer over ParaphraseAgent.dependency_analysis_examples (or a JSONL file of
+``{"user_message": ..., "needs_context": ...}`` lines) and reports how many messages the rules
+decide locally, precision/recall for "needs context" on those, and the resulting share of
+messages that still need the LLM. The built-in examples were used to write the rules, so pass a
+held-out file to estimate accuracy on real traffic.
+
+Usage (from the backend directory):
+    python -m benchmarks.dependency_rules_benchmark
+    python -m benchmarks.dependency_rules_benchmark --examples labeled_messages.jsonl
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from services.agents.dependency_rules import DependencyRuleAnalyzer
+from services.agents.paraphrase_agent import ParaphraseAgent
+
+
+def _load_examples(path: str) -> List[Dict]:
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main(examples: List[Dict], verbose: bool):
+    analyzer = DependencyRuleAnalyzer()
+    true_positive = false_positive = false_negative = true_negative = deferred = 0
+    for example in examples:
+        result = analyzer.analyze(example["user_message"])
+        if result is None:
+            deferred += 1
+            outcome = "llm"
+        elif result.needs_context and example["needs_context"]:
+            true_positive += 1
+            outcome = "ok"
+        elif result.needs_context:
+            false_positive += 1
+            outcome = "WRONG"
+        elif example["needs_context"]:
+            false_negative += 1
+            outcome = "WRONG"
+        else:
+            true_negative += 1
+            outcome = "ok"
+        if verbose:
+            print(f"{outcome:<6}{str(example['needs_context']):<7}{example['user_message']}")
+
+    decided = len(examples) - deferred
+    precision = true_positive / (true_positive + false_positive) if true_positive + false_positive else 0.0
+    recall = true_positive / (true_positive + false_negative) if true_positive + false_negative else 0.0
+    accuracy = (true_positive + true_negative) / decided if decided else 0.0
+
+    rounds = 200
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for example in examples:
+            analyzer.analyze(example["user_message"])
+    per_message = (time.perf_counter() - started) / (rounds * len(examples)) * 1e6
+
+    print(f"Examples: {len(examples)}, decided by rules: {decided} ({decided / len(examples):.0%}), "
+          f"sent to the LLM: {deferred} ({deferred / len(examples):.0%})")
+    print(f"On rule decisions: accuracy {accuracy:.2%}, needs-context precision {precision:.2%}, "
+          f"recall {recall:.2%}")
+    print(f"Confusion: TP {true_positive}, FP {false_positive}, FN {false_negative}, TN {true_negative}")
+    print(f"Rule analysis cost: {per_message:.1f} us per message")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", help="JSONL file of labeled messages; defaults to the agent's examples")
+    parser.add_argument("--verbose", action="store_true", help="print every message and its outcome")
+    args = parser.parse_args()
+    main(_load_examples(args.examples) if args.examples else ParaphraseAgent().dependency_analysis_examples,
+         args.verbose)
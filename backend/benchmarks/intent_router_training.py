@@ -0,0 +1,117 @@
+"""
+Trains the local intent router from manager decision logs and reports its routing trade-off.
+
+Decision logs are written by ManagerAgent when MANAGER_DECISION_LOG_PATH is set: one JSON line per
+LLM routing decision (``user_message``, ``should_use_sql_agent``, ``query_type``, ``latency_seconds``).
+The decisions are split into training, calibration and test sets; the router is trained on the
+first, Platt-calibrated on the second, and evaluated on the third against the LLM's decisions.
+
+For each confidence threshold the report shows the share of requests the router would decide
+locally, how often those local decisions agree with the LLM, the overall routing agreement and the
+expected routing latency. Point INTENT_ROUTER_MODEL_PATH at the saved model and set
+INTENT_ROUTER_MIN_CONFIDENCE to the chosen threshold to enable it.
+
+Usage (from the backend directory):
+    python -m benchmarks.intent_router_training --log manager_decisions.jsonl --output intent_router.json
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List
+
+from services.agents.intent_router import IntentRouter, load_decision_log, split_decisions
+
+DEFAULT_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99]
+_CALIBRATION_BINS = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0]
+
+
+def _query_types(decisions: List[Dict]) -> Dict[str, str]:
+    by_label = {"sql": Counter(), "general": Counter()}
+    for decision in decisions:
+        by_label["sql" if decision["should_use_sql_agent"] else "general"][decision.get("query_type")] += 1
+    return {
+        "sql": by_label["sql"].most_common(1)[0][0] if by_label["sql"] else "campaign",
+        "general": by_label["general"].most_common(1)[0][0] if by_label["general"] else "general",
+    }
+
+
+def _report_calibration(predictions: List[tuple]):
+    print("\nCalibration on the test set (confidence bucket -> agreement with the LLM):")
+    expected_calibration_error = 0.0
+    for low, high in zip(_CALIBRATION_BINS, _CALIBRATION_BINS[1:]):
+        bucket = [(confidence, correct) for confidence, correct in predictions
+                  if low <= confidence < high or (high == 1.0 and confidence == 1.0)]
+        if not bucket:
+            continue
+        mean_confidence = statistics.fmean(confidence for confidence, _ in bucket)
+        accuracy = sum(correct for _, correct in bucket) / len(bucket)
+        expected_calibration_error += len(bucket) / len(predictions) * abs(mean_confidence - accuracy)
+        print(f"  [{low:.2f}, {high:.2f}): {len(bucket):>5} decisions, mean confidence {mean_confidence:.3f}, "
+              f"agreement {accuracy:.3f}")
+    print(f"  Expected calibration error: {expected_calibration_error:.4f}")
+
+
+def main(args: argparse.Namespace):
+    decisions = [decision for path in args.log for decision in load_decision_log(path)]
+    train, calibration, test = split_decisions(
+        decisions, [1.0 - args.calibration_fraction - args.test_fraction, args.calibration_fraction], args.seed)
+    if not train or not test:
+        raise SystemExit(f"Not enough decisions to train and evaluate ({len(decisions)} distinct messages)")
+    sql_share = sum(decision["should_use_sql_agent"] for decision in decisions) / len(decisions)
+    print(f"Decisions: {len(decisions)} distinct messages ({sql_share:.0%} SQL); "
+          f"train {len(train)}, calibration {len(calibration)}, test {len(test)}")
+
+    started = time.perf_counter()
+    router = IntentRouter.train([decision["user_message"] for decision in train],
+                                [decision["should_use_sql_agent"] for decision in train],
+                                _query_types(decisions), l2=args.l2, epochs=args.epochs)
+    if calibration:
+        router.calibrate([decision["user_message"] for decision in calibration],
+                         [decision["should_use_sql_agent"] for decision in calibration])
+    print(f"Trained in {time.perf_counter() - started:.1f}s: {len(router.weights)} features, "
+          f"calibration a={router.calibration[0]:.3f} b={router.calibration[1]:.3f}")
+
+    started = time.perf_counter()
+    predictions = []
+    for decision in test:
+        should_use_sql_agent, confidence = router.predict(decision["user_message"])
+        predictions.append((confidence, should_use_sql_agent == decision["should_use_sql_agent"]))
+    local_ms = (time.perf_counter() - started) / len(test) * 1000
+
+    latencies = [decision["latency_seconds"] for decision in decisions if decision.get("latency_seconds")]
+    llm_ms = args.llm_latency_ms if args.llm_latency_ms is not None else (
+        statistics.median(latencies) * 1000 if latencies else 1500.0)
+    print(f"Routing latency: local {local_ms:.3f} ms, LLM {llm_ms:.0f} ms "
+          f"({'--llm-latency-ms' if args.llm_latency_ms is not None else 'median of logged decisions'})")
+
+    print(f"\n{'threshold':>9} {'local':>7} {'local agreement':>16} {'overall agreement':>18} {'mean latency':>13}")
+    for threshold in args.thresholds:
+        local = [correct for confidence, correct in predictions if confidence >= threshold]
+        coverage = len(local) / len(predictions)
+        local_agreement = sum(local) / len(local) if local else 1.0
+        overall_agreement = (sum(local) + len(predictions) - len(local)) / len(predictions)
+        latency = coverage * local_ms + (1 - coverage) * llm_ms
+        print(f"{threshold:>9.2f} {coverage:>7.1%} {local_agreement:>16.2%} {overall_agreement:>18.2%} "
+              f"{latency:>10.0f} ms")
+
+    _report_calibration(predictions)
+
+    if args.output:
+        router.save(args.output)
+        print(f"\nModel saved to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", action="append", required=True, help="decision log JSONL file (repeatable)")
+    parser.add_argument("--output", help="where to save the trained model (JSON)")
+    parser.add_argument("--calibration-fraction", type=float, default=0.2)
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--l2", type=float, default=1e-4, help="L2 regularisation strength")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float,
+                        help="LLM routing latency to assume; defaults to the median logged latency")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS)
+    main(parser.parse_args())
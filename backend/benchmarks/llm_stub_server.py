@@ -0,0 +1,373 @@
+"""
+Local OpenAI-compatible stand-in for load tests and offline runs of the agent pipeline.
+
+Serves ``POST /v1/chat/completions`` (streamed and non-streamed) with configurable time to
+first token and token rate, so ``OrchestratorService.process_query`` runs at realistic speeds
+without a provider. Point the backend at it with ``OPENAI_BASE_URL=http://127.0.0.1:8900/v1``.
+
+Responses come from, in order:
+  1. recordings keyed by a hash of the request messages (``--recordings``), captured from a real
+     provider with ``--record`` against ``--upstream-base-url``;
+  2. built-in synthetic responders that return well-formed answers for each agent's prompt;
+  3. filler text of ``--filler-tokens`` words.
+
+Usage (from the backend directory):
+    python -m benchmarks.llm_stub_server --latency-ms 400 --tokens-per-second 60
+    python -m benchmarks.llm_stub_server --record --upstream-base-url https://api.openai.com/v1 \\
+        --upstream-api-key sk-...
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from openai import AsyncOpenAI
+from rich import print
+
+_TOKEN_PATTERN = re.compile(r"\s*\S+\s*")
+
+
+def prompt_hash(messages: List[Dict[str, Any]]) -> str:
+    payload = json.dumps(
+        [{"role": message.get("role"), "content": message.get("content")} for message in messages],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _split_tokens(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text) or [text]
+
+
+def _quoted(text: str, label: str) -> str:
+    match = re.search(rf'{label}:\s*"?(.+?)"?\s*(?:\n|$)', text)
+    return match.group(1).strip() if match else ""
+
+
+def _looks_general(text: str) -> bool:
+    return bool(re.search(r"\b(purpose|how does|what can you|who are you|help me with|hello|hi)\b", text, re.I))
+
+
+def _dependency_analysis(system: str, user: str) -> str:
+    message = _quoted(user, "MESSAGE TO ANALYZE")
+    needs_context = bool(re.search(
+        r"\b(he|she|him|her|his|they|them|their|it|this|that|these|those|also|same|what about)\b", message, re.I))
+    return json.dumps({
+        "needs_context": needs_context,
+        "confidence": 0.9,
+        "reasoning": "Contains referential expressions." if needs_context else "Standalone request.",
+    })
+
+
+def _context_extraction(system: str, user: str) -> str:
+    history = re.findall(r"\[\d+\] User: (.+)", user)
+    return f"Previously discussed: {history[0]}" if history else "NO_RELEVANT_CONTEXT"
+
+
+def _standalone_enhancement(system: str, user: str) -> str:
+    return _quoted(user, "USER QUERY") or "Show me all customers"
+
+
+def _context_aware_query(system: str, user: str) -> str:
+    match = re.search(r"CURRENT USER MESSAGE:\s*\n(.+)", user)
+    return match.group(1).strip() if match else "Show me all customers"
+
+
+def _manager_decision(system: str, user: str) -> str:
+    query = _quoted(user, "Query")
+    general = _looks_general(query)
+    return json.dumps({
+        "should_use_sql_agent": not general,
+        "reasoning": "General system question." if general else "Customer data request.",
+        "confidence_score": 0.9,
+        "query_type": "general" if general else "campaign",
+    })
+
+
+def _generated_query(system: str, user: str) -> str:
+    return json.dumps({
+        "sql_query": "SELECT id, email, data_source, first_name, last_name, engagement_score "
+                     "FROM customers ORDER BY engagement_score DESC LIMIT 50",
+        "explanation": "Selects the most engaged customers.",
+        "confidence_score": 0.9,
+        "tables_used": ["customers"],
+    })
+
+
+def _validation(system: str, user: str) -> str:
+    return json.dumps({
+        "is_valid": True,
+        "confidence_score": 0.9,
+        "validation_details": "Query matches the request and returns relevant customers.",
+        "improvement_suggestions": [],
+    })
+
+
+def _marketing_intent(system: str, user: str) -> str:
+    needed = bool(re.search(r"\b(campaign|promot|outreach|email|sms|whatsapp|ads?)\b", _quoted(user, "User Query"),
+                            re.I))
+    return json.dumps({"needs_marketing_messages": needed, "reasoning": "Keyword match.", "confidence": 0.9})
+
+
+def _campaign_messages(system: str, user: str) -> str:
+    return json.dumps([
+        {"channel": "email", "subject": "A treat for you, {{first_name}}",
+         "message": "Hi {{first_name}}, we picked something special for you."},
+        {"channel": "sms", "message": "Hi {{first_name}}, your exclusive offer is waiting."},
+    ])
+
+
+# First system-prompt marker that matches selects the responder.
+SYNTHETIC_RESPONDERS: List[Tuple[str, Callable[[str, str], str]]] = [
+    ("expert conversation analyst", _dependency_analysis),
+    ("extracting relevant context from conversations", _context_extraction),
+    ("Make minimal improvements while preserving", _standalone_enhancement),
+    ("make user queries self-contained", _context_aware_query),
+    ("Manager Agent in a customer campaign", _manager_decision),
+    ("PostgreSQL Query Generator Agent", _generated_query),
+    ("Validator Agent specialized in validating", _validation),
+    ("Intent Analysis Agent", _marketing_intent),
+    ("Marketing Campaign Specialist", _campaign_messages),
+]
+
+
+class LlmStub:
+    """
+    Produces chat completion payloads and paces their delivery.
+
+    ``latency_ms`` (+/- ``jitter_ms``) is spent before the first token; after that content is
+    released at ``tokens_per_second`` (0 releases it all at once). ``error_rate`` of requests are
+    answered with a 429 and a ``Retry-After`` header to exercise client back-off.
+    """
+
+    def __init__(self, recordings_path: Optional[str] = None, latency_ms: float = 0, jitter_ms: float = 0,
+                 tokens_per_second: float = 0, filler_tokens: int = 200, error_rate: float = 0,
+                 use_recorded_timing: bool = False, upstream: Optional[AsyncOpenAI] = None):
+        self.recordings_path = recordings_path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.filler_tokens = filler_tokens
+        self.error_rate = error_rate
+        self.use_recorded_timing = use_recorded_timing
+        self.upstream = upstream
+        self.recordings: Dict[str, Dict[str, Any]] = {}
+        self.served: Dict[str, int] = {"recorded": 0, "synthetic": 0, "filler": 0, "upstream": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+        if recordings_path:
+            self._load_recordings()
+
+    def _load_recordings(self):
+        try:
+            with open(self.recordings_path) as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.recordings[entry["key"]] = entry
+        except FileNotFoundError:
+            return
+        print(f"[green]LLM stub: loaded {len(self.recordings)} recordings from {self.recordings_path}[/green]")
+
+    def _save_recording(self, entry: Dict[str, Any]):
+        self.recordings[entry["key"]] = entry
+        with self._lock, open(self.recordings_path, "a") as file:
+            file.write(json.dumps(entry) + "\n")
+
+    def _synthetic(self, messages: List[Dict[str, Any]]) -> Optional[str]:
+        system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+        user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        for marker, responder in SYNTHETIC_RESPONDERS:
+            if marker in system:
+                return responder(system, user)
+        return None
+
+    def _filler(self) -> str:
+        words = ["Customers", "in", "this", "segment", "show", "strong", "engagement", "and", "recent", "purchases."]
+        return " ".join(words[i % len(words)] for i in range(self.filler_tokens))
+
+    async def resolve(self, body: Dict[str, Any]) -> Tuple[str, Optional[float]]:
+        """Returns the completion text and, when replaying recorded timing, the recorded latency in ms."""
+        messages = body.get("messages") or []
+        key = prompt_hash(messages)
+        recorded = self.recordings.get(key)
+        if recorded is not None and self.upstream is None:
+            self.served["recorded"] += 1
+            return recorded["content"], recorded.get("latency_ms") if self.use_recorded_timing else None
+
+        if self.upstream is not None:
+            started = time.perf_counter()
+            response = await self.upstream.chat.completions.create(
+                model=body.get("model"),
+                messages=messages,
+                temperature=body.get("temperature"),
+                max_tokens=body.get("max_tokens"),
+            )
+            content = response.choices[0].message.content or ""
+            self._save_recording({
+                "key": key,
+                "content": content,
+                "latency_ms": (time.perf_counter() - started) * 1000,
+                "prompt_preview": (messages[-1].get("content") or "")[:120] if messages else "",
+            })
+            self.served["upstream"] += 1
+            return content, None
+
+        synthetic = self._synthetic(messages)
+        if synthetic is not None:
+            self.served["synthetic"] += 1
+            return synthetic, None
+        self.served["filler"] += 1
+        return self._filler(), None
+
+    def first_token_delay(self, recorded_latency_ms: Optional[float]) -> float:
+        if recorded_latency_ms is not None:
+            return recorded_latency_ms / 1000
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def should_rate_limit(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    async def paced(self, content: str) -> AsyncIterator[str]:
+        tokens = _split_tokens(content)
+        if self.tokens_per_second <= 0:
+            yield content
+            return
+        interval = 1 / self.tokens_per_second
+        started = time.perf_counter()
+        for index, token in enumerate(tokens):
+            delay = started + index * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield token
+
+
+def _usage(messages: List[Dict[str, Any]], content: str) -> Dict[str, int]:
+    prompt_tokens = sum(_estimate_tokens(message.get("content") or "") for message in messages)
+    completion_tokens = len(_split_tokens(content))
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def create_app(stub: LlmStub) -> FastAPI:
+    app = FastAPI(title="LLM stub")
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if stub.should_rate_limit():
+            stub.served["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": "1"},
+                content={"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}},
+            )
+
+        content, recorded_latency_ms = await stub.resolve(body)
+        await asyncio.sleep(stub.first_token_delay(recorded_latency_ms))
+
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model") or "stub"
+        usage = _usage(body.get("messages") or [], content)
+
+        if not body.get("stream"):
+            async for _ in stub.paced(content):
+                pass
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+            return "data: " + json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }) + "\n\n"
+
+        async def events() -> AsyncIterator[str]:
+            yield chunk({"role": "assistant", "content": ""})
+            async for token in stub.paced(content):
+                yield chunk({"content": token})
+            yield chunk({}, "stop")
+            if include_usage:
+                yield "data: " + json.dumps({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }) + "\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"recordings": len(stub.recordings), "served": stub.served}
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--recordings", default="llm_stub_recordings.jsonl")
+    parser.add_argument("--latency-ms", type=float, default=300, help="time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--tokens-per-second", type=float, default=80, help="0 sends the whole completion at once")
+    parser.add_argument("--filler-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests answered with 429")
+    parser.add_argument("--use-recorded-timing", action="store_true",
+                        help="replay the upstream latency captured with each recording")
+    parser.add_argument("--record", action="store_true", help="forward every request upstream and record it")
+    parser.add_argument("--upstream-base-url")
+    parser.add_argument("--upstream-api-key")
+    args = parser.parse_args()
+
+    if args.record and not args.upstream_base_url:
+        parser.error("--record requires --upstream-base-url")
+
+    stub = LlmStub(
+        recordings_path=args.recordings,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        filler_tokens=args.filler_tokens,
+        error_rate=args.error_rate,
+        use_recorded_timing=args.use_recorded_timing,
+        upstream=AsyncOpenAI(base_url=args.upstream_base_url, api_key=args.upstream_api_key)
+        if args.record else None,
+    )
+    uvicorn.run(create_app(stub), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,118 @@
+"""
+Benchmark for carrying a query result from the validator to every sink: row dicts against ResultSet.
+
+Both pipelines take the same driver rows and do what the orchestrator does with a large result:
+build the validation and processing results, send the QUERY_PROCESSING_RESULT and RETRIEVED_DATA
+frames and serialize the sources for chat_messages. The row-dict pipeline is the previous one, where
+the processing result copied the rows on validation, QUERY_PROCESSING_RESULT dumped them twice and
+the sources were written with ``json.dumps``.
+Reports wall time, peak traced memory and the memory still held by the two frames afterwards, as the
+replay buffer keeps them for STREAM_REPLAY_TTL_SECONDS.
+
+Usage (from the backend directory):
+    python -m benchmarks.result_set_benchmark --rows 10000 --repeat 5
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from rich import print
+
+from core.utils import dump_json
+from models.result_set import ResultSet
+from models.schemas import LlmResponseTypes, QueryProcessingResult, QueryValidationResult
+from services.stream_service import StreamMessage
+
+_COLUMNS = ["id", "email", "data_source", "first_name", "last_name", "engagement_score", "created_at"]
+
+
+class _RowDictValidationResult(BaseModel):
+    is_valid: bool
+    confidence_score: float
+    validation_details: str
+    all_data: Optional[List[Dict[str, Any]]] = None
+    total_count: Optional[int] = None
+
+
+class _RowDictProcessingResult(BaseModel):
+    success: bool
+    sql_query: Optional[str] = None
+    validation_result: Optional[_RowDictValidationResult] = None
+    all_data: Optional[List[Dict[str, Any]]] = None
+    total_count: Optional[int] = None
+
+
+def _driver_rows(count: int) -> List[tuple]:
+    created_at = datetime(2024, 1, 1)
+    return [(f"customer-{index}", f"customer{index}@example.com", "SHOPIFY", "Alex", f"Doe{index}", index % 100,
+             created_at + timedelta(minutes=index)) for index in range(count)]
+
+
+def _row_dicts(rows: List[tuple]) -> Tuple[List[StreamMessage], int]:
+    all_data = [{column: value.isoformat() if hasattr(value, 'isoformat') else value
+                 for column, value in zip(_COLUMNS, row)} for row in rows]
+    validation_result = _RowDictValidationResult(is_valid=True, confidence_score=0.9, validation_details="ok")
+    validation_result.all_data = all_data
+    result = _RowDictProcessingResult(success=True, sql_query="SELECT ...", validation_result=validation_result,
+                                      all_data=validation_result.all_data, total_count=len(all_data))
+    frames = [StreamMessage(response_type=LlmResponseTypes.RETRIEVED_DATA, content="Sources used for the response.",
+                            data={"sources": result.all_data}),
+              StreamMessage(response_type=LlmResponseTypes.QUERY_PROCESSING_RESULT, content="done",
+                            data=result.model_dump())]
+    size = sum(len(frame.to_sse()) for frame in frames)
+    return frames, size + len(json.dumps(result.all_data))
+
+
+def _result_set(rows: List[tuple]) -> Tuple[List[StreamMessage], int]:
+    all_data = ResultSet.from_rows(_COLUMNS, rows)
+    validation_result = QueryValidationResult(is_valid=True, confidence_score=0.9, validation_details="ok")
+    validation_result.all_data = all_data
+    result = QueryProcessingResult(success=True, sql_query="SELECT ...", validation_result=validation_result,
+                                   all_data=validation_result.all_data, total_count=len(all_data))
+    frames = [StreamMessage(response_type=LlmResponseTypes.RETRIEVED_DATA, content="Sources used for the response.",
+                            data={"sources": result.all_data}),
+              StreamMessage(response_type=LlmResponseTypes.QUERY_PROCESSING_RESULT, content="done",
+                            data=result.model_dump(exclude={"all_data": True, "validation_result": {"all_data"}}))]
+    size = sum(len(frame.to_sse()) for frame in frames)
+    return frames, size + len(dump_json(result.all_data.to_records()))
+
+
+def _measure(pipeline, rows: List[tuple], repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pipeline(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    frames, size = pipeline(rows)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del frames
+    return timings, peak, retained, size
+
+
+def main(args: argparse.Namespace):
+    rows = _driver_rows(args.rows)
+    print(f"{args.rows} rows x {len(_COLUMNS)} columns, {args.repeat} runs")
+    print(f"{'pipeline':<12}{'p50 ms':>10}{'mean ms':>10}{'peak MiB':>11}{'retained MiB':>14}{'bytes out':>12}")
+    results = {}
+    for name, pipeline in (("row dicts", _row_dicts), ("ResultSet", _result_set)):
+        timings, peak, retained, size = _measure(pipeline, rows, args.repeat)
+        results[name] = (statistics.median(timings), peak, retained)
+        print(f"{name:<12}{statistics.median(timings):>10.1f}{statistics.mean(timings):>10.1f}"
+              f"{peak / 2 ** 20:>11.1f}{retained / 2 ** 20:>14.1f}{size:>12}")
+    (old_ms, old_peak, old_retained), (new_ms, new_peak, new_retained) = results["row dicts"], results["ResultSet"]
+    print(f"ResultSet: {old_ms / new_ms:.1f}x faster, {old_peak / new_peak:.1f}x less peak memory, "
+          f"{old_retained / new_retained:.1f}x less retained memory")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,71 @@
+"""
+Near-duplicate safety and lookup cost of the SQL plan cache.
+
+Caches the SQL for the first request of every pair, then looks up the second one. Rephrasings
+that only add or drop filler words and stopwords must hit; pairs that swap a literal value (city,
+product, number), a negation or a time window must miss, since a hit would run the cached SQL for a
+different audience without validation. Exits with status 1 if any pair is decided wrongly.
+
+Usage (from the backend directory):
+    python -m benchmarks.sql_plan_cache_benchmark
+    python -m benchmarks.sql_plan_cache_benchmark --entries 512 --verbose
+"""
+import argparse
+import sys
+import time
+
+from services.sql_plan_cache import SqlPlanCache
+
+_PAIRS = [
+    # (cached request, new request, should hit)
+    ("Find customers in Seattle who purchased electronics with high engagement scores",
+     "Find customers in Portland who purchased electronics with high engagement scores", False),
+    ("Customers who bought shoes, shirts and bags", "Customers who bought shoes, shirts and hats", False),
+    ("Customers from Shopify with more than 5 orders", "Customers from Shopify with more than 3 orders", False),
+    ("Customers who purchased in the last month", "Customers who purchased in the last year", False),
+    ("Customers who opened the newsletter", "Customers who have not opened the newsletter", False),
+    ("Customers in Seattle but not Portland", "Customers in Portland but not Seattle", False),
+    ("Customers with orders over 100 dollars", "Customers with orders under 100 dollars", False),
+    ("VIP customers from Klaviyo", "Inactive customers from Klaviyo", False),
+    ("Find customers in Seattle who purchased electronics",
+     "Can you please show me all the customers in Seattle who purchased electronics", True),
+    ("List customers who bought shoes", "Hey, just list those customers who bought shoes, thanks", True),
+    ("Customers from Shopify with more than 5 orders", "Show me customers from Shopify with more than 5 orders",
+     True),
+    ("Customers who purchased in the last month", "What customers purchased in the last month?", True),
+]
+
+
+def main(entries: int, verbose: bool) -> int:
+    wrong = 0
+    for cached, request, should_hit in _PAIRS:
+        cache = SqlPlanCache(max_entries=entries, ttl_seconds=3600)
+        cache.set(cached, sql_query=f"-- {cached}", explanation="", tables_used=["customers"],
+                  generation_confidence=0.9, validation_confidence=0.9)
+        hit = cache.get(request) is not None
+        outcome = "ok" if hit == should_hit else "WRONG"
+        wrong += hit != should_hit
+        if verbose or hit != should_hit:
+            print(f"{outcome:<6}{'hit' if hit else 'miss':<5}{cached!r} -> {request!r}")
+
+    cache = SqlPlanCache(max_entries=entries, ttl_seconds=3600)
+    for index in range(entries):
+        cache.set(f"Customers in city{index} who purchased product{index}", sql_query="SELECT 1", explanation="",
+                  tables_used=["customers"], generation_confidence=0.9, validation_confidence=0.9)
+    rounds = 200
+    started = time.perf_counter()
+    for _ in range(rounds):
+        cache.get("Customers in an uncached city who purchased something else")
+    miss_cost = (time.perf_counter() - started) / rounds * 1e6
+
+    print(f"Pairs: {len(_PAIRS)}, decided wrongly: {wrong}")
+    print(f"Miss cost with {entries} cached plans: {miss_cost:.1f} us per lookup")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=512, help="cached plans for the miss-cost measurement")
+    parser.add_argument("--verbose", action="store_true", help="print every pair and its outcome")
+    args = parser.parse_args()
+    sys.exit(main(args.entries, args.verbose))
@@ -0,0 +1,150 @@
+"""
+Benchmark for StreamService: per-frame latency and idle CPU cost.
+
+Compares the event-driven StreamService against the previous 10 ms polling loop. LLM_RESPONSE
+coalescing is disabled for the latency runs so every frame is measured individually.
+
+Usage (from the backend directory):
+    python -m benchmarks.stream_service_benchmark --frames 500 --interval-ms 20 --idle-streams 500
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import statistics
+import time
+from queue import Queue, Empty
+
+from rich import print
+
+from models.schemas import LlmResponseTypes
+from services.stream_service import StreamMessage, StreamService
+
+
+class PollingStreamService(StreamService):
+    """The pre-asyncio implementation: a thread-safe Queue polled every 10 ms."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.message_queue = Queue()
+
+    def _start_streaming(self):
+        with self._lock:
+            self.is_streaming = True
+
+    def _put(self, message: StreamMessage):
+        self.message_queue.put(message)
+
+    async def stream_messages(self):
+        self._start_streaming()
+        while True:
+            await asyncio.sleep(0.01)
+            try:
+                message = self.message_queue.get_nowait()
+            except Empty:
+                if not self.is_streaming and self.message_queue.empty():
+                    break
+                continue
+            print(f"[blue]StreamService: Dequeued message: {message}[/blue]")
+            yield f"data: {message.model_dump_json()}\n\n"
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _measure_frame_latency(service_cls, frames: int, interval: float, from_thread: bool) -> list[float]:
+    service = service_cls(coalesce_interval_ms=0)
+    sent_at: dict[int, float] = {}
+    latencies = []
+
+    def produce_one(i: int):
+        sent_at[i] = time.perf_counter()
+        service.add_message(StreamMessage(
+            response_type=LlmResponseTypes.LLM_RESPONSE,
+            content=str(i),
+        ))
+
+    async def produce():
+        for i in range(frames):
+            if from_thread:
+                await asyncio.to_thread(produce_one, i)
+            else:
+                produce_one(i)
+            await asyncio.sleep(interval * random.uniform(0.5, 1.5))
+        service.end_streaming()
+
+    stream = service.stream_messages()
+    first = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+    producer = asyncio.create_task(produce())
+
+    frame = await first
+    while True:
+        if '"LLM_RESPONSE"' in frame:
+            index = int(frame.split('"content":"', 1)[1].split('"', 1)[0])
+            latencies.append((time.perf_counter() - sent_at[index]) * 1000)
+        try:
+            frame = await stream.__anext__()
+        except StopAsyncIteration:
+            break
+    await producer
+    return latencies
+
+
+async def _measure_idle_cpu(service_cls, streams: int, seconds: float) -> float:
+    services = [service_cls() for _ in range(streams)]
+
+    async def consume(service):
+        async for _ in service.stream_messages():
+            pass
+
+    consumers = [asyncio.create_task(consume(s)) for s in services]
+    await asyncio.sleep(0.5)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    cpu_used = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    for service in services:
+        service.end_streaming()
+    await asyncio.gather(*consumers)
+    return cpu_used / wall * 100
+
+
+async def main(frames: int, interval_ms: float, idle_streams: int, idle_seconds: float):
+    results = []
+    for name, service_cls in (("polling (10 ms)", PollingStreamService), ("asyncio.Queue", StreamService)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            same_loop = await _measure_frame_latency(service_cls, frames, interval_ms / 1000, from_thread=False)
+            cross_thread = await _measure_frame_latency(service_cls, frames, interval_ms / 1000, from_thread=True)
+            idle_cpu = await _measure_idle_cpu(service_cls, idle_streams, idle_seconds)
+        results.append((name, same_loop, cross_thread, idle_cpu))
+
+    print(f"Frames per run: {frames} every {interval_ms:.0f} ms, "
+          f"idle streams: {idle_streams}, idle window: {idle_seconds:.1f}s")
+    print(f"{'implementation':<18}{'producer':<14}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, same_loop, cross_thread, _ in results:
+        for label, latencies in (("same loop", same_loop), ("other thread", cross_thread)):
+            print(f"{name:<18}{label:<14}"
+                  f"{_percentile(latencies, 50):>10.3f}{_percentile(latencies, 95):>10.3f}"
+                  f"{_percentile(latencies, 99):>10.3f}{statistics.mean(latencies):>10.3f}")
+    print()
+    print(f"{'implementation':<18}{'idle CPU % (' + str(idle_streams) + ' streams)':>30}")
+    for name, _, _, idle_cpu in results:
+        print(f"{name:<18}{idle_cpu:>30.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--interval-ms", type=float, default=20.0)
+    parser.add_argument("--idle-streams", type=int, default=500)
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.frames, args.interval_ms, args.idle_streams, args.idle_seconds))
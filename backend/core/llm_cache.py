@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from rich import print
+
+from core.metrics import metrics
+
+
+class LlmResponseCache:
+    """
+    Two-tier cache for non-streamed chat completion responses.
+
+    The first tier is an in-memory LRU with a per-entry TTL. The optional second tier
+    is a SQLite file that survives restarts and is shared by workers on the same host.
+    Entries found on disk are promoted back into memory.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._requests = metrics.counter("llm_cache_requests_total", "LLM response cache lookups by outcome")
+        if sqlite_path:
+            self._init_sqlite()
+
+    @staticmethod
+    def make_key(model: str, messages: Any, temperature: Optional[float], max_tokens: Optional[int]) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection whose transaction is committed (or rolled back on error) and which is then closed."""
+        with closing(sqlite3.connect(self.sqlite_path, timeout=5)) as connection, connection:
+            yield connection
+
+    def _init_sqlite(self):
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT expires_at, value FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[0] <= time.time():
+                connection.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+                return None
+            return row
+
+    def _disk_set(self, key: str, value: str, expires_at: float):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def _memory_set(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self._requests.inc(result="hit_memory")
+                    return entry[1]
+                del self._entries[key]
+
+        if self.sqlite_path:
+            try:
+                row = await asyncio.to_thread(self._disk_get, key)
+            except sqlite3.Error as e:
+                print(f"[yellow]LLM cache: SQLite lookup failed: {e}[/yellow]")
+                row = None
+            if row is not None:
+                expires_at, value = row
+                self._memory_set(key, value, expires_at)
+                self._requests.inc(result="hit_disk")
+                return value
+
+        self._requests.inc(result="miss")
+        return None
+
+    async def set(self, key: str, value: str):
+        expires_at = time.time() + self.ttl_seconds
+        self._memory_set(key, value, expires_at)
+        if self.sqlite_path:
+            try:
+                await asyncio.to_thread(self._disk_set, key, value, expires_at)
+            except sqlite3.Error as e:
+                print(f"[yellow]LLM cache: SQLite write failed: {e}[/yellow]")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.sqlite_path:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM llm_response_cache")
+
+    def stats(self) -> Dict[str, float]:
+        hits = self._requests.value(result="hit_memory") + self._requests.value(result="hit_disk")
+        misses = self._requests.value(result="miss")
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
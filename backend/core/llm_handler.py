@@ -1,8 +1,171 @@
-from openai import AsyncOpenAI
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Optional
 
+from openai import AsyncOpenAI, RateLimitError
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from core.llm_cache import LlmResponseCache
+from core.llm_scheduler import LlmPriority, LlmScheduler
+from core.metrics import metrics, TOKEN_BUCKETS
 from core.settings import settings
 
 openai_client = AsyncOpenAI(
     api_key=settings.openai_api_key,
     base_url=settings.openai_base_url
 )
+
+
+class LlmTelemetry:
+    """
+    Per-agent, per-call-site instrumentation for chat completion calls.
+
+    Records wall time, time to first token for streamed calls, prompt/completion token
+    counts, estimated cost and failures into the process-wide metrics registry.
+    """
+
+    def __init__(self):
+        self.requests = metrics.counter(
+            "llm_requests_total", "Chat completion calls by agent, call site and outcome")
+        self.errors = metrics.counter(
+            "llm_errors_total", "Failed chat completion calls by agent, call site and error type")
+        self.duration = metrics.histogram(
+            "llm_request_duration_seconds", "Wall time of chat completion calls, including streaming")
+        self.time_to_first_token = metrics.histogram(
+            "llm_time_to_first_token_seconds", "Time until the first content chunk of streamed calls")
+        self.prompt_tokens = metrics.histogram(
+            "llm_prompt_tokens", "Prompt tokens per chat completion call", TOKEN_BUCKETS)
+        self.completion_tokens = metrics.histogram(
+            "llm_completion_tokens", "Completion tokens per chat completion call", TOKEN_BUCKETS)
+        self.cost = metrics.counter(
+            "llm_cost_usd_total", "Estimated spend based on LLM_PROMPT_COST_PER_1K / LLM_COMPLETION_COST_PER_1K")
+
+    def record_success(self, agent: str, call_site: str, started: float, streamed: bool, usage=None,
+                       outcome: str = "success"):
+        self.requests.inc(agent=agent, call_site=call_site, outcome=outcome)
+        self.duration.observe(time.perf_counter() - started, agent=agent, call_site=call_site, streamed=streamed)
+        if usage is None:
+            return
+        self.prompt_tokens.observe(usage.prompt_tokens, agent=agent, call_site=call_site)
+        self.completion_tokens.observe(usage.completion_tokens, agent=agent, call_site=call_site)
+        cost = (usage.prompt_tokens * settings.llm_prompt_cost_per_1k
+                + usage.completion_tokens * settings.llm_completion_cost_per_1k) / 1000
+        if cost:
+            self.cost.inc(cost, agent=agent, call_site=call_site)
+
+    def record_failure(self, agent: str, call_site: str, started: float, streamed: bool, error: BaseException):
+        outcome = "cancelled" if isinstance(error, (asyncio.CancelledError, GeneratorExit)) else "error"
+        self.requests.inc(agent=agent, call_site=call_site, outcome=outcome)
+        self.duration.observe(time.perf_counter() - started, agent=agent, call_site=call_site, streamed=streamed)
+        if outcome == "error":
+            self.errors.inc(agent=agent, call_site=call_site, error=type(error).__name__)
+
+    async def instrument_stream(self, stream: AsyncIterator[ChatCompletionChunk], agent: str, call_site: str,
+                                started: float, on_finish: Optional[Callable[[], None]] = None
+                                ) -> AsyncIterator[ChatCompletionChunk]:
+        usage = None
+        first_token_seen = False
+        try:
+            async for chunk in stream:
+                if not first_token_seen and chunk.choices and chunk.choices[0].delta.content:
+                    first_token_seen = True
+                    self.time_to_first_token.observe(time.perf_counter() - started, agent=agent,
+                                                     call_site=call_site)
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    # The usage-only final chunk, requested by chat_completion.
+                    continue
+                yield chunk
+        except BaseException as e:
+            self.record_failure(agent, call_site, started, True, e)
+            raise
+        finally:
+            if on_finish is not None:
+                on_finish()
+        self.record_success(agent, call_site, started, True, usage)
+
+
+class LlmHandler:
+    """
+    Single entry point for the agents' chat completion calls.
+
+    Every call is attributed to an ``agent`` and ``call_site`` for telemetry. Call sites
+    opt into response caching with ``cache=True``. Only non-streamed calls are cached,
+    keyed on model, messages, temperature and max_tokens. Streamed calls request token usage
+    in a final chunk, which is recorded and not passed on, so every yielded chunk has choices.
+
+    Calls that reach the provider are admitted by the scheduler according to their
+    ``priority``. A streamed call keeps its slot until the returned stream has been
+    fully consumed or closed, so callers must always iterate it.
+    """
+
+    def __init__(self, client: AsyncOpenAI, cache: Optional[LlmResponseCache] = None,
+                 telemetry: Optional[LlmTelemetry] = None, scheduler: Optional[LlmScheduler] = None):
+        self.client = client
+        self.cache = cache
+        self.telemetry = telemetry or LlmTelemetry()
+        self.scheduler = scheduler
+
+    @staticmethod
+    def _retry_after(error: RateLimitError) -> float:
+        try:
+            return float(error.response.headers.get("retry-after", 1))
+        except (AttributeError, TypeError, ValueError):
+            return 1.0
+
+    async def chat_completion(self, *, agent: str = "unknown", call_site: str = "unknown", cache: bool = False,
+                              priority: LlmPriority = LlmPriority.STANDARD, **kwargs):
+        started = time.perf_counter()
+        streamed = bool(kwargs.get("stream"))
+        if streamed:
+            kwargs.setdefault("stream_options", {"include_usage": True})
+
+        key = None
+        if cache and self.cache is not None and not streamed:
+            key = self.cache.make_key(
+                kwargs.get("model"), kwargs.get("messages"), kwargs.get("temperature"), kwargs.get("max_tokens")
+            )
+            cached = await self.cache.get(key)
+            if cached is not None:
+                self.telemetry.record_success(agent, call_site, started, False, outcome="cache_hit")
+                return ChatCompletion.model_validate_json(cached)
+
+        if self.scheduler is not None:
+            await self.scheduler.acquire(priority)
+        release = self.scheduler.release if self.scheduler is not None else None
+        try:
+            response = await self.client.chat.completions.create(**kwargs)
+        except BaseException as e:
+            if isinstance(e, RateLimitError) and self.scheduler is not None:
+                self.scheduler.back_off(self._retry_after(e))
+            if release is not None:
+                release()
+            self.telemetry.record_failure(agent, call_site, started, streamed, e)
+            raise
+
+        if streamed:
+            return self.telemetry.instrument_stream(response, agent, call_site, started, on_finish=release)
+
+        if release is not None:
+            release()
+        self.telemetry.record_success(agent, call_site, started, False, getattr(response, "usage", None))
+        if key is not None:
+            await self.cache.set(key, response.model_dump_json())
+        return response
+
+
+llm_handler = LlmHandler(
+    openai_client,
+    cache=LlmResponseCache(
+        max_entries=settings.llm_cache_max_entries,
+        ttl_seconds=settings.llm_cache_ttl_seconds,
+        sqlite_path=settings.llm_cache_sqlite_path,
+    ) if settings.llm_cache_enabled else None,
+    scheduler=LlmScheduler(
+        max_concurrency=settings.llm_max_concurrency,
+        rate_per_second=settings.llm_rate_limit_per_second,
+        burst=settings.llm_rate_limit_burst,
+        low_priority_timeout=settings.llm_low_priority_queue_timeout_seconds,
+    ),
+)
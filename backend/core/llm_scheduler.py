@@ -0,0 +1,140 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, List, Optional, Tuple
+
+from rich import print
+
+from core.metrics import metrics
+
+
+class LlmPriority(IntEnum):
+    """Scheduling classes for outbound LLM calls; lower values are served first."""
+    INTERACTIVE = 0
+    STANDARD = 1
+    RETRY = 2
+    BACKGROUND = 3
+
+
+class LlmSchedulerSaturatedError(Exception):
+    pass
+
+
+class LlmScheduler:
+    """
+    Admission control for outbound LLM calls.
+
+    A call needs a concurrency slot (at most ``max_concurrency`` calls in flight,
+    streamed calls hold theirs until the stream is consumed) and a token from a
+    token bucket refilled at ``rate_per_second`` up to ``burst``. Waiting calls are
+    admitted strictly by priority, then FIFO. RETRY and BACKGROUND calls give up with
+    ``LlmSchedulerSaturatedError`` after ``low_priority_timeout`` seconds in the queue.
+    When the provider answers 429, ``back_off`` pauses admission for everyone.
+    """
+
+    def __init__(self, max_concurrency: int, rate_per_second: float, burst: int, low_priority_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = max(burst, 1)
+        self.low_priority_timeout = low_priority_timeout
+        self._active = 0
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._queue_wait = metrics.histogram(
+            "llm_scheduler_queue_wait_seconds", "Time LLM calls spent waiting for admission")
+        self._rejections = metrics.counter(
+            "llm_scheduler_rejections_total", "Low-priority LLM calls dropped because the scheduler was saturated")
+        self._back_offs = metrics.counter(
+            "llm_scheduler_back_offs_total", "Admission pauses triggered by provider rate limiting")
+
+    def _refill(self, now: float):
+        if self.rate_per_second <= 0:
+            self._tokens = float(self.burst)
+            return
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_second)
+        self._refilled_at = now
+
+    def _can_admit(self, now: float) -> bool:
+        if self._active >= self.max_concurrency or now < self._paused_until:
+            return False
+        self._refill(now)
+        return self._tokens >= 1
+
+    def _admit(self):
+        self._active += 1
+        if self.rate_per_second > 0:
+            self._tokens -= 1
+
+    def _dispatch(self):
+        now = time.monotonic()
+        while self._waiters:
+            if self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_admit(now):
+                break
+            _, _, future = heapq.heappop(self._waiters)
+            self._admit()
+            future.set_result(None)
+
+        if self._waiters and self._active < self.max_concurrency and self._wakeup is None:
+            if now < self._paused_until:
+                delay = self._paused_until - now
+            else:
+                delay = (1 - self._tokens) / self.rate_per_second if self.rate_per_second > 0 else 0
+            self._wakeup = asyncio.get_running_loop().call_later(max(delay, 0.001), self._on_wakeup)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    async def acquire(self, priority: LlmPriority):
+        started = time.monotonic()
+        if not self._waiters and self._can_admit(started):
+            self._admit()
+            self._queue_wait.observe(0.0, priority=priority.name)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        self._dispatch()
+        timeout = self.low_priority_timeout if priority >= LlmPriority.RETRY else None
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                self.release()
+            future.cancel()
+            self._rejections.inc(priority=priority.name)
+            raise LlmSchedulerSaturatedError(
+                f"LLM scheduler saturated: {priority.name} call waited more than {timeout:.0f}s")
+        except BaseException:
+            if future.done() and not future.cancelled():
+                self.release()
+            future.cancel()
+            raise
+        self._queue_wait.observe(time.monotonic() - started, priority=priority.name)
+
+    def release(self):
+        self._active -= 1
+        self._dispatch()
+
+    def back_off(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._back_offs.inc()
+        print(f"[yellow]LLM scheduler: provider rate limit hit, pausing admissions for {seconds:.1f}s[/yellow]")
+
+    @asynccontextmanager
+    async def slot(self, priority: LlmPriority) -> AsyncIterator[None]:
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
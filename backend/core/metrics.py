@@ -0,0 +1,134 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Counter:
+    """Monotonic in-process counter, optionally split by labels."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] += amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            values: List[Dict[str, Any]] = [
+                {"labels": dict(key), "value": value} for key, value in self._values.items()
+            ]
+        return {"type": "counter", "description": self.description, "values": values}
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+class _HistogramSeries:
+    def __init__(self, bucket_count: int):
+        self.bucket_counts = [0] * (bucket_count + 1)
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram:
+    """
+    Fixed-bucket in-process histogram, optionally split by labels.
+
+    Quantiles are estimated by linear interpolation inside the bucket that contains
+    them, the same way Prometheus' ``histogram_quantile`` does.
+    """
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            series.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.count += 1
+            series.sum += value
+
+    def _quantile(self, series: _HistogramSeries, q: float) -> Optional[float]:
+        if series.count == 0:
+            return None
+        rank = q * series.count
+        cumulative = 0
+        for index, bucket_count in enumerate(series.bucket_counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            values: List[Dict[str, Any]] = []
+            for key, series in self._series.items():
+                values.append({
+                    "labels": dict(key),
+                    "count": series.count,
+                    "sum": series.sum,
+                    "mean": series.sum / series.count if series.count else None,
+                    "p50": self._quantile(series, 0.5),
+                    "p95": self._quantile(series, 0.95),
+                    "p99": self._quantile(series, 0.99),
+                    "buckets": {
+                        **{str(bound): count for bound, count in zip(self.buckets, series.bucket_counts)},
+                        "+Inf": series.bucket_counts[-1],
+                    },
+                })
+        return {"type": "histogram", "description": self.description, "values": values}
+
+
+class MetricsRegistry:
+    """Process-local registry of named metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, description)
+            return self._metrics[name]
+
+    def histogram(self, name: str, description: str = "", buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, description, buckets)
+            return self._metrics[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+metrics = MetricsRegistry()
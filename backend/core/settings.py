@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 from pydantic_settings import BaseSettings
 
@@ -8,6 +9,63 @@ class Settings(BaseSettings):
     openai_base_url: str = os.environ.get('OPENAI_BASE_URL')
     openai_model: str = os.environ.get('OPENAI_MODEL')
     database_url: str = os.environ.get('DATABASE_URL')
+    async_database_url: str = os.environ.get('ASYNC_DATABASE_URL', '')
+
+    analytics_database_url: str = os.environ.get('ANALYTICS_DATABASE_URL', '')
+    analytics_pool_size: int = int(os.environ.get('ANALYTICS_POOL_SIZE', 5))
+    analytics_pool_max_overflow: int = int(os.environ.get('ANALYTICS_POOL_MAX_OVERFLOW', 0))
+    analytics_pool_timeout_seconds: float = float(os.environ.get('ANALYTICS_POOL_TIMEOUT_SECONDS', 30))
+    analytics_pool_recycle_seconds: int = int(os.environ.get('ANALYTICS_POOL_RECYCLE_SECONDS', 1800))
+    analytics_pool_pre_ping: bool = os.environ.get('ANALYTICS_POOL_PRE_PING', 'true').lower() == 'true'
+
+    stream_coalesce_interval_ms: float = float(os.environ.get('STREAM_COALESCE_INTERVAL_MS', 50))
+    stream_coalesce_max_bytes: int = int(os.environ.get('STREAM_COALESCE_MAX_BYTES', 1024))
+    stream_replay_buffer_size: int = int(os.environ.get('STREAM_REPLAY_BUFFER_SIZE', 2048))
+    stream_replay_ttl_seconds: float = float(os.environ.get('STREAM_REPLAY_TTL_SECONDS', 60))
+    stream_disconnect_grace_seconds: float = float(os.environ.get('STREAM_DISCONNECT_GRACE_SECONDS', 10))
+
+    llm_cache_enabled: bool = os.environ.get('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+    llm_cache_max_entries: int = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 1024))
+    llm_cache_ttl_seconds: float = float(os.environ.get('LLM_CACHE_TTL_SECONDS', 3600))
+    llm_cache_sqlite_path: Optional[str] = os.environ.get('LLM_CACHE_SQLITE_PATH')
+
+    llm_max_concurrency: int = int(os.environ.get('LLM_MAX_CONCURRENCY', 16))
+    llm_rate_limit_per_second: float = float(os.environ.get('LLM_RATE_LIMIT_PER_SECOND', 0))
+    llm_rate_limit_burst: int = int(os.environ.get('LLM_RATE_LIMIT_BURST', 20))
+    llm_low_priority_queue_timeout_seconds: float = float(os.environ.get('LLM_LOW_PRIORITY_QUEUE_TIMEOUT_SECONDS', 60))
+
+    dependency_rules_enabled: bool = os.environ.get('DEPENDENCY_RULES_ENABLED', 'true').lower() == 'true'
+    entity_index_enabled: bool = os.environ.get('ENTITY_INDEX_ENABLED', 'true').lower() == 'true'
+    conversation_summary_enabled: bool = os.environ.get('CONVERSATION_SUMMARY_ENABLED', 'true').lower() == 'true'
+    conversation_summary_recent_turns: int = int(os.environ.get('CONVERSATION_SUMMARY_RECENT_TURNS', 4))
+
+    speculative_routing_enabled: bool = os.environ.get('SPECULATIVE_ROUTING_ENABLED', 'true').lower() == 'true'
+    speculative_routing_min_similarity: float = float(os.environ.get('SPECULATIVE_ROUTING_MIN_SIMILARITY', 0.7))
+    intent_router_model_path: Optional[str] = os.environ.get('INTENT_ROUTER_MODEL_PATH')
+    intent_router_min_confidence: float = float(os.environ.get('INTENT_ROUTER_MIN_CONFIDENCE', 0.9))
+    manager_decision_log_path: Optional[str] = os.environ.get('MANAGER_DECISION_LOG_PATH')
+
+    sql_plan_cache_enabled: bool = os.environ.get('SQL_PLAN_CACHE_ENABLED', 'true').lower() == 'true'
+    sql_plan_cache_max_entries: int = int(os.environ.get('SQL_PLAN_CACHE_MAX_ENTRIES', 512))
+    sql_plan_cache_ttl_seconds: float = float(os.environ.get('SQL_PLAN_CACHE_TTL_SECONDS', 3600))
+
+    validation_history_max_entries: int = int(os.environ.get('VALIDATION_HISTORY_MAX_ENTRIES', 5000))
+    validation_history_top_k: int = int(os.environ.get('VALIDATION_HISTORY_TOP_K', 3))
+
+    sql_generation_candidates: int = int(os.environ.get('SQL_GENERATION_CANDIDATES', 1))
+    sql_generation_latency_budget_seconds: float = float(os.environ.get('SQL_GENERATION_LATENCY_BUDGET_SECONDS', 0))
+
+    sql_static_analysis_enabled: bool = os.environ.get('SQL_STATIC_ANALYSIS_ENABLED', 'true').lower() == 'true'
+
+    sql_sample_max_rows: int = int(os.environ.get('SQL_SAMPLE_MAX_ROWS', 100))
+    sql_result_max_rows: int = int(os.environ.get('SQL_RESULT_MAX_ROWS', 10000))
+    sql_result_count_mode: str = os.environ.get('SQL_RESULT_COUNT_MODE', 'exact')
+    sql_statement_timeout_ms: int = int(os.environ.get('SQL_STATEMENT_TIMEOUT_MS', 30000))
+    sql_max_plan_cost: float = float(os.environ.get('SQL_MAX_PLAN_COST', 10000000))
+    sql_max_plan_rows: int = int(os.environ.get('SQL_MAX_PLAN_ROWS', 0))
+
+    llm_prompt_cost_per_1k: float = float(os.environ.get('LLM_PROMPT_COST_PER_1K', 0))
+    llm_completion_cost_per_1k: float = float(os.environ.get('LLM_COMPLETION_COST_PER_1K', 0))
 
     class Config:
         env_file = ".env"
@@ -1,6 +1,7 @@
 import json
 import re
 
+import pydantic_core
 from rich import print
 
 
@@ -22,3 +23,8 @@ def parse_json(text: str):
     raise json.JSONDecodeError(
         "No JSON-like content found in the input string or the input string is not a valid JSON string.",
         "", 0)
+
+
+def dump_json(value) -> str:
+    """Like ``json.dumps``, but several times faster on large row lists and it also encodes Decimal, UUID and dates."""
+    return pydantic_core.to_json(value).decode()
@@ -1,15 +1,59 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from core.settings import settings
+from core.utils import dump_json
 
 Base = declarative_base()
 
 engine = create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-from models.models import Integration, ChatMessage, Customer
+_ASYNC_DRIVERS = (
+    ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+    ("postgresql://", "postgresql+asyncpg://"),
+    ("postgres://", "postgresql+asyncpg://"),
+    ("sqlite://", "sqlite+aiosqlite://"),
+)
+
+
+def _async_database_url(database_url: str) -> str:
+    for sync_prefix, async_prefix in _ASYNC_DRIVERS:
+        if database_url.startswith(sync_prefix):
+            return async_prefix + database_url[len(sync_prefix):]
+    return database_url
+
+
+# Used by the chat streaming path, so a slow query never blocks the event loop serving other streams. Objects stay
+# readable after commit without another round trip. JSON columns (such as the sources of a saved chat message) are
+# written with pydantic-core's encoder.
+async_engine = create_async_engine(settings.async_database_url or _async_database_url(settings.database_url),
+                                   json_serializer=dump_json)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def _create_analytics_engine() -> AsyncEngine:
+    url = make_url(_async_database_url(
+        settings.analytics_database_url or settings.async_database_url or settings.database_url))
+    options = {"pool_pre_ping": settings.analytics_pool_pre_ping,
+               "pool_recycle": settings.analytics_pool_recycle_seconds}
+    if url.get_backend_name() == "postgresql":
+        # Every connection of this pool starts its transactions read-only, replica or not.
+        options.update(pool_size=settings.analytics_pool_size, max_overflow=settings.analytics_pool_max_overflow,
+                       pool_timeout=settings.analytics_pool_timeout_seconds,
+                       connect_args={"server_settings": {"default_transaction_read_only": "on"}})
+    return create_async_engine(url, **options)
+
+
+# Used for LLM-generated SQL (validation samples, counts and segment results), optionally on a replica
+# (ANALYTICS_DATABASE_URL). Its own pool means heavy analytics cannot take the connections chat saves and syncs need.
+analytics_engine = _create_analytics_engine()
+AnalyticsSessionLocal = async_sessionmaker(analytics_engine, class_=AsyncSession, autoflush=False,
+                                           expire_on_commit=False)
+
+from models.models import Integration, ChatMessage, Customer, ConversationSummary, ValidationHistory
 
 Base.metadata.create_all(bind=engine)
 
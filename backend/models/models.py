@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, DateTime, Text, Float, Integer, Boolean, JSON
+from sqlalchemy import Column, String, DateTime, Text, Float, Integer, Boolean, JSON, Index
 
 from models import Base
+from models.schemas import DEFAULT_SESSION_ID
 
 
 class Integration(Base):
@@ -33,6 +34,7 @@ class ChatMessage(Base):
 
     Attributes:
         id: A unique identifier for the chat message.
+        session_id: The chat session the message belongs to.
         message: The content of the chat message provided by the user.
         response: The response generated for the given chat message.
         sources: JSON array of data sources used to generate the response.
@@ -41,8 +43,12 @@ class ChatMessage(Base):
 
     """
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_id_created_at", "session_id", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    session_id = Column(String, nullable=False, default=DEFAULT_SESSION_ID)
     message = Column(Text, nullable=False)
     response = Column(Text, nullable=False)
     sources = Column(JSON, nullable=True)
@@ -50,6 +56,63 @@ class ChatMessage(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class ConversationSummary(Base):
+    """
+    Represents the rolling summary of a conversation.
+
+    The summary is rewritten in the background after each chat turn so the context
+    extractor can work from it plus the last few raw messages instead of the whole
+    history. It records the most recent chat message it covers, so each update only
+    has to fold in the turns that came after it.
+
+    Attributes:
+        session_id: The chat session the summary belongs to.
+        summary: The condensed history of the conversation.
+        last_message_id: The most recent chat message folded into the summary.
+        last_message_at: The creation timestamp of that chat message.
+        message_count: The number of chat messages folded into the summary.
+        updated_at: The timestamp of the last update.
+    """
+    __tablename__ = "conversation_summaries"
+
+    session_id = Column(String, primary_key=True)
+    summary = Column(Text, nullable=False)
+    last_message_id = Column(String, nullable=False)
+    last_message_at = Column(DateTime, nullable=False)
+    message_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ValidationHistory(Base):
+    """
+    Represents the outcome of validating one generated SQL query.
+
+    Every query the Query Generator produces is recorded with the request it answered and
+    how validation went, so later requests can be shown the most similar past successes
+    and failures. The table is append-only and shared by all workers.
+
+    Attributes:
+        id: An auto-incrementing identifier, also used to load new entries incrementally.
+        user_message: The (paraphrased) request the query was generated for.
+        sql_query: The generated SQL query.
+        is_valid: Whether validation accepted the query.
+        confidence_score: The validator's confidence in the query.
+        error_message: The execution or security error, if the query failed to run.
+        issue: The validator's explanation of why the query fell short, if any.
+        created_at: The timestamp of the validation.
+    """
+    __tablename__ = "validation_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_message = Column(Text, nullable=False)
+    sql_query = Column(Text, nullable=False)
+    is_valid = Column(Boolean, nullable=False)
+    confidence_score = Column(Float, nullable=False, default=0.0)
+    error_message = Column(Text, nullable=True)
+    issue = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Customer(Base):
     """
     Represents a customer and associated attributes for marketing and interactions optimization.
@@ -0,0 +1,98 @@
+from collections.abc import Mapping
+from functools import cached_property, partial
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from pydantic import BaseModel, ConfigDict, model_serializer
+
+
+class ResultColumn(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    type: str
+
+
+class ResultRow(Mapping):
+    """Read-only view of one row of a ResultSet; nothing is copied until it is converted with ``dict()``."""
+    __slots__ = ("_result", "_index")
+
+    def __init__(self, result: "ResultSet", index: int):
+        self._result = result
+        self._index = index
+
+    def __getitem__(self, name: str) -> Any:
+        return self._result.values[self._result.positions[name]][self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._result.names)
+
+    def __len__(self) -> int:
+        return len(self._result.columns)
+
+
+class ResultSet(BaseModel):
+    """
+    Immutable, column-oriented result of a generated query: one tuple of values per column plus the
+    column schema. The validator, analyst, marketing agent and stream all share the same instance
+    and read it through ``column``, ``row`` and ``head`` instead of copying rows.
+
+    Serializing it (``model_dump``, ``model_dump_json``, or as a value inside a StreamMessage) produces
+    the familiar list of row objects, built once per sink.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    columns: Tuple[ResultColumn, ...]
+    values: Tuple[Tuple[Any, ...], ...]
+    row_count: int
+
+    @classmethod
+    def from_rows(cls, names: Sequence[str], rows: Sequence[Sequence[Any]]) -> "ResultSet":
+        """Transposes driver rows into columns. Dates and times become ISO strings so every value is JSON-ready."""
+        values = []
+        columns = []
+        for name, column in zip(names, zip(*rows) if rows else (() for _ in names)):
+            first = next((value for value in column if value is not None), None)
+            columns.append(ResultColumn(name=name, type=type(first).__name__))
+            if any(hasattr(value_type, "isoformat") for value_type in set(map(type, column))):
+                column = tuple(value.isoformat() if hasattr(value, "isoformat") else value for value in column)
+            values.append(column)
+        # Validation would copy every value, and the input is already well-formed.
+        return cls.model_construct(columns=tuple(columns), values=tuple(values), row_count=len(rows))
+
+    @cached_property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(column.name for column in self.columns)
+
+    @cached_property
+    def positions(self) -> Dict[str, int]:
+        return {name: index for index, name in enumerate(self.names)}
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def column(self, name: str) -> Tuple[Any, ...]:
+        return self.values[self.positions[name]]
+
+    def row(self, index: int) -> ResultRow:
+        if not -self.row_count <= index < self.row_count:
+            raise IndexError(f"row {index} out of range for {self.row_count} rows")
+        return ResultRow(self, index % self.row_count)
+
+    def rows(self) -> Iterator[ResultRow]:
+        return (ResultRow(self, index) for index in range(self.row_count))
+
+    def head(self, count: int) -> "ResultSet":
+        if count >= self.row_count:
+            return self
+        return self.model_construct(columns=self.columns, values=tuple(column[:count] for column in self.values),
+                                    row_count=count)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        return map(dict, map(partial(zip, self.names), zip(*self.values)))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return list(self.iter_records())
+
+    @model_serializer
+    def _serialize(self) -> List[Dict[str, Any]]:
+        return self.to_records()
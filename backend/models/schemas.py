@@ -4,6 +4,10 @@ from typing import List, Optional, Dict, Any
 
 from pydantic import BaseModel
 
+from models.result_set import ResultSet
+
+DEFAULT_SESSION_ID = "default"
+
 
 class LlmResponseTypes(str, Enum):
     LLM_RESPONSE = "LLM_RESPONSE"
@@ -62,14 +66,15 @@ class IntegrationDeleteResponse(BaseModel):
 
 class QueryRequest(BaseModel):
     user_message: str
-    session_id: Optional[str] = None
+    session_id: str = DEFAULT_SESSION_ID
 
 
 class QueryValidationResult(BaseModel):
     is_valid: bool
     confidence_score: float
     validation_details: str
-    all_data: Optional[List[Dict[str, Any]]] = None
+    all_data: Optional[ResultSet] = None
+    total_count: Optional[int] = None
     error_message: Optional[str] = None
     low_confidence_explanation: Optional[str] = None
     improvement_suggestions: Optional[List[str]] = None
@@ -90,5 +95,7 @@ class QueryProcessingResult(BaseModel):
     validation_result: Optional[QueryValidationResult] = None
     error_message: Optional[str] = None
     processing_steps: List[str] = []
-    all_data: Optional[List[Dict[str, Any]]] = None
+    all_data: Optional[ResultSet] = None
+    total_count: Optional[int] = None
+    is_truncated: bool = False
     confidence_score: Optional[float] = None
@@ -1,8 +1,25 @@
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from models.models import ChatMessage
+from models.schemas import DEFAULT_SESSION_ID
+
+
+def _created_before(before: datetime, before_id: Optional[str]):
+    """Keyset condition on (created_at, id), so messages sharing a timestamp are neither skipped nor repeated."""
+    if before_id is None:
+        return ChatMessage.created_at < before
+    return or_(ChatMessage.created_at < before, and_(ChatMessage.created_at == before, ChatMessage.id < before_id))
+
+
+def _created_after(after: datetime, after_id: Optional[str]):
+    if after_id is None:
+        return ChatMessage.created_at > after
+    return or_(ChatMessage.created_at > after, and_(ChatMessage.created_at == after, ChatMessage.id > after_id))
 
 
 class ChatRepository:
@@ -10,9 +27,10 @@ class ChatRepository:
         self.db = db
 
     def create(self, msg_id: str, message: str, response: str, sources: List[Dict[str, Any]],
-               channel_messages: List[Dict[str, Any]]) -> ChatMessage:
+               channel_messages: List[Dict[str, Any]], session_id: str = DEFAULT_SESSION_ID) -> ChatMessage:
         chat_message = ChatMessage(
             id=msg_id,
+            session_id=session_id,
             message=message,
             response=response,
             sources=sources if sources else [],
@@ -23,14 +41,25 @@ class ChatRepository:
         self.db.refresh(chat_message)
         return chat_message
 
-    def get_history(self, limit: int = None) -> List[ChatMessage]:
-        query = self.db.query(ChatMessage).order_by(ChatMessage.created_at.asc())
+    def get_history(self, session_id: str = DEFAULT_SESSION_ID, limit: int = None,
+                    before: Optional[datetime] = None, before_id: Optional[str] = None) -> List[ChatMessage]:
+        """
+        The latest ``limit`` messages of a session that come before ``(before, before_id)``, oldest first.
+
+        Pages backwards by passing the ``created_at`` and ``id`` of the oldest message returned as
+        ``before`` and ``before_id``; the id breaks ties between messages with the same timestamp.
+        Messages are ordered by (created_at, id), served by the (session_id, created_at) index.
+        """
+        query = self.db.query(ChatMessage).filter(ChatMessage.session_id == session_id)
+        if before is not None:
+            query = query.filter(_created_before(before, before_id))
+        query = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
         if limit:
             query = query.limit(limit)
-        return query.all()
+        return list(reversed(query.all()))
 
-    def clear_history(self) -> None:
-        self.db.query(ChatMessage).delete()
+    def clear_history(self, session_id: str = DEFAULT_SESSION_ID) -> None:
+        self.db.query(ChatMessage).filter(ChatMessage.session_id == session_id).delete()
         self.db.commit()
 
     def get_channel_messages(self, chat_id: str, channel: str):
@@ -40,3 +69,46 @@ class ChatRepository:
         channel_messages = chat_message.channel_messages or []
         matched = [cm for cm in channel_messages if cm.get("channel") == channel]
         return matched
+
+
+class AsyncChatRepository:
+    """The ChatRepository operations used while streaming a response, on an AsyncSession."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, msg_id: str, message: str, response: str, sources: List[Dict[str, Any]],
+                     channel_messages: List[Dict[str, Any]], session_id: str = DEFAULT_SESSION_ID) -> ChatMessage:
+        chat_message = ChatMessage(
+            id=msg_id,
+            session_id=session_id,
+            message=message,
+            response=response,
+            sources=sources if sources else [],
+            channel_messages=channel_messages if channel_messages else [],
+        )
+        self.db.add(chat_message)
+        await self.db.commit()
+        return chat_message
+
+    async def get_history(self, session_id: str = DEFAULT_SESSION_ID, limit: int = None,
+                          before: Optional[datetime] = None, before_id: Optional[str] = None) -> List[ChatMessage]:
+        """See ``ChatRepository.get_history``."""
+        query = select(ChatMessage).filter(ChatMessage.session_id == session_id)
+        if before is not None:
+            query = query.filter(_created_before(before, before_id))
+        query = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        if limit:
+            query = query.limit(limit)
+        result = await self.db.execute(query)
+        return list(reversed(result.scalars().all()))
+
+    async def get_after(self, session_id: str, created_at: Optional[datetime], limit: int,
+                        after_id: Optional[str] = None) -> List[ChatMessage]:
+        """The oldest ``limit`` messages of a session after ``(created_at, after_id)``, oldest first."""
+        query = select(ChatMessage).filter(ChatMessage.session_id == session_id)
+        if created_at is not None:
+            query = query.filter(_created_after(created_at, after_id))
+        result = await self.db.execute(
+            query.order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).limit(limit))
+        return list(result.scalars().all())
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.models import ChatMessage, ConversationSummary
+
+
+class ConversationSummaryRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, session_id: str) -> Optional[ConversationSummary]:
+        return self.db.query(ConversationSummary).filter(
+            ConversationSummary.session_id == session_id).first()
+
+    def save(self, session_id: str, summary: str, last_message: ChatMessage,
+             message_count: int) -> ConversationSummary:
+        conversation_summary = self.get(session_id)
+        if conversation_summary is None:
+            conversation_summary = ConversationSummary(session_id=session_id)
+            self.db.add(conversation_summary)
+        conversation_summary.summary = summary
+        conversation_summary.last_message_id = last_message.id
+        conversation_summary.last_message_at = last_message.created_at
+        conversation_summary.message_count = message_count
+        conversation_summary.updated_at = datetime.utcnow()
+        self.db.commit()
+        self.db.refresh(conversation_summary)
+        return conversation_summary
+
+    def delete(self, session_id: Optional[str] = None) -> None:
+        query = self.db.query(ConversationSummary)
+        if session_id is not None:
+            query = query.filter(ConversationSummary.session_id == session_id)
+        query.delete()
+        self.db.commit()
+
+
+class AsyncConversationSummaryRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, session_id: str) -> Optional[ConversationSummary]:
+        result = await self.db.execute(
+            select(ConversationSummary).filter(ConversationSummary.session_id == session_id))
+        return result.scalars().first()
+
+    async def save(self, session_id: str, summary: str, last_message: ChatMessage,
+                   message_count: int) -> ConversationSummary:
+        conversation_summary = await self.get(session_id)
+        if conversation_summary is None:
+            conversation_summary = ConversationSummary(session_id=session_id)
+            self.db.add(conversation_summary)
+        conversation_summary.summary = summary
+        conversation_summary.last_message_id = last_message.id
+        conversation_summary.last_message_at = last_message.created_at
+        conversation_summary.message_count = message_count
+        conversation_summary.updated_at = datetime.utcnow()
+        await self.db.commit()
+        return conversation_summary
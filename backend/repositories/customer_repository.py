@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import List, Dict, Any
 
-from sqlalchemy import and_
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from models.models import Customer
@@ -55,3 +56,12 @@ class CustomerRepository:
 
     def get_customer_by_id(self, customer_ids: List[str]) -> List[Customer]:
         return self.db.query(Customer).filter(Customer.id.in_(customer_ids)).all()
+
+
+class AsyncCustomerRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_customer_by_id(self, customer_ids: List[str]) -> List[Customer]:
+        result = await self.db.execute(select(Customer).filter(Customer.id.in_(customer_ids)))
+        return list(result.scalars().all())
@@ -0,0 +1,31 @@
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.models import ValidationHistory
+
+
+class AsyncValidationHistoryRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, user_message: str, sql_query: str, is_valid: bool, confidence_score: float,
+                     error_message: Optional[str] = None, issue: Optional[str] = None) -> ValidationHistory:
+        entry = ValidationHistory(
+            user_message=user_message,
+            sql_query=sql_query,
+            is_valid=is_valid,
+            confidence_score=confidence_score,
+            error_message=error_message,
+            issue=issue,
+        )
+        self.db.add(entry)
+        await self.db.commit()
+        return entry
+
+    async def get_after(self, last_id: int, limit: int) -> List[ValidationHistory]:
+        """Entries newer than ``last_id``, at most the latest ``limit`` of them, oldest first."""
+        query = select(ValidationHistory).filter(ValidationHistory.id > last_id)
+        result = await self.db.execute(query.order_by(ValidationHistory.id.desc()).limit(limit))
+        return list(reversed(result.scalars().all()))
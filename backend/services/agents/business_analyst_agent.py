@@ -1,10 +1,12 @@
 import json
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from rich import print
 
-from core.llm_handler import openai_client
+from core.llm_handler import llm_handler
+from core.llm_scheduler import LlmPriority
 from core.settings import settings
+from models.result_set import ResultSet
 from models.schemas import QueryProcessingResult, LlmResponseTypes
 from services.stream_service import StreamService, StreamMessage
 
@@ -66,10 +68,9 @@ DO use business language like:
                 content="Marketing Analyst reviewing your target audience..."
             ))
 
-            # it should be paginated or chunking, but for dummy purpose I am removing the restrictions
-            # sample_data = result.all_data[:self._MAX_SAMPLES] if result.all_data else []
+            # all_data is the validator's sample (SQL_SAMPLE_MAX_ROWS rows); total_count is the audience size
             sample_data = result.all_data
-            total_count = len(result.all_data) if result.all_data else 0
+            total_count = result.total_count if result.total_count is not None else len(result.all_data or [])
             context = self._build_analysis_context(
                 user_message=user_message,
                 explanation=result.explanation,
@@ -90,11 +91,14 @@ DO use business language like:
                 content="Analyzing your campaign audience..."
             ))
 
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=messages,
                 temperature=self._ANALYST_TEMPERATURE,
-                stream=True
+                stream=True,
+                priority=LlmPriority.INTERACTIVE,
+                agent="BusinessAnalystAgent",
+                call_site="analyze_result"
             )
 
             async for chunk in response:
@@ -113,7 +117,7 @@ DO use business language like:
             self,
             user_message: str,
             explanation: str,
-            sample_data: list,
+            sample_data: Optional[ResultSet],
             total_count: int,
             confidence_score: float = None,
             validation_details: str = None
@@ -135,7 +139,7 @@ Analyze this customer targeting request that found NO CUSTOMERS:
 Explain in business terms why no customers were found and suggest practical alternatives for the marketing team.
 """
         formatted_samples = []
-        for idx, customer in enumerate(sample_data, start=1):
+        for idx, customer in enumerate(sample_data.to_records(), start=1):
             formatted_samples.append(f"[{idx}] {json.dumps(customer, indent=2, default=str)}")
 
         samples_text = "\n\n".join(formatted_samples)
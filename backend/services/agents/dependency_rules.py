@@ -0,0 +1,74 @@
+import re
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class DependencyAnalysisResult(BaseModel):
+    needs_context: bool
+    confidence: float
+    reasoning: str
+
+
+class DependencyRuleAnalyzer:
+    """
+    Local first pass for ParaphraseAgent dependency analysis.
+
+    Decides only the clear cases: messages that refer back to earlier turns (pronouns,
+    "those/these", "same/also/similar", follow-up openers, references to previous results)
+    need context, and complete requests (a request verb, a business subject and some
+    criteria, with no referential words) are standalone. Everything else returns ``None``
+    and is left to the LLM.
+    """
+
+    _REFERENTIAL_PATTERNS = [
+        (r"\b(he|she|him|her|his|hers|they|them|their|theirs|themselves|himself|herself)\b",
+         "personal pronoun for a previously mentioned customer or segment"),
+        (r"\b(it|its|itself)\b", "pronoun for a previous result or report"),
+        (r"\b(those|these)\b", "demonstrative for a previously identified set"),
+        (r"\b(same|similar|also)\b", "builds on or compares with a previous request"),
+        (r"\b(previous|previously|earlier|aforementioned|(mentioned|listed|shown) above|we discussed|"
+         r"you (showed|found|listed))\b",
+         "explicit reference to earlier results"),
+        (r"^(what|how) about\b", "follow-up question"),
+        (r"^(and|but|also|now|then|plus)\b", "continues the previous request"),
+        (r"^(that|this)\b", "demonstrative for a previous result"),
+    ]
+
+    _REQUEST_START = re.compile(
+        r"^(please\s+|can you\s+|could you\s+)?"
+        r"(show|find|list|get|give|generate|create|identify|display|count|fetch|retrieve|export|build|segment|"
+        r"which|how many|who)\b")
+    _SUBJECT = re.compile(
+        r"\b(customers?|users?|leads?|clients?|buyers?|subscribers?|shoppers?|contacts?|accounts?|segments?|"
+        r"campaigns?|reports?|orders?|purchases?|carts?)\b")
+    _CRITERIA = re.compile(
+        r"\b(from|with|who|whose|where|in|over|under|above|below|between|since|during|last|past|this|by|"
+        r"high|low|top|vip|enterprise|shopify|crms|website|abandoned|inactive|active|new|q[1-4]|\d+)\b")
+    _TEMPORAL_THIS = re.compile(r"\b(this|that) (week|month|quarter|year|season|period)\b")
+    _MIN_STANDALONE_WORDS = 5
+
+    def analyze(self, user_message: str) -> Optional[DependencyAnalysisResult]:
+        message = user_message.strip().lower()
+        without_temporal = self._TEMPORAL_THIS.sub(" ", message)
+
+        for pattern, reason in self._REFERENTIAL_PATTERNS:
+            match = re.search(pattern, without_temporal)
+            if match:
+                return DependencyAnalysisResult(
+                    needs_context=True,
+                    confidence=0.9,
+                    reasoning=f"Rule match: '{match.group(0)}' ({reason})."
+                )
+
+        words = re.findall(r"[\w'$-]+", message)
+        if (len(words) >= self._MIN_STANDALONE_WORDS
+                and self._REQUEST_START.search(message)
+                and self._SUBJECT.search(message)
+                and self._CRITERIA.search(message)):
+            return DependencyAnalysisResult(
+                needs_context=False,
+                confidence=0.85,
+                reasoning="Rule match: complete request with a subject and criteria and no referential expressions."
+            )
+        return None
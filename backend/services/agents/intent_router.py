@@ -0,0 +1,184 @@
+import json
+import math
+import random
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from rich import print
+
+from core.settings import settings
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def _features(message: str) -> List[str]:
+    words = _TOKEN.findall(message.lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def _sigmoid(value: float) -> float:
+    if value >= 0:
+        return 1.0 / (1.0 + math.exp(-value))
+    exp = math.exp(value)
+    return exp / (1.0 + exp)
+
+
+class IntentRouter:
+    """
+    TF-IDF + logistic regression classifier for the ManagerAgent's SQL-or-general decision.
+
+    Features are word unigrams and bigrams with sublinear term frequency and L2 normalisation.
+    The logistic output is Platt-scaled on held-out decisions, so ``predict`` returns a
+    probability that can be compared with a confidence threshold directly. Trained offline
+    from the decisions the LLM made (see ``benchmarks/intent_router_training.py``).
+    """
+
+    def __init__(self, idf: Dict[str, float], weights: Dict[str, float], bias: float,
+                 query_types: Dict[str, str], calibration: Tuple[float, float] = (1.0, 0.0)):
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.query_types = query_types
+        self.calibration = calibration
+
+    def _vectorize(self, message: str) -> Dict[str, float]:
+        counts = Counter(feature for feature in _features(message) if feature in self.idf)
+        vector = {feature: (1.0 + math.log(count)) * self.idf[feature] for feature, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        return {feature: value / norm for feature, value in vector.items()} if norm else {}
+
+    def _logit(self, message: str) -> float:
+        return self.bias + sum(self.weights.get(feature, 0.0) * value
+                               for feature, value in self._vectorize(message).items())
+
+    def sql_probability(self, message: str) -> float:
+        scale, offset = self.calibration
+        return _sigmoid(scale * self._logit(message) + offset)
+
+    def predict(self, message: str) -> Tuple[bool, float]:
+        """Returns (should_use_sql_agent, confidence in that decision)."""
+        probability = self.sql_probability(message)
+        return probability >= 0.5, max(probability, 1.0 - probability)
+
+    def query_type(self, should_use_sql_agent: bool) -> str:
+        return self.query_types["sql" if should_use_sql_agent else "general"]
+
+    @classmethod
+    def train(cls, messages: Sequence[str], labels: Sequence[bool], query_types: Dict[str, str],
+              l2: float = 1e-4, epochs: int = 300, learning_rate: float = 0.5, min_df: int = 1) -> "IntentRouter":
+        document_frequency = Counter(feature for message in messages for feature in set(_features(message)))
+        idf = {feature: math.log((1 + len(messages)) / (1 + df)) + 1.0
+               for feature, df in document_frequency.items() if df >= min_df}
+        router = cls(idf, {}, 0.0, query_types)
+        vectors = [router._vectorize(message) for message in messages]
+        targets = [1.0 if label else 0.0 for label in labels]
+
+        weights: Dict[str, float] = {}
+        bias = 0.0
+        for _ in range(epochs):
+            gradient: Dict[str, float] = {}
+            bias_gradient = 0.0
+            for vector, target in zip(vectors, targets):
+                error = _sigmoid(bias + sum(weights.get(f, 0.0) * v for f, v in vector.items())) - target
+                bias_gradient += error
+                for feature, value in vector.items():
+                    gradient[feature] = gradient.get(feature, 0.0) + error * value
+            for feature, value in gradient.items():
+                weight = weights.get(feature, 0.0)
+                weights[feature] = weight - learning_rate * (value / len(vectors) + l2 * weight)
+            bias -= learning_rate * bias_gradient / len(vectors)
+        router.weights = {feature: weight for feature, weight in weights.items() if abs(weight) > 1e-6}
+        router.bias = bias
+        return router
+
+    def calibrate(self, messages: Sequence[str], labels: Sequence[bool], epochs: int = 500,
+                  learning_rate: float = 0.1):
+        """Fits Platt scaling (probability = sigmoid(a * logit + b)) on decisions not used for training."""
+        logits = [self._logit(message) for message in messages]
+        targets = [1.0 if label else 0.0 for label in labels]
+        scale, offset = 1.0, 0.0
+        for _ in range(epochs):
+            scale_gradient = offset_gradient = 0.0
+            for logit, target in zip(logits, targets):
+                error = _sigmoid(scale * logit + offset) - target
+                scale_gradient += error * logit
+                offset_gradient += error
+            scale -= learning_rate * scale_gradient / len(logits)
+            offset -= learning_rate * offset_gradient / len(logits)
+        self.calibration = (scale, offset)
+
+    def save(self, path: str):
+        with open(path, "w") as file:
+            json.dump({"idf": self.idf, "weights": self.weights, "bias": self.bias,
+                       "query_types": self.query_types, "calibration": list(self.calibration)}, file)
+
+    @classmethod
+    def load(cls, path: str) -> "IntentRouter":
+        with open(path) as file:
+            data = json.load(file)
+        return cls(data["idf"], data["weights"], data["bias"], data["query_types"], tuple(data["calibration"]))
+
+
+def load_decision_log(path: str) -> List[Dict]:
+    """Reads a decision log, keeping the latest decision for each distinct message."""
+    decisions: Dict[str, Dict] = {}
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                decisions[record["user_message"].strip().lower()] = record
+    return list(decisions.values())
+
+
+def split_decisions(decisions: List[Dict], fractions: Sequence[float], seed: int = 0) -> List[List[Dict]]:
+    shuffled = decisions[:]
+    random.Random(seed).shuffle(shuffled)
+    splits, start = [], 0
+    for fraction in fractions:
+        end = start + round(fraction * len(shuffled))
+        splits.append(shuffled[start:end])
+        start = end
+    splits.append(shuffled[start:])
+    return splits
+
+
+_log_lock = threading.Lock()
+
+
+def log_decision(user_message: str, should_use_sql_agent: bool, query_type: str, confidence_score: float,
+                 latency_seconds: float):
+    """
+    Appends an LLM routing decision to the decision log used to train the router, if one is configured.
+    Blocking file I/O: call it off the event loop.
+    """
+    if not settings.manager_decision_log_path:
+        return
+    record = {"user_message": user_message, "should_use_sql_agent": should_use_sql_agent,
+              "query_type": query_type, "confidence_score": confidence_score,
+              "latency_seconds": round(latency_seconds, 4), "logged_at": datetime.utcnow().isoformat()}
+    try:
+        with _log_lock, open(settings.manager_decision_log_path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"[yellow]Failed to write the manager decision log: {e}[/yellow]")
+
+
+_router: Optional[IntentRouter] = None
+_router_loaded = False
+
+
+def get_intent_router() -> Optional[IntentRouter]:
+    """The router trained at INTENT_ROUTER_MODEL_PATH, or None when none is configured or it cannot be loaded."""
+    global _router, _router_loaded
+    if not _router_loaded:
+        _router_loaded = True
+        if settings.intent_router_model_path:
+            try:
+                _router = IntentRouter.load(settings.intent_router_model_path)
+                print(f"[green]Intent router loaded from {settings.intent_router_model_path}[/green]")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[yellow]Intent router disabled, failed to load model: {e}[/yellow]")
+    return _router
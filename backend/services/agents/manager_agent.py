@@ -1,15 +1,24 @@
-from typing import AsyncGenerator
+import asyncio
+import time
+from typing import AsyncGenerator, Awaitable, Optional
 
 from pydantic import BaseModel
 from rich import print
 
-from core.llm_handler import openai_client
+from core.llm_handler import llm_handler
+from core.llm_scheduler import LlmPriority
+from core.metrics import metrics
 from core.prompt_hanlder import SYSTEM_PROMPT
 from core.settings import settings
 from core.utils import parse_json
 from models.schemas import QueryRequest, LlmResponseTypes
+from services.agents.intent_router import get_intent_router, log_decision
 from services.stream_service import StreamService, StreamMessage
 
+_routing_decisions = metrics.counter(
+    "manager_routing_total",
+    "Manager routing decisions by whether the local intent router or the LLM made them")
+
 
 class ManagerDecision(BaseModel):
     should_use_sql_agent: bool
@@ -61,19 +70,34 @@ For general queries, provide a helpful response based on your system knowledge.
 
 Respond in JSON format with your decision and reasoning."""
 
-    async def analyze_query(self, request: QueryRequest) -> ManagerDecision:
-        self.stream_service.add_message(StreamMessage(
-            response_type=LlmResponseTypes.AGENT_STATUS,
-            content=f"Manager analyzing query: '{request.user_message[:50]}...'"
-        ))
-
-        try:
-            messages = [
-                {"role": "system", "content": self._get_system_prompt()},
-                {"role": "user", "content": f"""
+    async def decide(self, user_message: str) -> ManagerDecision:
+        """
+        Routes a message without reporting progress to the stream, so it can run speculatively.
+
+        A trained intent router decides locally when it is at least
+        ``intent_router_min_confidence`` sure; otherwise the LLM decides.
+        """
+        router = get_intent_router()
+        if router is not None:
+            should_use_sql_agent, confidence = router.predict(user_message)
+            if confidence >= settings.intent_router_min_confidence:
+                _routing_decisions.inc(path="local")
+                return ManagerDecision(
+                    should_use_sql_agent=should_use_sql_agent,
+                    reasoning=f"Classified locally by the intent router as a "
+                              f"{'SQL' if should_use_sql_agent else 'general'} query.",
+                    confidence_score=confidence,
+                    query_type=router.query_type(should_use_sql_agent)
+                )
+        _routing_decisions.inc(path="llm")
+
+        started = time.perf_counter()
+        messages = [
+            {"role": "system", "content": self._get_system_prompt()},
+            {"role": "user", "content": f"""
 Analyze this user query and determine if it should be handled by SQL agents or as a general query:
 
-Query: "{request.user_message}"
+Query: "{user_message}"
 
 Respond with a JSON object containing:
 - should_use_sql_agent: boolean
@@ -81,20 +105,44 @@ Respond with a JSON object containing:
 - confidence_score: float between 0-1
 - query_type: "campaign", "general", or "sql_direct"
 """}
-            ]
+        ]
+
+        response = await llm_handler.chat_completion(
+            model=settings.openai_model,
+            messages=messages,
+            temperature=self._MANAGER_AGENT_TEMPERATURE,
+            max_tokens=self._MANAGER_AGENT_MAX_TOKENS,
+            agent="ManagerAgent",
+            call_site="analyze_query",
+            # Logged decisions record the LLM's routing latency, which a cache hit would understate.
+            cache=not settings.manager_decision_log_path
+        )
+        response_content = response.choices[0].message.content
+        json_response = parse_json(response_content)
+        decision = ManagerDecision(**json_response)
+        if settings.manager_decision_log_path:
+            await asyncio.to_thread(log_decision, user_message, decision.should_use_sql_agent, decision.query_type,
+                                    decision.confidence_score, time.perf_counter() - started)
+        return decision
+
+    async def analyze_query(self, request: QueryRequest,
+                            speculative_decision: Optional[Awaitable[ManagerDecision]] = None) -> ManagerDecision:
+        """
+        Routes the request and reports the decision to the stream.
+
+        ``speculative_decision`` is a ``decide`` call already started on an equivalent message;
+        when given, it is awaited instead of making a new LLM call.
+        """
+        self.stream_service.add_message(StreamMessage(
+            response_type=LlmResponseTypes.AGENT_STATUS,
+            content=f"Manager analyzing query: '{request.user_message[:50]}...'"
+        ))
 
-            response = await openai_client.chat.completions.create(
-                model=settings.openai_model,
-                messages=messages,
-                temperature=self._MANAGER_AGENT_TEMPERATURE,
-                max_tokens=self._MANAGER_AGENT_MAX_TOKENS
-            )
-            try:
-                response_content = response.choices[0].message.content
-                json_response = parse_json(response_content)
-                decision = ManagerDecision(**json_response)
-            except Exception:
-                raise
+        try:
+            if speculative_decision is not None:
+                decision = await speculative_decision
+            else:
+                decision = await self.decide(request.user_message)
 
             self.stream_service.add_message(StreamMessage(
                 response_type=LlmResponseTypes.AGENT_STATUS,
@@ -140,11 +188,14 @@ Please provide a helpful response that takes into account the analysis above. If
                 response_type=LlmResponseTypes.AGENT_THINKING,
                 content="Generating response..."
             ))
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=messages,
                 temperature=self._MANAGER_AGENT_GENERAL_QUERY_TEMPERATURE,
-                stream=True
+                stream=True,
+                priority=LlmPriority.INTERACTIVE,
+                agent="ManagerAgent",
+                call_site="handle_general_query"
             )
             async for chunk in response:
                 if chunk.choices[0].delta.content:
@@ -1,13 +1,14 @@
 import json
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from rich import print
 
-from core.llm_handler import openai_client
+from core.llm_handler import llm_handler
 from core.settings import settings
 from core.utils import parse_json
 from models import Customer
+from models.result_set import ResultSet
 from models.schemas import QueryProcessingResult
 
 
@@ -67,12 +68,15 @@ Return your analysis in the specified JSON format."""
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ]
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=messages,
                 temperature=0.3,
                 max_tokens=500,
-                stream=False
+                stream=False,
+                agent="MarketingAgent",
+                call_site="is_marketing_messages_needed",
+                cache=True
             )
             content = response.choices[0].message.content.strip()
             try:
@@ -155,8 +159,8 @@ For OTHER channels (sms, whatsapp, ads):
     ) -> List[Dict[str, str]]:
         try:
             print("[cyan]Marketing Agent generating campaign messages...[/cyan]")
-            customer_count = len(result.all_data) if result.all_data else 0
-            sample_customers = result.all_data[:self._MAX_DATA_POINTS] if result.all_data else []
+            customer_count = result.total_count if result.total_count is not None else len(result.all_data or [])
+            sample_customers = result.all_data.head(self._MAX_DATA_POINTS) if result.all_data else None
             context = self._build_marketing_context(
                 user_message=user_message,
                 customer_count=customer_count,
@@ -169,11 +173,13 @@ For OTHER channels (sms, whatsapp, ads):
                 {"role": "user", "content": context}
             ]
             print("[cyan]Generating channel-specific marketing messages...[/cyan]")
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=messages,
                 temperature=self._MARKETING_TEMPERATURE,
-                stream=False
+                stream=False,
+                agent="MarketingAgent",
+                call_site="generate_campaign_messages"
             )
             content = response.choices[0].message.content.strip()
             try:
@@ -204,7 +210,7 @@ For OTHER channels (sms, whatsapp, ads):
             self,
             user_message: str,
             customer_count: int,
-            sample_customers: List[Dict[str, Any]],
+            sample_customers: Optional[ResultSet],
             allowed_properties: list[tuple[str, str]],
             explanation: str = None
     ) -> str:
@@ -246,19 +252,17 @@ Return ONLY the JSON array with channel-message template pairs.
         return context
 
     @staticmethod
-    def _extract_customer_insights(sample_customers: List[Dict[str, Any]],
+    def _extract_customer_insights(sample_customers: Optional[ResultSet],
                                    allowed_properties: list[tuple[str, str]]) -> str:
         if not sample_customers:
             return "No specific customer data available"
         insights = []
         allowed_prop_names = [prop[0] for prop in allowed_properties]
         property_values = {}
-        for customer in sample_customers:
-            for prop_name in allowed_prop_names:
-                if prop_name in customer and customer[prop_name] is not None:
-                    if prop_name not in property_values:
-                        property_values[prop_name] = set()
-                    property_values[prop_name].add(str(customer[prop_name]))
+        for prop_name in allowed_prop_names:
+            if prop_name in sample_customers.positions:
+                property_values[prop_name] = {str(value) for value in sample_customers.column(prop_name)
+                                              if value is not None}
         for prop_name, values in property_values.items():
             if values:
                 prop_description = next((prop[1] for prop in allowed_properties if prop[0] == prop_name), prop_name)
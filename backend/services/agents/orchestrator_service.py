@@ -1,14 +1,20 @@
 import asyncio
+import re
+import time
+from difflib import SequenceMatcher
+from typing import Awaitable, List, Optional, Tuple
 
 from rich import print
-from sqlalchemy.orm import Session
 
-from models import Customer
+from core.metrics import metrics
+from core.settings import settings
+from models import AsyncSessionLocal, Customer
 from models.schemas import (
-    QueryRequest, QueryProcessingResult, LlmResponseTypes
+    GeneratedQuery, QueryRequest, QueryProcessingResult, QueryValidationResult, LlmResponseTypes
 )
-from repositories.chat_repository import ChatRepository
-from repositories.customer_repository import CustomerRepository
+from repositories.chat_repository import AsyncChatRepository
+from repositories.conversation_summary_repository import AsyncConversationSummaryRepository
+from repositories.customer_repository import AsyncCustomerRepository
 from services.agents import CONFIDENCE_THRESHOLD
 from services.agents.business_analyst_agent import BusinessAnalystAgent
 from services.agents.manager_agent import ManagerAgent, ManagerDecision
@@ -16,40 +22,42 @@ from services.agents.marketing_agent import MarketingAgent
 from services.agents.paraphrase_agent import ParaphraseAgent
 from services.agents.query_generator_agent import QueryGeneratorAgent, QueryGenerationRequest
 from services.agents.validator_agent import ValidatorAgent, ValidationRequest
+from services.sql_plan_cache import sql_plan_cache
 from services.stream_service import StreamService, StreamMessage
 
 
+_speculative_routing = metrics.counter(
+    "orchestrator_speculative_routing_total",
+    "Manager routing decisions started on the raw message, by whether they were reused")
+_speculative_routing_saved = metrics.histogram(
+    "orchestrator_speculative_routing_saved_seconds",
+    "Manager routing latency hidden behind paraphrasing when the speculative decision was reused")
+
+
 class OrchestratorService:
     _HISTORICAL_CONTEXT_RETRIEVAL_LIMIT = 50
     _MAX_ITERATIONS = 10
     _FALLBACK_CONFIDENCE_THRESHOLD = 0.5
 
-    def __init__(self, db: Session, stream_service: StreamService):
-        self.db = db
+    def __init__(self, stream_service: StreamService):
         self.stream_service = stream_service
         self.paraphrase_agent = ParaphraseAgent()
         self.manager_agent = ManagerAgent(stream_service)
-        self.query_generator_agent = QueryGeneratorAgent(db, stream_service)
-        self.validator_agent = ValidatorAgent(db, stream_service)
+        self.query_generator_agent = QueryGeneratorAgent(stream_service)
+        self.validator_agent = ValidatorAgent(stream_service)
         self.business_analyst = BusinessAnalystAgent(stream_service)
         self.marketing_agent = MarketingAgent()
-        self.chat_repository = ChatRepository(db)
-        self.customer_repository = CustomerRepository(db)
         self._processing_steps = []
 
-    def __del__(self):
-        try:
-            self._processing_steps = []
-            self.query_generator_agent.cleanup_historical_data()
-            print("[green]Historical data cleaned up on orchestrator destruction[/green]")
-        except Exception as e:
-            print(f"[yellow]Warning: Failed to cleanup historical data in orchestrator destructor: {e}[/yellow]")
-
     async def _process_sql_query(
             self,
             request: QueryRequest,
             manager_decision: ManagerDecision,
     ) -> QueryProcessingResult:
+        cached_result = await self._process_cached_sql_plan(request)
+        if cached_result is not None:
+            return cached_result
+
         message = "Starting query generation..."
         print(f"[blue]{message}[/blue]")
         self.stream_service.add_message(StreamMessage(
@@ -61,13 +69,17 @@ class OrchestratorService:
         previous_validation_feedback = None
         previous_improvement_suggestions = None
         previous_execution_error = None
+        candidate_count = max(1, settings.sql_generation_candidates)
+        budget = settings.sql_generation_latency_budget_seconds
+        deadline = time.monotonic() + budget if budget > 0 else None
 
         while iteration < self._MAX_ITERATIONS:
             iteration += 1
             print(f"[cyan]SQL Generation Attempt {iteration}/{self._MAX_ITERATIONS}[/cyan]")
             self.stream_service.add_message(StreamMessage(
                 response_type=LlmResponseTypes.AGENT_THINKING,
-                content="Generating query..."
+                content="Generating query..." if candidate_count == 1 else
+                f"Generating {candidate_count} candidate queries..."
             ))
 
             try:
@@ -76,30 +88,14 @@ class OrchestratorService:
                     context={"manager_decision": manager_decision.model_dump()},
                     validation_feedback=previous_validation_feedback,
                     improvement_suggestions=previous_improvement_suggestions,
-                    execution_error=previous_execution_error
-                )
-                generated_query = await self.query_generator_agent.generate_query(generation_request)
-
-                self._processing_steps.append(
-                    f"Iteration {iteration}: Generated query (confidence: {generated_query.confidence_score:.2f})")
-
-                validation_request = ValidationRequest(
-                    user_message=request.user_message,
-                    generated_query=generated_query,
-                )
-                validation_result = await self.validator_agent.validate_query(validation_request)
-
-                self._processing_steps.append(
-                    f"Iteration {iteration}: Validation (confidence: {validation_result.confidence_score:.2f}, valid: {validation_result.is_valid})")
-                self._record_historical_data(
-                    request=request,
-                    generated_query=generated_query,
-                    validation_result=validation_result,
-                    iteration=iteration
+                    execution_error=previous_execution_error,
+                    attempt=iteration
                 )
+                candidates = await self._generate_candidates(request, generation_request, candidate_count, deadline)
+                best = self._select_candidate(candidates)
 
-                if validation_result.has_security_error or (
-                        validation_result.is_valid and validation_result.confidence_score >= CONFIDENCE_THRESHOLD):
+                if best is not None:
+                    generated_query, validation_result = best
                     result = QueryProcessingResult(
                         success=True,
                         sql_query=generated_query.sql_query,
@@ -108,60 +104,19 @@ class OrchestratorService:
                         error_message=None,
                         processing_steps=self._processing_steps,
                         all_data=validation_result.all_data,
+                        total_count=validation_result.total_count,
                         confidence_score=validation_result.confidence_score
                     )
-                    async for analysis_chunk in self.business_analyst.analyze_result(result, request.user_message):
-                        self.stream_service.add_message(StreamMessage(
-                            response_type=LlmResponseTypes.LLM_RESPONSE,
-                            content=analysis_chunk
-                        ))
-
-                    if result.all_data:
-                        self.stream_service.add_message(StreamMessage(
-                            response_type=LlmResponseTypes.RETRIEVED_DATA,
-                            content="Sources used for the response.",
-                            data={"sources": result.all_data}
-                        ))
-                        all_customer_ids = [data.get("id", "") for data in result.all_data]
-                        customer_data = self.customer_repository.get_customer_by_id(all_customer_ids)
-                        if customer_data:
-                            self.stream_service.add_message(StreamMessage(
-                                response_type=LlmResponseTypes.AGENT_STATUS,
-                                content="Generating marketing campaign messages..."
-                            ))
-                            is_marketing_messages_needed = await self.marketing_agent.is_marketing_messages_needed(
-                                request.user_message,
-                            )
-                            if is_marketing_messages_needed:
-                                properties = Customer.get_referable_properties()
-                                self.stream_service.add_message(StreamMessage(
-                                    response_type=LlmResponseTypes.GENERATING_CHANNEL_MESSAGE,
-                                    content="Generating messages for marketing channels..."
-                                ))
-                                campaign_messages = await self.marketing_agent.generate_campaign_messages(result,
-                                                                                                          request.user_message,
-                                                                                                          properties)
-                                enriched_messages = self.marketing_agent.enrich_messages_with_customer_data(
-                                    campaign_messages, customer_data, [p[0] for p in properties]
-                                )
-                                self.stream_service.add_message(StreamMessage(
-                                    response_type=LlmResponseTypes.CHANNEL_MESSAGE,
-                                    content="Marketing campaign messages generated",
-                                    data={"channels": enriched_messages}
-                                ))
-                    self.stream_service.add_message(StreamMessage(
-                        response_type=LlmResponseTypes.QUERY_PROCESSING_RESULT,
-                        content=f"Query validated successfully on attempt {iteration}",
-                        data=result.model_dump()
-                    ))
-                    self._processing_steps.append(f"Success on iteration {iteration}")
-                    await asyncio.sleep(0.1)
-                    print("[green]Orchestrator calling end_streaming() - SUCCESS case[/green]")
-                    self.stream_service.end_streaming()
-                    await asyncio.sleep(0.1)
-                    return result
+                    if not validation_result.has_security_error:
+                        sql_plan_cache.set(request.user_message, generated_query.sql_query, generated_query.explanation,
+                                           generated_query.tables_used, generated_query.confidence_score,
+                                           validation_result.confidence_score)
+                    return await self._complete_sql_query(
+                        request, result, f"Query validated successfully on attempt {iteration}",
+                        f"Success on iteration {iteration}")
 
                 else:
+                    _, validation_result = max(candidates, key=lambda candidate: candidate[1].confidence_score)
                     print(
                         f"[yellow]Validation failed (confidence: {validation_result.confidence_score:.2f}). " + f"{'Retrying...' if iteration < self._MAX_ITERATIONS else 'Using best attempt.'}[/yellow]")
                     self.stream_service.add_message(StreamMessage(
@@ -183,8 +138,6 @@ class OrchestratorService:
                         if previous_execution_error:
                             print(f"[red]SQL execution error to fix: {previous_execution_error}...[/red]")
 
-                        await asyncio.sleep(0.5)
-
             except Exception as e:
                 error_msg = f"Iteration {iteration} error: {str(e)}"
                 self._processing_steps.append(error_msg)
@@ -196,9 +149,234 @@ class OrchestratorService:
                 if iteration == self._MAX_ITERATIONS:
                     break
 
-                await asyncio.sleep(0.5)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise Exception(f"Failed to generate valid SQL query within the {budget:g}s latency budget "
+                                f"({iteration} attempts)")
         raise Exception(f"Failed to generate valid SQL query after {self._MAX_ITERATIONS} attempts")
 
+    @staticmethod
+    def _candidate_temperatures(candidate_count: int) -> List[Optional[float]]:
+        """None keeps the generator's own temperature; several candidates are spread over 0.2-1.0."""
+        if candidate_count == 1:
+            return [None]
+        return [round(0.2 + 0.8 * index / (candidate_count - 1), 2) for index in range(candidate_count)]
+
+    async def _generate_candidates(
+            self,
+            request: QueryRequest,
+            generation_request: QueryGenerationRequest,
+            candidate_count: int,
+            deadline: Optional[float],
+    ) -> List[Tuple[GeneratedQuery, QueryValidationResult]]:
+        """
+        Generates and validates ``candidate_count`` queries concurrently. Candidates still running
+        at ``deadline`` are cancelled; raises if none of them produced a validation result.
+        """
+        tasks = [
+            asyncio.create_task(self._generate_and_validate(
+                request, generation_request.model_copy(update={"temperature": temperature}), index))
+            for index, temperature in enumerate(self._candidate_temperatures(candidate_count), start=1)
+        ]
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        if pending:
+            self._processing_steps.append(
+                f"Iteration {generation_request.attempt}: {len(pending)} candidate(s) cut off by the latency budget")
+
+        candidates, errors = [], []
+        for task in tasks:
+            if task in done:
+                if task.exception() is not None:
+                    errors.append(task.exception())
+                else:
+                    candidates.append(task.result())
+        if not candidates:
+            if errors:
+                raise errors[0]
+            raise Exception("No query candidate finished within the latency budget")
+        for error in errors:
+            self._processing_steps.append(f"Iteration {generation_request.attempt}: candidate failed: {error}")
+        return candidates
+
+    async def _generate_and_validate(
+            self,
+            request: QueryRequest,
+            generation_request: QueryGenerationRequest,
+            candidate: int,
+    ) -> Tuple[GeneratedQuery, QueryValidationResult]:
+        iteration = generation_request.attempt
+        label = f"Iteration {iteration}" if generation_request.temperature is None else \
+            f"Iteration {iteration}, candidate {candidate}"
+        generated_query = await self.query_generator_agent.generate_query(generation_request)
+        self._processing_steps.append(
+            f"{label}: Generated query (confidence: {generated_query.confidence_score:.2f})")
+
+        validation_request = ValidationRequest(
+            user_message=request.user_message,
+            generated_query=generated_query,
+            attempt=iteration
+        )
+        validation_result = await self.validator_agent.validate_query(validation_request)
+
+        self._processing_steps.append(
+            f"{label}: Validation (confidence: {validation_result.confidence_score:.2f}, valid: {validation_result.is_valid})")
+        await self._record_historical_data(
+            request=request,
+            generated_query=generated_query,
+            validation_result=validation_result,
+            iteration=iteration
+        )
+        return generated_query, validation_result
+
+    @staticmethod
+    def _select_candidate(
+            candidates: List[Tuple[GeneratedQuery, QueryValidationResult]]
+    ) -> Optional[Tuple[GeneratedQuery, QueryValidationResult]]:
+        """The highest-confidence valid candidate, else one that hit a security error, else None."""
+        accepted = [candidate for candidate in candidates
+                    if candidate[1].is_valid and candidate[1].confidence_score >= CONFIDENCE_THRESHOLD]
+        if accepted:
+            return max(accepted, key=lambda candidate: candidate[1].confidence_score)
+        return next((candidate for candidate in candidates if candidate[1].has_security_error), None)
+
+    async def _process_cached_sql_plan(self, request: QueryRequest) -> Optional[QueryProcessingResult]:
+        """
+        Answers the request with SQL already validated for an equivalent request, skipping the
+        query generator and validator. Returns None on a cache miss or if the cached SQL no longer runs.
+        """
+        plan = sql_plan_cache.get(request.user_message)
+        if plan is None:
+            return None
+        self.stream_service.add_message(StreamMessage(
+            response_type=LlmResponseTypes.AGENT_STATUS,
+            content="Reusing a validated query for an equivalent request"
+        ))
+        all_data, total_count, execution_error, _ = await self.validator_agent.execute_sample(plan.sql_query)
+        if execution_error:
+            sql_plan_cache.discard(plan)
+            self._processing_steps.append(f"Cached query failed, regenerating: {execution_error}")
+            return None
+
+        self._processing_steps.append(f"Reused cached query for: {plan.normalized_request}")
+        validation_result = QueryValidationResult(
+            is_valid=True,
+            confidence_score=plan.validation_confidence,
+            validation_details="Reused a query validated for an equivalent request",
+            all_data=all_data,
+            total_count=total_count
+        )
+        result = QueryProcessingResult(
+            success=True,
+            sql_query=plan.sql_query,
+            explanation=plan.explanation,
+            validation_result=validation_result,
+            error_message=None,
+            processing_steps=self._processing_steps,
+            all_data=all_data,
+            total_count=total_count,
+            confidence_score=plan.validation_confidence
+        )
+        return await self._complete_sql_query(request, result, "Query served from the SQL plan cache",
+                                              "Success from the SQL plan cache")
+
+    async def _load_full_result(self, result: QueryProcessingResult):
+        """
+        Replaces the validator's sample with the full result (up to SQL_RESULT_MAX_ROWS rows) for the
+        consumers that need every row: the sources sent to the client and the campaign recipients.
+        Nothing is re-read when the sample already holds every row. Sets ``is_truncated`` when rows
+        are left out, either by the cap or because only the sample could be read.
+        """
+        sample_size = len(result.all_data or [])
+        if sample_size < settings.sql_sample_max_rows or (
+                result.total_count is not None and result.total_count <= sample_size):
+            return
+        max_rows = settings.sql_result_max_rows or None
+        # One row past the cap tells a result that was cut off from one that fits exactly.
+        all_data, execution_error, _ = await self.validator_agent.execute_query(
+            result.sql_query, max_rows + 1 if max_rows else None)
+        if execution_error:
+            result.is_truncated = True
+            self._processing_steps.append(f"Kept the {sample_size}-row sample, loading all rows failed: "
+                                          f"{execution_error}")
+            return
+        if max_rows and len(all_data) > max_rows:
+            all_data = all_data.head(max_rows)
+            result.is_truncated = True
+            self._processing_steps.append(f"Loaded the first {max_rows} rows (SQL_RESULT_MAX_ROWS)")
+        result.all_data = all_data
+        if result.validation_result is not None:
+            result.validation_result.all_data = all_data
+
+    async def _complete_sql_query(self, request: QueryRequest, result: QueryProcessingResult, success_message: str,
+                                  processing_step: str) -> QueryProcessingResult:
+        async for analysis_chunk in self.business_analyst.analyze_result(result, request.user_message):
+            self.stream_service.add_message(StreamMessage(
+                response_type=LlmResponseTypes.LLM_RESPONSE,
+                content=analysis_chunk
+            ))
+
+        await self._load_full_result(result)
+        if result.all_data:
+            sources_content = "Sources used for the response."
+            if result.is_truncated:
+                total = f"{result.total_count:,}" if result.total_count is not None else "more"
+                sources_content = (f"Only the first {len(result.all_data):,} of {total} matching customers are "
+                                   f"listed as sources and used as campaign recipients.")
+                self.stream_service.add_message(StreamMessage(
+                    response_type=LlmResponseTypes.LLM_RESPONSE,
+                    content=f"\n\n_Note: {sources_content}_\n"
+                ))
+            self.stream_service.add_message(StreamMessage(
+                response_type=LlmResponseTypes.RETRIEVED_DATA,
+                content=sources_content,
+                data={"sources": result.all_data, "total_count": result.total_count,
+                      "is_truncated": result.is_truncated}
+            ))
+            all_customer_ids = list(result.all_data.column("id")) if "id" in result.all_data.positions else []
+            async with AsyncSessionLocal() as db:
+                customer_data = await AsyncCustomerRepository(db).get_customer_by_id(all_customer_ids)
+            if customer_data:
+                self.stream_service.add_message(StreamMessage(
+                    response_type=LlmResponseTypes.AGENT_STATUS,
+                    content="Generating marketing campaign messages..."
+                ))
+                is_marketing_messages_needed = await self.marketing_agent.is_marketing_messages_needed(
+                    request.user_message,
+                )
+                if is_marketing_messages_needed:
+                    properties = Customer.get_referable_properties()
+                    self.stream_service.add_message(StreamMessage(
+                        response_type=LlmResponseTypes.GENERATING_CHANNEL_MESSAGE,
+                        content="Generating messages for marketing channels..."
+                    ))
+                    campaign_messages = await self.marketing_agent.generate_campaign_messages(result,
+                                                                                              request.user_message,
+                                                                                              properties)
+                    enriched_messages = self.marketing_agent.enrich_messages_with_customer_data(
+                        campaign_messages, customer_data, [p[0] for p in properties]
+                    )
+                    self.stream_service.add_message(StreamMessage(
+                        response_type=LlmResponseTypes.CHANNEL_MESSAGE,
+                        content="Marketing campaign messages generated",
+                        data={"channels": enriched_messages}
+                    ))
+        self.stream_service.add_message(StreamMessage(
+            response_type=LlmResponseTypes.QUERY_PROCESSING_RESULT,
+            content=success_message,
+            data=result.model_dump(exclude={"all_data": True, "validation_result": {"all_data"}})
+        ))
+        self._processing_steps.append(processing_step)
+        await asyncio.sleep(0.1)
+        print("[green]Orchestrator calling end_streaming() - SUCCESS case[/green]")
+        self.stream_service.end_streaming()
+        await asyncio.sleep(0.1)
+        return result
+
     async def _process_general_query(
             self,
             request: QueryRequest,
@@ -251,13 +429,13 @@ class OrchestratorService:
                 processing_steps=self._processing_steps
             )
 
-    def _record_historical_data(self,
-                                request,
-                                generated_query,
-                                validation_result,
-                                iteration: int):
+    async def _record_historical_data(self,
+                                      request,
+                                      generated_query,
+                                      validation_result,
+                                      iteration: int):
         try:
-            self.query_generator_agent.add_validation_result(
+            await self.query_generator_agent.add_validation_result(
                 user_message=request.user_message,
                 generated_query=generated_query.sql_query,
                 validation_result=validation_result
@@ -272,12 +450,56 @@ class OrchestratorService:
         for i, step in enumerate(self._processing_steps, start=1):
             print(f"[cyan]Step {i}/{len(self._processing_steps)}:[/cyan] {step}")
 
+    @staticmethod
+    def _is_materially_unchanged(original_message: str, paraphrased_message: str) -> bool:
+        original_words = re.findall(r"\w+", original_message.lower())
+        paraphrased_words = re.findall(r"\w+", paraphrased_message.lower())
+        similarity = SequenceMatcher(None, original_words, paraphrased_words).ratio()
+        return similarity >= settings.speculative_routing_min_similarity
+
+    async def _speculate_routing(self, user_message: str) -> Tuple[Optional[ManagerDecision], float]:
+        started = time.perf_counter()
+        try:
+            decision = await self.manager_agent.decide(user_message)
+        except Exception as e:
+            print(f"[yellow]Speculative routing failed: {e}[/yellow]")
+            decision = None
+        return decision, time.perf_counter() - started
+
+    async def _reuse_speculative_routing(self, speculation: asyncio.Task, user_message: str) -> ManagerDecision:
+        needed_at = time.perf_counter()
+        decision, duration = await speculation
+        if decision is None:
+            _speculative_routing.inc(outcome="failed")
+            return await self.manager_agent.decide(user_message)
+        saved = max(0.0, duration - (time.perf_counter() - needed_at))
+        _speculative_routing.inc(outcome="reused")
+        _speculative_routing_saved.observe(saved)
+        self._processing_steps.append(f"Speculative routing reused (saved {saved * 1000:.0f} ms)")
+        return decision
+
+    def _resolve_speculative_routing(
+            self,
+            speculation: Optional[asyncio.Task],
+            original_message: str,
+            paraphrased_message: str,
+    ) -> Optional[Awaitable[ManagerDecision]]:
+        if speculation is None:
+            return None
+        if self._is_materially_unchanged(original_message, paraphrased_message):
+            return self._reuse_speculative_routing(speculation, paraphrased_message)
+        speculation.cancel()
+        _speculative_routing.inc(outcome="discarded")
+        self._processing_steps.append("Speculative routing discarded: paraphrase changed the query")
+        return None
+
     async def process_query(self, request: QueryRequest):
         """
         The main entry point for processing user queries through the agentic system.
 
         Flow:
-        1. Manager analyzes query and decides routing
+        1. Manager analyzes query and decides routing (speculatively on the raw message while it is
+           being paraphrased, kept only if paraphrasing leaves it materially unchanged)
         2. If SQL is needed: Query Generator -> Validator -> (retry if invalid)
         3. If general: Manager handles directly
         4. Return final result
@@ -290,6 +512,7 @@ class OrchestratorService:
             content=message
         ))
 
+        speculation = None
         try:
             message = "Analyzing query intent..."
             print(f"[blue]{message}[/blue]")
@@ -297,9 +520,16 @@ class OrchestratorService:
                 response_type=LlmResponseTypes.AGENT_THINKING,
                 content=message
             ))
-            chat_history = self.chat_repository.get_history(limit=self._HISTORICAL_CONTEXT_RETRIEVAL_LIMIT)
+            async with AsyncSessionLocal() as db:
+                chat_history = await AsyncChatRepository(db).get_history(
+                    request.session_id, limit=self._HISTORICAL_CONTEXT_RETRIEVAL_LIMIT)
+                conversation_summary = await AsyncConversationSummaryRepository(db).get(request.session_id) \
+                    if settings.conversation_summary_enabled else None
             original_message = request.user_message
-            request.user_message = await self.paraphrase_agent.paraphrase_query(request.user_message, chat_history)
+            if settings.speculative_routing_enabled:
+                speculation = asyncio.create_task(self._speculate_routing(original_message))
+            request.user_message = await self.paraphrase_agent.paraphrase_query(
+                request.user_message, chat_history, conversation_summary, request.session_id)
 
             if request.user_message != original_message:
                 message = f"Enhanced query with LLM-analyzed conversation context"
@@ -318,7 +548,10 @@ class OrchestratorService:
                     content=message
                 ))
                 self._processing_steps.append("LLM analysis: Query is standalone, no context enhancement needed")
-            manager_decision = await self.manager_agent.analyze_query(request)
+            manager_decision = await self.manager_agent.analyze_query(
+                request,
+                self._resolve_speculative_routing(speculation, original_message, request.user_message)
+            )
             self._processing_steps.append(
                 f"Manager decision: {manager_decision.query_type} query (confidence: {manager_decision.confidence_score:.2f})")
 
@@ -337,3 +570,7 @@ class OrchestratorService:
                 content=error_msg
             ))
             self.stream_service.end_streaming()
+
+        finally:
+            if speculation is not None and not speculation.done():
+                speculation.cancel()
@@ -1,19 +1,23 @@
 import json
 from typing import List, Optional
 
-from pydantic import BaseModel
 from rich import print
 
-from core.llm_handler import openai_client
+from core.llm_handler import llm_handler
+from core.metrics import metrics
 from core.settings import settings
 from core.utils import parse_json
-from models.models import ChatMessage
+from models.models import ChatMessage, ConversationSummary
+from models.schemas import DEFAULT_SESSION_ID
+from services.agents.dependency_rules import DependencyAnalysisResult, DependencyRuleAnalyzer
+from services.conversation_entity_index import conversation_entity_index
 
-
-class DependencyAnalysisResult(BaseModel):
-    needs_context: bool
-    confidence: float
-    reasoning: str
+_dependency_analysis_calls = metrics.counter(
+    "paraphrase_dependency_analysis_total",
+    "Dependency analyses by whether local rules decided them or the LLM was called")
+_context_resolutions = metrics.counter(
+    "paraphrase_context_resolution_total",
+    "Context lookups for dependent messages by whether the entity index answered or the LLM was called")
 
 
 class ParaphraseAgent:
@@ -30,6 +34,7 @@ class ParaphraseAgent:
     _MAX_HISTORY_LENGTH = 1500
 
     def __init__(self):
+        self.dependency_rules = DependencyRuleAnalyzer()
         self.dependency_analysis_examples = [
             # === STANDALONE QUERIES (No Context Needed) ===
             {
@@ -243,13 +248,17 @@ class ParaphraseAgent:
             }
         ]
 
-    async def paraphrase_query(self, user_message: str, chat_history: Optional[List[ChatMessage]] = None) -> str:
+    async def paraphrase_query(self, user_message: str, chat_history: Optional[List[ChatMessage]] = None,
+                               conversation_summary: Optional[ConversationSummary] = None,
+                               session_id: str = DEFAULT_SESSION_ID) -> str:
         """
         Analyzes a user message and enhances it with context from previous messages if needed.
         
         Args:
             user_message: The current user message
             chat_history: List of previous chat messages (most recent first)
+            conversation_summary: Rolling summary of the conversation, if one has been built
+            session_id: The chat session the message belongs to
             
         Returns:
             Enhanced query with context or original message if no context is needed
@@ -260,7 +269,11 @@ class ParaphraseAgent:
                 f"[blue]Dependency analysis: {dependency_analysis.reasoning} (confidence: {dependency_analysis.confidence:.2f}, needs context: {dependency_analysis.needs_context})[/blue]")
             if not dependency_analysis.needs_context or not chat_history or len(chat_history) == 0:
                 return await self._enhance_standalone_query(user_message)
-            relevant_context = await self._extract_smart_context(user_message, chat_history, dependency_analysis)
+            relevant_context = self._resolve_from_entity_index(user_message, chat_history, session_id)
+            if relevant_context is None:
+                relevant_context = await self._extract_smart_context(user_message, chat_history,
+                                                                     dependency_analysis,
+                                                                     conversation_summary=conversation_summary)
             if not relevant_context:
                 return await self._enhance_standalone_query(user_message)
             enhanced_query = await self._generate_context_aware_query(user_message, relevant_context)
@@ -270,11 +283,28 @@ class ParaphraseAgent:
             print(f"[red]Error in paraphrase_query: {e}[/red]")
             return user_message
 
+    @staticmethod
+    def _resolve_from_entity_index(user_message: str, chat_history: List[ChatMessage],
+                                   session_id: str = DEFAULT_SESSION_ID) -> Optional[str]:
+        """
+        Resolves pronouns against the conversation entity index. Returns None when the index
+        cannot answer, so the caller falls back to LLM context extraction.
+        """
+        if not settings.entity_index_enabled:
+            return None
+        conversation_entity_index.sync(chat_history, session_id)
+        resolved = conversation_entity_index.resolve(user_message, session_id)
+        _context_resolutions.inc(path="entity_index" if resolved else "llm")
+        if resolved:
+            print(f"[cyan]Context resolved from entity index: {resolved}[/cyan]")
+        return resolved
+
     async def _analyze_dependency(self, user_message: str) -> DependencyAnalysisResult:
         """
         Analyzes a user message to determine whether it depends on prior context for proper understanding
-        and processing. It generates a prompt with examples to send to an AI model and evaluates the response
-        to extract the analysis result in the form of a JSON object.
+        and processing. Clear cases are decided locally by DependencyRuleAnalyzer; otherwise it generates a
+        prompt with examples to send to an AI model and evaluates the response to extract the analysis result
+        in the form of a JSON object.
 
         Parameters:
         user_message (str): The user message to be analyzed for dependency on previous context.
@@ -288,6 +318,13 @@ class ParaphraseAgent:
         JSONDecodeError: If the response from the AI model cannot be parsed as valid JSON.
         Exception: If any unexpected error occurs during analysis.
         """
+        if settings.dependency_rules_enabled:
+            rule_result = self.dependency_rules.analyze(user_message)
+            if rule_result is not None:
+                _dependency_analysis_calls.inc(path="rules")
+                return rule_result
+        _dependency_analysis_calls.inc(path="llm")
+
         try:
             examples_text = "\n".join([
                 f"Message: \"{example['user_message']}\"\nNeeds Context: {example['needs_context']}\nReasoning: {example['reasoning']}\n"
@@ -327,7 +364,7 @@ Respond with a JSON object containing:
 
 JSON Response:"""
 
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=[
                     {"role": "system",
@@ -335,7 +372,10 @@ JSON Response:"""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self._ANALYZE_DEPENDENCY_TEMPERATURE,
-                max_tokens=self._ANALYZE_DEPENDENCY_MAX_TOKENS
+                max_tokens=self._ANALYZE_DEPENDENCY_MAX_TOKENS,
+                agent="ParaphraseAgent",
+                call_site="_analyze_dependency",
+                cache=True
             )
 
             result_text = response.choices[0].message.content.strip()
@@ -351,17 +391,33 @@ JSON Response:"""
             print(f"[red]Error in LLM dependency analysis: {e}[/red]")
             raise Exception("Error in LLM dependency analysis") from e
 
+    @staticmethod
+    def _count_unsummarized(chat_history: List[ChatMessage], conversation_summary: ConversationSummary) -> int:
+        """
+        How many of the latest messages to send next to the summary: every message after the one it
+        was built up to, or the last ``conversation_summary_recent_turns`` if that is more.
+        """
+        summarized_until = (conversation_summary.last_message_at, conversation_summary.last_message_id)
+        unsummarized = sum(1 for msg in chat_history if (msg.created_at, msg.id) > summarized_until)
+        return max(unsummarized, settings.conversation_summary_recent_turns)
+
     async def _extract_smart_context(self, user_message: str, chat_history: List[ChatMessage],
                                      dependency_analysis: DependencyAnalysisResult,
-                                     max_context_messages: Optional[int] = None) -> str:
+                                     max_context_messages: Optional[int] = None,
+                                     conversation_summary: Optional[ConversationSummary] = None) -> str:
         """
         Uses LLM to intelligently extract only the most relevant context from chat history.
+
+        With a conversation summary, only the messages it does not cover yet are sent verbatim (at
+        least the last ``conversation_summary_recent_turns``) and the summary stands in for the older
+        ones. Summaries are updated in the background, so they may lag several turns behind.
         
         Args:
             user_message: Current user message
             chat_history: List of previous chat messages
             dependency_analysis: Results from dependency analysis
             max_context_messages: Maximum number of previous messages to consider
+            conversation_summary: Rolling summary of the conversation so far
             
         Returns:
             Relevant context string or empty string if no relevant context
@@ -370,7 +426,8 @@ JSON Response:"""
             return ""
         try:
             if not max_context_messages:
-                max_context_messages = len(chat_history)
+                max_context_messages = self._count_unsummarized(chat_history, conversation_summary) \
+                    if conversation_summary else len(chat_history)
             recent_messages = chat_history[-max_context_messages:] if len(
                 chat_history) > max_context_messages else chat_history
             conversation_history = []
@@ -388,6 +445,10 @@ JSON Response:"""
                 for conv in conversation_history
             ])
 
+            summary_section = f"""
+CONVERSATION SUMMARY (covers the earlier turns; the history below lists only the latest ones):
+{conversation_summary.summary}
+""" if conversation_summary else ""
             chronological_note = f"""
 NOTE: Messages are numbered from MOST RECENT ([{len(conversation_history)}]) to OLDEST ([1]). 
 When resolving pronouns, prioritize entities mentioned in higher-numbered (more recent) messages first."""
@@ -396,7 +457,7 @@ When resolving pronouns, prioritize entities mentioned in higher-numbered (more
 CURRENT USER MESSAGE: "{user_message}"
 
 DEPENDENCY ANALYSIS: {dependency_analysis.reasoning}
-
+{summary_section}
 CONVERSATION HISTORY (most recent first):
 {chronological_note}
 {conversation_text}
@@ -444,7 +505,7 @@ INSTRUCTIONS:
 
 RELEVANT CONTEXT:"""
 
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=[
                     {"role": "system",
@@ -452,7 +513,10 @@ RELEVANT CONTEXT:"""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self._EXTRACT_SMART_CONTEXT_TEMPERATURE,
-                max_tokens=self._EXTRACT_SMART_CONTEXT_MAX_TOKENS
+                max_tokens=self._EXTRACT_SMART_CONTEXT_MAX_TOKENS,
+                agent="ParaphraseAgent",
+                call_site="_extract_smart_context",
+                cache=True
             )
 
             extracted_context = response.choices[0].message.content.strip()
@@ -544,7 +608,7 @@ EXAMPLES:
 
 Generate the enhanced query:"""
 
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=[
                     {"role": "system",
@@ -552,7 +616,10 @@ Generate the enhanced query:"""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self._GENERATE_CONTEXT_AWARE_QUERY_TEMPERATURE,
-                max_tokens=self._GENERATE_CONTEXT_AWARE_QUERY_MAX_TOKENS
+                max_tokens=self._GENERATE_CONTEXT_AWARE_QUERY_MAX_TOKENS,
+                agent="ParaphraseAgent",
+                call_site="_generate_context_aware_query",
+                cache=True
             )
 
             enhanced_query = response.choices[0].message.content.strip()
@@ -595,7 +662,7 @@ INSTRUCTIONS:
 - Focus on making it unambiguous for an AI assistant
 
 Enhanced query:"""
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=[
                     {"role": "system",
@@ -603,7 +670,10 @@ Enhanced query:"""
                     {"role": "user", "content": prompt}
                 ],
                 temperature=self._ENHANCE_STANDALONE_QUERY_TEMPERATURE,
-                max_tokens=self._ENHANCE_STANDALONE_QUERY_MAX_TOKENS
+                max_tokens=self._ENHANCE_STANDALONE_QUERY_MAX_TOKENS,
+                agent="ParaphraseAgent",
+                call_site="_enhance_standalone_query",
+                cache=True
             )
             enhanced_query = response.choices[0].message.content.strip()
             if not enhanced_query:
@@ -1,17 +1,18 @@
 import json
-from collections import deque
-from datetime import datetime
 from typing import Dict, Any, Optional, List
 
 from pydantic import BaseModel
 from rich import print
-from sqlalchemy.orm import Session
 
 from core.database_schema_prompt import get_database_schema_prompt
-from core.llm_handler import openai_client
+from core.llm_handler import llm_handler
+from core.llm_scheduler import LlmPriority
 from core.settings import settings
 from core.utils import parse_json
-from models.schemas import GeneratedQuery, LlmResponseTypes
+from models import AsyncSessionLocal
+from models.schemas import GeneratedQuery, LlmResponseTypes, QueryValidationResult
+from repositories.validation_history_repository import AsyncValidationHistoryRepository
+from services.validation_history_index import ValidationHistoryEntry, validation_history_index
 from services.stream_service import StreamService, StreamMessage
 
 
@@ -21,34 +22,30 @@ class QueryGenerationRequest(BaseModel):
     validation_feedback: Optional[str] = None
     improvement_suggestions: Optional[List[str]] = None
     execution_error: Optional[str] = None
+    attempt: int = 1
+    temperature: Optional[float] = None
 
 
 class QueryGeneratorAgent:
     _QUERY_GENERATOR_TEMPERATURE = 0.7
     _QUERY_GENERATOR_MAX_TOKENS = 5000
-    _MAX_RECENT_RESULTS = 10
-    _validation_history: deque = deque(maxlen=50)
+    _MAX_HISTORY_SQL_LENGTH = 600
 
-    def __init__(self, db: Session, stream_service: StreamService):
-        self.db = db
+    def __init__(self, stream_service: StreamService):
         self.stream_service = stream_service
 
-    @classmethod
-    def add_validation_result(cls, user_message: str, generated_query: str, validation_result):
-        cls._validation_history.append({
-            'user_message': user_message,
-            'generated_query': generated_query,
-            'validation_result': validation_result,
-            'timestamp': datetime.utcnow()
-        })
-
-    @classmethod
-    def get_recent_validation_results(cls) -> List[Dict]:
-        return list(cls._validation_history)
-
-    @classmethod
-    def cleanup_historical_data(cls):
-        cls._validation_history.clear()
+    @staticmethod
+    async def add_validation_result(user_message: str, generated_query: str,
+                                    validation_result: QueryValidationResult):
+        async with AsyncSessionLocal() as db:
+            await AsyncValidationHistoryRepository(db).create(
+                user_message=user_message,
+                sql_query=generated_query,
+                is_valid=validation_result.is_valid,
+                confidence_score=validation_result.confidence_score,
+                error_message=validation_result.error_message,
+                issue=validation_result.low_confidence_explanation,
+            )
 
     @staticmethod
     def _get_system_prompt() -> str:
@@ -113,7 +110,9 @@ IMPORTANT: The SELECT clause MUST include id, email, data_source, first_name, an
             content=f"Query Generator analyzing: '{request.user_message[:50]}...'"
         ))
         try:
-            recent_results = self.get_recent_validation_results()
+            async with AsyncSessionLocal() as db:
+                successes, failures = await validation_history_index.search(db, request.user_message,
+                                                                            settings.validation_history_top_k)
             messages = [
                 {"role": "system", "content": self._get_system_prompt()},
                 {"role": "user", "content": f"""
@@ -125,7 +124,7 @@ Additional Context: {json.dumps(request.context) if request.context else "None"}
 
 {self._format_feedback_section(request)}
 
-{self._format_recent_results_section(recent_results)}
+{self._format_relevant_results_section(successes, failures)}
 
 Focus on creating a query that:
 1. Targets customers who accept marketing (accepts_marketing = true)
@@ -143,11 +142,15 @@ Respond with a valid JSON object containing the query details.
                 content="Generating query..."
             ))
 
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=messages,
-                temperature=self._QUERY_GENERATOR_TEMPERATURE,
-                max_tokens=self._QUERY_GENERATOR_MAX_TOKENS
+                temperature=request.temperature if request.temperature is not None else
+                self._QUERY_GENERATOR_TEMPERATURE,
+                max_tokens=self._QUERY_GENERATOR_MAX_TOKENS,
+                priority=LlmPriority.RETRY if request.attempt > 1 else LlmPriority.STANDARD,
+                agent="QueryGeneratorAgent",
+                call_site="generate_query"
             )
             response_content = response.choices[0].message.content
             try:
@@ -205,22 +208,28 @@ Respond with a valid JSON object containing the query details.
 
         return feedback_section
 
-    def _format_recent_results_section(self, recent_results: List[Dict]) -> str:
-        if not recent_results:
+    def _format_relevant_results_section(self, successes: List[ValidationHistoryEntry],
+                                         failures: List[ValidationHistoryEntry]) -> str:
+        if not successes and not failures:
             return ""
 
-        section = "\n**RECENT VALIDATION RESULTS (Learn from these):**\n"
-
-        for i, result in enumerate(recent_results[-self._MAX_RECENT_RESULTS:], 1):
-            validation_result = result['validation_result']
-            section += f"{i}. Query: {result['generated_query']}...\n"
-            section += f"   Result: {'Valid' if validation_result.is_valid else 'Invalid'} "
-            section += f"(confidence: {validation_result.confidence_score:.2f})\n"
-
-            if validation_result.error_message:
-                section += f"   Error: {validation_result.error_message}\n"
-            if validation_result.low_confidence_explanation:
-                section += f"   Issue: {validation_result.low_confidence_explanation}...\n"
-            section += "\n"
+        section = ""
+        if successes:
+            section += "\n**VALIDATED QUERIES FOR SIMILAR REQUESTS (reuse what fits):**\n"
+            for i, entry in enumerate(successes, 1):
+                section += f"{i}. Request: \"{entry.user_message}\"\n"
+                section += f"   Query: {entry.sql_query[:self._MAX_HISTORY_SQL_LENGTH]}\n"
+                section += f"   Result: Valid (confidence: {entry.confidence_score:.2f})\n\n"
+        if failures:
+            section += "\n**REJECTED QUERIES FOR SIMILAR REQUESTS (avoid these mistakes):**\n"
+            for i, entry in enumerate(failures, 1):
+                section += f"{i}. Request: \"{entry.user_message}\"\n"
+                section += f"   Query: {entry.sql_query[:self._MAX_HISTORY_SQL_LENGTH]}\n"
+                section += f"   Result: {'Low confidence' if entry.is_valid else 'Invalid'} (confidence: {entry.confidence_score:.2f})\n"
+                if entry.error_message:
+                    section += f"   Error: {entry.error_message}\n"
+                if entry.issue:
+                    section += f"   Issue: {entry.issue}\n"
+                section += "\n"
 
         return section
@@ -0,0 +1,492 @@
+import difflib
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from core.database_schema_prompt import get_database_schema_prompt
+from models.models import Customer
+
+REQUIRED_COLUMNS = ("id", "email", "data_source", "first_name", "last_name")
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>[eE]?'(?:[^']|'')*')
+  | (?P<dollar_string>\$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$)
+  | (?P<quoted>"(?:[^"]|"")+")
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<parameter>:[A-Za-z_][A-Za-z0-9_]*|\$\d+)
+  | (?P<operator>->>|->|\#>>|\#>|::|<>|!=|<=|>=|\|\||@>|<@|\?\||\?&|[-+*/%<>=~!@#^&|?])
+  | (?P<punctuation>[(),;.\[\]])
+""", re.VERBOSE | re.DOTALL)
+
+_FORBIDDEN_KEYWORDS = {
+    "insert", "update", "delete", "drop", "alter", "create", "truncate", "merge", "grant", "revoke", "copy",
+    "into", "vacuum", "reindex", "cluster", "lock", "call", "do", "execute", "prepare", "set", "reset",
+}
+_FORBIDDEN_FUNCTIONS = {
+    "pg_sleep", "pg_read_file", "pg_read_binary_file", "pg_ls_dir", "pg_stat_file", "lo_import", "lo_export",
+    "dblink", "dblink_exec", "set_config", "pg_terminate_backend", "pg_cancel_backend", "pg_reload_conf",
+}
+# Words that are never column references: keywords, type names, date parts and functions that
+# take no parentheses.
+_KEYWORDS = {
+    "select", "from", "where", "and", "or", "not", "in", "is", "null", "true", "false", "like", "ilike", "similar",
+    "to", "between", "symmetric", "case", "when", "then", "else", "end", "as", "on", "join", "inner", "left",
+    "right", "full", "outer", "cross", "natural", "lateral", "using", "group", "by", "order", "having", "limit",
+    "offset", "fetch", "first", "next", "rows", "row", "only", "asc", "desc", "nulls", "last", "distinct", "all",
+    "any", "some", "exists", "union", "intersect", "except", "interval", "date", "time", "timestamp",
+    "timestamptz", "with", "without", "zone", "at", "current_date", "current_timestamp", "current_time",
+    "localtime", "localtimestamp", "filter", "over", "partition", "window", "range", "groups", "preceding",
+    "following", "unbounded", "current", "escape", "collate", "array", "values", "default", "isnull",
+    "notnull", "unknown", "ties", "for", "both", "leading", "trailing", "year", "month", "week", "day", "hour",
+    "minute", "second", "quarter", "epoch", "dow", "doy", "isodow", "isoyear", "millisecond", "microsecond",
+    "decade", "century", "millennium", "text", "varchar", "char", "character", "varying", "integer", "int",
+    "int2", "int4", "int8", "bigint", "smallint", "numeric", "decimal", "real", "float", "float4", "float8",
+    "double", "precision", "boolean", "bool", "json", "jsonb", "uuid", "money",
+}
+_FROM_CLAUSE_END = {
+    "where", "group", "having", "order", "limit", "offset", "fetch", "union", "intersect", "except", "window",
+    "for",
+}
+_JOIN_MODIFIERS = {"inner", "left", "right", "full", "outer", "cross", "natural", "lateral", "only"}
+_JSON_KEY_OPERATORS = {"->>", "->", "?"}
+_JSON_PATH_OPERATORS = {"#>>", "#>"}
+_SOURCE_DATA_SECTION = re.compile(r"source_data JSON Structure.*?(?=\n\*\*[^*\n]+:\*\*\n)", re.DOTALL)
+_DOCUMENTED_FIELD = re.compile(r"^- `([a-z_][a-z0-9_]*)`", re.MULTILINE)
+
+
+class SqlToken(BaseModel):
+    kind: str
+    value: str
+    depth: int = 0
+
+    @property
+    def lower(self) -> str:
+        return self.value.lower() if self.kind == "word" else self.value
+
+    @property
+    def identifier(self) -> Optional[str]:
+        if self.kind == "word":
+            return self.value.lower()
+        if self.kind == "quoted":
+            return self.value[1:-1].replace('""', '"')
+        return None
+
+
+class SqlAnalysisIssue(BaseModel):
+    code: str
+    message: str
+    suggestion: Optional[str] = None
+    is_security_issue: bool = False
+
+
+class SqlAnalysisResult(BaseModel):
+    issues: List[SqlAnalysisIssue] = []
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.issues
+
+    @property
+    def has_security_issue(self) -> bool:
+        return any(issue.is_security_issue for issue in self.issues)
+
+
+class SqlSyntaxError(ValueError):
+    pass
+
+
+def tokenize(sql_query: str) -> List[SqlToken]:
+    """Splits SQL into tokens, dropping whitespace and comments and keeping literals whole."""
+    tokens: List[SqlToken] = []
+    position, depth = 0, 0
+    while position < len(sql_query):
+        match = _TOKEN_PATTERN.match(sql_query, position)
+        if match is None:
+            character = sql_query[position]
+            if character in "'\"$":
+                raise SqlSyntaxError(f"Unterminated literal starting at: {sql_query[position:position + 30]}")
+            raise SqlSyntaxError(f"Unexpected character {character!r} at position {position}")
+        position = match.end()
+        kind = match.lastgroup if match.lastgroup != "tag" else "dollar_string"
+        if kind in ("space", "comment"):
+            continue
+        value = match.group()
+        if kind == "dollar_string":
+            kind = "string"
+        if value == ")":
+            depth -= 1
+            if depth < 0:
+                raise SqlSyntaxError("Unbalanced parentheses: ')' without a matching '('")
+        tokens.append(SqlToken(kind=kind, value=value, depth=depth))
+        if value == "(":
+            depth += 1
+    if depth:
+        raise SqlSyntaxError("Unbalanced parentheses: '(' is never closed")
+    return tokens
+
+
+def strip_trailing(sql_query: str) -> str:
+    """
+    The query without the whitespace, comments and semicolons after its last token, so it can be
+    wrapped in a subquery. Falls back to stripping whitespace and semicolons if it does not tokenize.
+    """
+    position, end = 0, 0
+    while position < len(sql_query):
+        match = _TOKEN_PATTERN.match(sql_query, position)
+        if match is None:
+            return sql_query.strip().rstrip(";").rstrip()
+        position = match.end()
+        if match.lastgroup not in ("space", "comment") and match.group() != ";":
+            end = position
+    return sql_query[:end]
+
+
+def _matching_paren(tokens: List[SqlToken], index: int) -> int:
+    depth = tokens[index].depth
+    for position in range(index + 1, len(tokens)):
+        if tokens[position].value == ")" and tokens[position].depth == depth:
+            return position
+    return len(tokens) - 1
+
+
+def _split_top_level(tokens: List[SqlToken], separator: str = ",") -> List[List[SqlToken]]:
+    if not tokens:
+        return []
+    depth = tokens[0].depth
+    parts: List[List[SqlToken]] = [[]]
+    for token in tokens:
+        if token.value == separator and token.depth == depth:
+            parts.append([])
+        else:
+            parts[-1].append(token)
+    return [part for part in parts if part]
+
+
+class SqlStaticAnalyzer:
+    """
+    Deterministic checks that run on generated SQL before it reaches the database or the LLM validator.
+
+    The query is tokenized so string literals, quoted identifiers and comments never trigger a
+    rule. A query must be a single SELECT statement without data-modifying keywords or unsafe
+    functions, its top-level SELECT list must contain the required campaign columns, every
+    table must be ``customers``, and every column and ``source_data`` key it references must
+    exist in the ``Customer`` model or the source_data fields documented in the schema prompt.
+    Each rejection carries a suggestion for the query generator.
+    """
+
+    def __init__(self):
+        self._schema: Tuple[str, Set[str]] = ("", set())
+
+    @property
+    def columns(self) -> Set[str]:
+        return {column.name for column in Customer.__table__.columns}
+
+    @property
+    def source_data_fields(self) -> Set[str]:
+        schema = get_database_schema_prompt()
+        if self._schema[0] != schema:
+            section = _SOURCE_DATA_SECTION.search(schema)
+            self._schema = (schema, set(_DOCUMENTED_FIELD.findall(section.group())) if section else set())
+        return self._schema[1]
+
+    def check_security(self, sql_query: str) -> Optional[str]:
+        """The security violation in ``sql_query``, or None; unparseable SQL is left to the database."""
+        try:
+            tokens = tokenize(sql_query)
+        except SqlSyntaxError:
+            tokens = None
+        if tokens is None:
+            return None if sql_query.strip().upper().startswith("SELECT") else \
+                "SECURITY VIOLATION: Only SELECT queries are allowed. Query must start with SELECT."
+        issue = self._security_issue(tokens)
+        return issue.message if issue else None
+
+    def analyze(self, sql_query: str) -> SqlAnalysisResult:
+        try:
+            tokens = tokenize(sql_query)
+        except SqlSyntaxError as e:
+            return SqlAnalysisResult(issues=[SqlAnalysisIssue(
+                code="syntax_error", message=f"SQL syntax error: {e}",
+                suggestion="Return a single complete PostgreSQL SELECT statement with balanced quotes and parentheses.")])
+        security_issue = self._security_issue(tokens)
+        if security_issue:
+            return SqlAnalysisResult(issues=[security_issue])
+        tokens = [token for token in tokens if token.value != ";"]
+
+        issues: List[SqlAnalysisIssue] = []
+        tables, aliases = self._collect_tables_and_aliases(tokens, issues)
+        issues.extend(self._check_required_columns(tokens))
+        issues.extend(self._check_references(tokens, tables, aliases))
+        return SqlAnalysisResult(issues=issues)
+
+    @staticmethod
+    def _security_issue(tokens: List[SqlToken]) -> Optional[SqlAnalysisIssue]:
+        while tokens and tokens[-1].value == ";":
+            tokens = tokens[:-1]
+        if not tokens:
+            return SqlAnalysisIssue(code="empty_query", message="SECURITY VIOLATION: The query is empty.",
+                                    suggestion="Return a SELECT statement.", is_security_issue=True)
+        if any(token.value == ";" for token in tokens):
+            return SqlAnalysisIssue(
+                code="multiple_statements",
+                message="SECURITY VIOLATION: Multiple statements are not allowed. Only a single SELECT query is permitted.",
+                suggestion="Return exactly one SELECT statement without semicolons between statements.",
+                is_security_issue=True)
+        for index, token in enumerate(tokens):
+            if token.kind != "word":
+                continue
+            followed_by_call = index + 1 < len(tokens) and tokens[index + 1].value == "("
+            after_dot = index > 0 and tokens[index - 1].value == "."
+            if token.lower in _FORBIDDEN_KEYWORDS and not followed_by_call and not after_dot \
+                    or token.lower == "replace" and not followed_by_call:
+                return SqlAnalysisIssue(
+                    code="forbidden_operation",
+                    message=f"SECURITY VIOLATION: {token.value.upper()} operation is not allowed. Only SELECT "
+                            f"queries are permitted for customer campaign analysis.",
+                    suggestion="Only read from the customers table with a plain SELECT.", is_security_issue=True)
+            if token.lower in _FORBIDDEN_FUNCTIONS and followed_by_call:
+                return SqlAnalysisIssue(
+                    code="forbidden_function",
+                    message=f"SECURITY VIOLATION: the {token.value} function is not allowed.",
+                    suggestion="Use only ordinary expressions and aggregate functions.", is_security_issue=True)
+        if tokens[0].lower != "select":
+            return SqlAnalysisIssue(
+                code="not_select",
+                message="SECURITY VIOLATION: Only SELECT queries are allowed. Query must start with SELECT.",
+                suggestion="Start the query with SELECT (common table expressions are not supported).",
+                is_security_issue=True)
+        return None
+
+    def _collect_tables_and_aliases(self, tokens: List[SqlToken], issues: List[SqlAnalysisIssue]
+                                    ) -> Tuple[Dict[str, Optional[str]], Set[str]]:
+        """
+        Maps every name a column can be qualified with to the table it stands for (None for
+        derived tables and set-returning functions), and collects output and column aliases.
+        Reports tables other than ``customers``.
+        """
+        tables: Dict[str, Optional[str]] = {"customers": "customers"}
+        aliases: Set[str] = set()
+        in_select: Set[int] = set()
+        in_from: Set[int] = set()
+        expect_table: Set[int] = set()
+        aliased_groups: Set[int] = set()
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            depth = token.depth
+            if token.value == "(":
+                if depth in expect_table:
+                    expect_table.discard(depth)
+                    aliased_groups.add(depth)
+            elif token.value == ")":
+                for nested in (in_select, in_from, expect_table, aliased_groups):
+                    nested.discard(depth + 1)
+                if depth in aliased_groups:
+                    aliased_groups.discard(depth)
+                    index = self._read_alias(tokens, index + 1, None, tables, aliases)
+                    continue
+            elif token.lower == "select":
+                in_select.add(depth)
+                in_from.discard(depth)
+            elif token.lower == "from" and depth in in_select:
+                in_from.add(depth)
+                expect_table.add(depth)
+            elif depth in in_from and token.lower in _FROM_CLAUSE_END:
+                in_from.discard(depth)
+                expect_table.discard(depth)
+            elif depth in in_from and (token.value == "," or token.lower == "join"):
+                expect_table.add(depth)
+            elif depth in expect_table and token.identifier and token.lower not in _JOIN_MODIFIERS:
+                expect_table.discard(depth)
+                index = self._read_table_name(tokens, index, tables, aliases, issues, aliased_groups)
+                continue
+            if token.lower == "as" and index + 1 < len(tokens) and tokens[index + 1].identifier:
+                aliases.add(tokens[index + 1].identifier)
+            index += 1
+        aliases.update(self._implicit_select_aliases(tokens))
+        return tables, aliases
+
+    def _read_table_name(self, tokens: List[SqlToken], index: int, tables: Dict[str, Optional[str]],
+                         aliases: Set[str], issues: List[SqlAnalysisIssue], aliased_groups: Set[int]) -> int:
+        """Reads a table or function name in a FROM item and returns the index after it (and its alias)."""
+        depth = tokens[index].depth
+        name = tokens[index].identifier
+        index += 1
+        while index + 1 < len(tokens) and tokens[index].value == "." and tokens[index + 1].identifier:
+            name = tokens[index + 1].identifier
+            index += 2
+        if index < len(tokens) and tokens[index].value == "(":
+            # A set-returning function such as jsonb_array_elements(tags); its alias follows the ")".
+            aliased_groups.add(depth)
+            return index
+        if name not in tables:
+            issues.append(SqlAnalysisIssue(
+                code="unknown_table", message=f"Table '{name}' does not exist.",
+                suggestion="Query the customers table; it is the only table available."))
+            tables[name] = name
+        return self._read_alias(tokens, index, name, tables, aliases)
+
+    @staticmethod
+    def _read_alias(tokens: List[SqlToken], index: int, table: Optional[str], tables: Dict[str, Optional[str]],
+                    aliases: Set[str]) -> int:
+        if index < len(tokens) and tokens[index].lower == "as":
+            index += 1
+        if index >= len(tokens) or not tokens[index].identifier \
+                or tokens[index].kind == "word" and tokens[index].lower in _KEYWORDS:
+            return index
+        alias = tokens[index].identifier
+        tables[alias] = table
+        aliases.add(alias)
+        index += 1
+        if index < len(tokens) and tokens[index].value == "(":
+            close = _matching_paren(tokens, index)
+            aliases.update(token.identifier for token in tokens[index + 1:close] if token.identifier)
+            index = close + 1
+        return index
+
+    @staticmethod
+    def _select_lists(tokens: List[SqlToken]) -> List[List[SqlToken]]:
+        """The tokens of every SELECT list, outermost first."""
+        select_lists = []
+        for index, token in enumerate(tokens):
+            if token.lower != "select":
+                continue
+            end = index + 1
+            while end < len(tokens) and tokens[end].depth >= token.depth and not (
+                    tokens[end].depth == token.depth and tokens[end].lower in _FROM_CLAUSE_END | {"from"}):
+                end += 1
+            items = tokens[index + 1:end]
+            if items and items[0].lower in ("distinct", "all"):
+                items = items[1:]
+                if items and items[0].lower == "on" and len(items) > 1:
+                    items = items[_matching_paren(items, 1) + 1:]
+            select_lists.append(items)
+        return select_lists
+
+    @classmethod
+    def _implicit_select_aliases(cls, tokens: List[SqlToken]) -> Set[str]:
+        aliases = set()
+        for select_list in cls._select_lists(tokens):
+            for item in _split_top_level(select_list):
+                alias = cls._implicit_alias(item)
+                if alias:
+                    aliases.add(alias)
+        return aliases
+
+    @staticmethod
+    def _implicit_alias(item: List[SqlToken]) -> Optional[str]:
+        if len(item) < 2 or not item[-1].identifier or item[-1].kind == "word" and item[-1].lower in _KEYWORDS:
+            return None
+        previous = item[-2]
+        if previous.kind in ("operator", "parameter") or previous.value in (".", ",", "(") \
+                or previous.kind == "word" and previous.lower in _KEYWORDS - {"end"}:
+            return None
+        return item[-1].identifier
+
+    def _output_name(self, item: List[SqlToken]) -> Optional[str]:
+        depth = item[0].depth
+        for index, token in enumerate(item[:-1]):
+            if token.lower == "as" and token.depth == depth and item[index + 1].identifier:
+                return item[index + 1].identifier
+        alias = self._implicit_alias(item)
+        if alias:
+            return alias
+        while len(item) > 2 and item[-2].value == "::":
+            item = item[:-2]
+        if len(item) == 1 and item[0].identifier:
+            return item[0].identifier
+        if len(item) == 3 and item[1].value == "." and item[2].identifier:
+            return item[2].identifier
+        return None
+
+    def _check_required_columns(self, tokens: List[SqlToken]) -> List[SqlAnalysisIssue]:
+        select_lists = self._select_lists(tokens)
+        if not select_lists:
+            return []
+        output_names = set()
+        for item in _split_top_level(select_lists[0]):
+            if item[-1].value == "*":
+                return []
+            name = self._output_name(item)
+            if name:
+                output_names.add(name)
+        missing = [column for column in REQUIRED_COLUMNS if column not in output_names]
+        if not missing:
+            return []
+        return [SqlAnalysisIssue(
+            code="missing_required_columns",
+            message=f"The SELECT list is missing the required column(s): {', '.join(missing)}.",
+            suggestion=f"Add {', '.join(missing)} to the SELECT list; every query must return "
+                       f"{', '.join(REQUIRED_COLUMNS)}.")]
+
+    def _check_references(self, tokens: List[SqlToken], tables: Dict[str, Optional[str]], aliases: Set[str]
+                          ) -> List[SqlAnalysisIssue]:
+        columns = self.columns
+        issues: List[SqlAnalysisIssue] = []
+        reported = set()
+
+        def report(issue: SqlAnalysisIssue):
+            if (issue.code, issue.message) not in reported:
+                reported.add((issue.code, issue.message))
+                issues.append(issue)
+
+        for index, token in enumerate(tokens):
+            name = token.identifier
+            if name is None:
+                continue
+            previous = tokens[index - 1] if index else None
+            following = tokens[index + 1] if index + 1 < len(tokens) else None
+            if following is not None and following.value in ("(", "."):
+                continue
+            if previous is not None and (previous.value == "::" or previous.lower == "as"):
+                continue
+            if previous is not None and previous.value == ".":
+                qualifier = tokens[index - 2].identifier if index > 1 else None
+                if tables.get(qualifier) != "customers" or name in columns:
+                    continue
+            elif token.kind == "word" and token.lower in _KEYWORDS or name in columns or name in aliases \
+                    or name in tables:
+                continue
+            report(self._unknown_column_issue(name))
+
+        for index, token in enumerate(tokens[:-2]):
+            if token.identifier != "source_data" or tokens[index + 1].value not in \
+                    _JSON_KEY_OPERATORS | _JSON_PATH_OPERATORS or tokens[index + 2].kind != "string":
+                continue
+            key = tokens[index + 2].value[1:-1].replace("''", "'")
+            if tokens[index + 1].value in _JSON_PATH_OPERATORS:
+                key = key.strip("{}").split(",")[0].strip().strip('"')
+            issue = self._source_data_key_issue(key)
+            if issue:
+                report(issue)
+        return issues
+
+    def _unknown_column_issue(self, name: str) -> SqlAnalysisIssue:
+        if name in self.source_data_fields:
+            suggestion = f"'{name}' is a source_data field, not a column: use (source_data->>'{name}')."
+        else:
+            close = difflib.get_close_matches(name, sorted(self.columns), n=1)
+            suggestion = f"Did you mean {close[0]}?" if close else \
+                "Use only columns of the customers table listed in the schema."
+        return SqlAnalysisIssue(code="unknown_column", message=f"Column '{name}' does not exist in customers.",
+                                suggestion=suggestion)
+
+    def _source_data_key_issue(self, key: str) -> Optional[SqlAnalysisIssue]:
+        fields = self.source_data_fields
+        if not fields or key in fields:
+            return None
+        if key in self.columns:
+            suggestion = f"'{key}' is a customers column, not a source_data key: reference {key} directly."
+        else:
+            close = difflib.get_close_matches(key, sorted(fields), n=1)
+            suggestion = f"Did you mean source_data->>'{close[0]}'?" if close else \
+                "Use only the source_data fields documented for each data source."
+        return SqlAnalysisIssue(code="unknown_source_data_key",
+                                message=f"source_data has no documented key '{key}'.", suggestion=suggestion)
+
+
+sql_static_analyzer = SqlStaticAnalyzer()
@@ -1,33 +1,45 @@
 import json
-import re
-from typing import Dict, Any, List, Optional, Tuple
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
 
 from pydantic import BaseModel
 from rich import print
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database_schema_prompt import get_database_schema_prompt
-from core.llm_handler import openai_client
+from core.llm_handler import llm_handler
+from core.llm_scheduler import LlmPriority
+from core.metrics import metrics
 from core.settings import settings
 from core.utils import parse_json
+from models import AnalyticsSessionLocal, analytics_engine
+from models.result_set import ResultSet
 from models.schemas import QueryValidationResult, GeneratedQuery, LlmResponseTypes
 from services.agents import CONFIDENCE_THRESHOLD
+from services.agents.sql_static_analyzer import SqlAnalysisResult, sql_static_analyzer, strip_trailing
 from services.stream_service import StreamService, StreamMessage
 
+_static_analysis = metrics.counter(
+    "sql_static_analysis_total", "Generated queries checked locally before execution, by outcome")
+_static_analysis_issues = metrics.counter("sql_static_analysis_issues_total", "Static analysis rejections by issue")
+_execution_guard = metrics.counter(
+    "sql_execution_guard_rejections_total", "Generated queries stopped by the execution guards, by reason")
+
 
 class ValidationRequest(BaseModel):
     user_message: str
     generated_query: GeneratedQuery
+    attempt: int = 1
 
 
 class ValidatorAgent:
     _VALIDATOR_TEMPERATURE = 0.7
     _VALIDATOR_MAX_TOKENS = 3000
     _MAX_SAMPLES = 10
+    _FETCH_BATCH_SIZE = 1000
 
-    def __init__(self, db: Session, stream_service: StreamService):
-        self.db = db
+    def __init__(self, stream_service: StreamService):
         self.stream_service = stream_service
 
     @staticmethod
@@ -105,7 +117,13 @@ Focus on practical campaign usability and customer targeting accuracy."""
         ))
 
         try:
-            all_data, execution_error, has_security_error = await self._execute_query_safely(
+            if settings.sql_static_analysis_enabled:
+                analysis = sql_static_analyzer.analyze(request.generated_query.sql_query)
+                _static_analysis.inc(outcome="passed" if analysis.is_valid else "rejected")
+                if not analysis.is_valid:
+                    return self._static_analysis_failure(analysis)
+
+            all_data, total_count, execution_error, has_security_error = await self.execute_sample(
                 request.generated_query.sql_query,
             )
             if execution_error:
@@ -121,24 +139,29 @@ Focus on practical campaign usability and customer targeting accuracy."""
                     error_message=execution_error,
                     has_security_error=has_security_error
                 )
-            print(f"[cyan]Sample data: {all_data}[/cyan]")
+            print(f"[cyan]Sample data: {all_data.head(self._MAX_SAMPLES).to_records()}[/cyan]")
             self.stream_service.add_message(StreamMessage(
                 response_type=LlmResponseTypes.AGENT_THINKING,
-                content=f"Retrieved {len(all_data) if all_data else 0} sample records"
+                content=f"Retrieved {len(all_data)} sample records" +
+                        (f" of {total_count}" if total_count is not None else "")
             ))
             validation_result = await self._analyze_query_intent(
                 request.user_message,
                 request.generated_query,
-                all_data
+                all_data,
+                total_count,
+                LlmPriority.RETRY if request.attempt > 1 else LlmPriority.STANDARD
             )
             validation_result.all_data = all_data
+            validation_result.total_count = total_count
             print(f"[green]Validation result: {validation_result}[/green]")
             self.stream_service.add_message(StreamMessage(
                 response_type=LlmResponseTypes.AGENT_THINKING,
                 content=f"Validation complete (confidence: {validation_result.confidence_score:.2f})",
                 data={
                     "is_valid": validation_result.is_valid,
-                    "sample_count": len(all_data) if all_data else 0
+                    "sample_count": len(all_data),
+                    "total_count": total_count
                 }
             ))
             return validation_result
@@ -158,61 +181,161 @@ Focus on practical campaign usability and customer targeting accuracy."""
             )
             return validation_result
 
+    async def execute_query(self, sql_query: str, max_rows: Optional[int] = None
+                            ) -> Tuple[Optional[ResultSet], Optional[str], bool]:
+        """
+        Runs an already validated query with the same security checks, returning (rows, error, security error).
+        At most ``max_rows`` rows are read when given.
+        """
+        return await self._execute_query_safely(sql_query, max_rows)
+
+    async def execute_sample(self, sql_query: str
+                             ) -> Tuple[Optional[ResultSet], Optional[int], Optional[str], bool]:
+        """
+        Reads the first SQL_SAMPLE_MAX_ROWS rows of a query, returning (rows, total row count, error,
+        security error). The total is only counted separately when the sample is full; it is None if
+        that count fails.
+        """
+        max_rows = settings.sql_sample_max_rows
+        rows, execution_error, has_security_error = await self._execute_query_safely(sql_query, max_rows)
+        if execution_error:
+            return None, None, execution_error, has_security_error
+        total_count = len(rows) if len(rows) < max_rows else await self.count_rows(sql_query)
+        return rows, total_count, None, False
+
+    async def count_rows(self, sql_query: str) -> Optional[int]:
+        """
+        Counts the rows a query returns without reading them, or estimates the count from the
+        query plan when SQL_RESULT_COUNT_MODE=estimate on PostgreSQL. None if the count fails.
+        """
+        sql_query = strip_trailing(sql_query)
+        try:
+            async with self._read_only_session() as db:
+                if settings.sql_result_count_mode == "estimate" and analytics_engine.dialect.name == "postgresql":
+                    return int((await self._explain(db, sql_query))["Plan Rows"])
+                return (await db.execute(text(f"SELECT COUNT(*) FROM (\n{sql_query}\n) AS counted_rows"))).scalar()
+        except Exception as e:
+            print(f"[yellow]Warning: Failed to count query rows: {e}[/yellow]")
+            return None
+
+    def _static_analysis_failure(self, analysis: SqlAnalysisResult) -> QueryValidationResult:
+        """Turns a static analysis rejection into feedback for the generator, without a DB or LLM call."""
+        for issue in analysis.issues:
+            _static_analysis_issues.inc(code=issue.code)
+        error_message = " ".join(issue.message for issue in analysis.issues)
+        print(f"[yellow]Static analysis rejected the query: {error_message}[/yellow]")
+        self.stream_service.add_message(StreamMessage(
+            response_type=LlmResponseTypes.AGENT_THINKING,
+            content=f"Static analysis rejected the query: {error_message}"
+        ))
+        return QueryValidationResult(
+            is_valid=False,
+            confidence_score=0.0,
+            validation_details=f"Static analysis rejected the query: {error_message}",
+            error_message=error_message,
+            improvement_suggestions=[issue.suggestion for issue in analysis.issues if issue.suggestion],
+            has_security_error=analysis.has_security_issue
+        )
+
     @staticmethod
     def _validate_query_security(sql_query: str) -> Optional[str]:
-        dangerous_patterns = [
-            r'\bINSERT\b', r'\bUPDATE\b', r'\bDELETE\b', r'\bDROP\b',
-            r'\bALTER\b', r'\bCREATE\b', r'\bTRUNCATE\b', r'\bREPLACE\b',
-            r'\bMERGE\b', r'\bGRANT\b', r'\bREVOKE\b',
-        ]
-
-        for pattern in dangerous_patterns:
-            match = re.search(pattern, sql_query, re.IGNORECASE)
-            if match:
-                operation = match.group().strip()
-                return f"SECURITY VIOLATION: {operation} operation is not allowed. Only SELECT queries are permitted for customer campaign analysis."
-        if not sql_query.strip().upper().startswith('SELECT'):
-            return "SECURITY VIOLATION: Only SELECT queries are allowed. Query must start with SELECT."
+        return sql_static_analyzer.check_security(sql_query)
 
-        return None
-
-    async def _execute_query_safely(self, sql_query: str) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str], bool]:
+    async def _execute_query_safely(self, sql_query: str, max_rows: Optional[int] = None
+                                    ) -> Tuple[Optional[ResultSet], Optional[str], bool]:
         try:
             sql_query = sql_query.strip()
             security_error = self._validate_query_security(sql_query)
             if security_error:
                 return None, security_error, True
-            result = self.db.execute(text(sql_query))
-            columns = result.keys()
-            rows = result.fetchall()
-            sample_data = []
-            for row in rows:
-                row_dict = {}
-                for i, column in enumerate(columns):
-                    value = row[i]
-                    if hasattr(value, 'isoformat'):
-                        value = value.isoformat()
-                    row_dict[column] = value
-                sample_data.append(row_dict)
-
-            return sample_data, None, False
+            async with self._read_only_session() as db:
+                plan_error = await self._check_plan(db, sql_query)
+                if plan_error:
+                    return None, plan_error, False
+                # A server-side cursor, so a broad query never has its whole result buffered by the driver.
+                result = await db.stream(text(sql_query), execution_options={
+                    "max_row_buffer": self._FETCH_BATCH_SIZE})
+                try:
+                    columns = list(result.keys())
+                    if max_rows is not None:
+                        rows = await result.fetchmany(max_rows)
+                    else:
+                        rows = [row async for batch in result.partitions(self._FETCH_BATCH_SIZE) for row in batch]
+                finally:
+                    await result.close()
+            return ResultSet.from_rows(columns, rows), None, False
 
         except Exception as e:
-            try:
-                print(f"[yellow]Warning: Query execution failed with error: {e}[/yellow]")
-                self.db.rollback()
-            except Exception as rollback_error:
-                print(f"[yellow]Warning: Failed to rollback transaction: {rollback_error}[/yellow]")
+            print(f"[yellow]Warning: Query execution failed with error: {e}[/yellow]")
+            if "statement timeout" in str(e):
+                _execution_guard.inc(reason="statement_timeout")
+                return None, (f"QUERY TIMEOUT: the query was cancelled after running for "
+                              f"{settings.sql_statement_timeout_ms / 1000:g}s. Add selective WHERE filters, avoid "
+                              f"cross joins and correlated subqueries, and add a LIMIT."), False
             return None, str(e), False
 
+    @asynccontextmanager
+    async def _read_only_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        A session for generated SQL on the analytics pool: its transaction is read-only and, on PostgreSQL,
+        every statement is cancelled after SQL_STATEMENT_TIMEOUT_MS. Closing it rolls the transaction back.
+        """
+        async with AnalyticsSessionLocal() as db:
+            if analytics_engine.dialect.name == "postgresql":
+                await db.execute(text("SET TRANSACTION READ ONLY"))
+                if settings.sql_statement_timeout_ms > 0:
+                    await db.execute(text(f"SET LOCAL statement_timeout = {int(settings.sql_statement_timeout_ms)}"))
+                yield db
+            elif analytics_engine.dialect.name == "sqlite":
+                # query_only is per connection, so it is switched off again before the connection goes back to the pool.
+                await db.execute(text("PRAGMA query_only = ON"))
+                try:
+                    yield db
+                finally:
+                    await db.rollback()
+                    await db.execute(text("PRAGMA query_only = OFF"))
+            else:
+                yield db
+
+    @staticmethod
+    async def _explain(db: AsyncSession, sql_query: str) -> Dict[str, Any]:
+        plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {strip_trailing(sql_query)}"))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
+    async def _check_plan(self, db: AsyncSession, sql_query: str) -> Optional[str]:
+        """
+        Rejects a query whose PostgreSQL plan is estimated above SQL_MAX_PLAN_COST or SQL_MAX_PLAN_ROWS,
+        before it runs. The error tells the generator what to change.
+        """
+        if analytics_engine.dialect.name != "postgresql":
+            return None
+        if not (settings.sql_max_plan_cost or settings.sql_max_plan_rows):
+            return None
+        plan = await self._explain(db, sql_query)
+        cost, rows = plan["Total Cost"], plan["Plan Rows"]
+        if settings.sql_max_plan_cost and cost > settings.sql_max_plan_cost:
+            _execution_guard.inc(reason="plan_cost")
+            return (f"QUERY TOO EXPENSIVE: the planner estimates a cost of {cost:,.0f} (limit "
+                    f"{settings.sql_max_plan_cost:,.0f}), top plan node {plan['Node Type']}. Add selective WHERE "
+                    f"filters, remove cross joins and self-joins, and avoid sorting or aggregating the whole table.")
+        if settings.sql_max_plan_rows and rows > settings.sql_max_plan_rows:
+            _execution_guard.inc(reason="plan_rows")
+            return (f"QUERY RETURNS TOO MANY ROWS: the planner estimates {rows:,} rows (limit "
+                    f"{settings.sql_max_plan_rows:,}). Narrow the segment with more specific filters or add a LIMIT.")
+        return None
+
     async def _analyze_query_intent(
             self,
             user_message: str,
             generated_query: GeneratedQuery,
-            sample_data: List[Dict[str, Any]]
+            sample_data: Optional[ResultSet],
+            total_count: Optional[int],
+            priority: LlmPriority = LlmPriority.STANDARD
     ) -> QueryValidationResult:
         try:
-            analysis_sample = sample_data[:self._MAX_SAMPLES] if sample_data else []
+            analysis_sample = sample_data.head(self._MAX_SAMPLES).to_records() if sample_data else []
 
             messages = [
                 {"role": "system", "content": self._get_system_prompt()},
@@ -231,7 +354,7 @@ Validate this customer campaign query against the user's intent:
 **Sample Results (first {len(analysis_sample)} rows):**
 {json.dumps(analysis_sample, indent=2, default=str) if analysis_sample else "No results returned"}
 
-**Total Sample Count:** {len(sample_data) if sample_data else 0}
+**Total Result Count:** {total_count if total_count is not None else f"at least {len(sample_data or [])}"}
 
 Analyze:
 1. Does the query include ALL mandatory columns (id, email, data_source, first_name, last_name)?
@@ -249,11 +372,14 @@ Provide a detailed validation assessment in JSON format with confidence score.
 """}
             ]
 
-            response = await openai_client.chat.completions.create(
+            response = await llm_handler.chat_completion(
                 model=settings.openai_model,
                 messages=messages,
                 temperature=self._VALIDATOR_TEMPERATURE,
-                max_tokens=self._VALIDATOR_MAX_TOKENS
+                max_tokens=self._VALIDATOR_MAX_TOKENS,
+                priority=priority,
+                agent="ValidatorAgent",
+                call_site="_analyze_query_intent"
             )
             response_content = response.choices[0].message.content
             try:
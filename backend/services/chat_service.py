@@ -1,108 +1,177 @@
 import asyncio
-import json
 import uuid
-from typing import AsyncGenerator
+from datetime import datetime
+from typing import AsyncGenerator, Optional
 
 from rich import print
 from sqlalchemy.orm import Session
 
-from models.schemas import LlmResponseTypes, QueryRequest
-from repositories.chat_repository import ChatRepository
+from models import AsyncSessionLocal
+from models.result_set import ResultSet
+from models.schemas import DEFAULT_SESSION_ID, LlmResponseTypes, QueryRequest
+from repositories.chat_repository import AsyncChatRepository, ChatRepository
+from repositories.conversation_summary_repository import ConversationSummaryRepository
 from services.agents.orchestrator_service import OrchestratorService
+from services.conversation_entity_index import conversation_entity_index
+from services.conversation_summary_service import conversation_summary_service
+from services.stream_replay_service import StreamReplayBuffer, stream_replay_service
 from services.stream_service import StreamMessage, StreamService
 
 
 class ChatService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Optional[Session] = None):
+        """``db`` is only needed for the history endpoints; streaming uses short-lived async sessions."""
         self.stream_service = StreamService()
         self.repository = ChatRepository(db)
+        self.summary_repository = ConversationSummaryRepository(db)
         self.db = db
-        self.orchestrator_service = OrchestratorService(db, self.stream_service)
+        self.orchestrator_service = OrchestratorService(self.stream_service)
 
-    async def stream_chat_response(self, message: str) -> AsyncGenerator[str, None]:
+    async def stream_chat_response(self, message: str, last_event_id: Optional[str] = None,
+                                   session_id: str = DEFAULT_SESSION_ID) -> AsyncGenerator[str, None]:
+        """
+        Streams the SSE frames for a chat response.
+
+        The agentic pipeline writes into a replay buffer from a background task, so a client that
+        reconnects with ``Last-Event-ID`` resumes from the next frame instead of re-running the query.
+        """
+        if last_event_id:
+            buffer, last_seq = stream_replay_service.resolve(last_event_id)
+            if buffer is None:
+                print(f"[yellow]No replay buffer for Last-Event-ID {last_event_id}[/yellow]")
+                yield StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR,
+                                    content="The response stream has expired. Please send your message again.").to_sse()
+                yield StreamMessage(response_type=LlmResponseTypes.END_OF_STREAM,
+                                    content="Stream completed").to_sse()
+                return
+            print(f"[cyan]Resuming stream {buffer.message_id} after frame {last_seq}[/cyan]")
+        else:
+            buffer = stream_replay_service.create(str(uuid.uuid4()))
+            last_seq = -1
+            buffer.producer = asyncio.create_task(self._record_stream(buffer, message, session_id))
+
+        async for seq, stream_msg in buffer.subscribe(last_seq):
+            yield stream_msg.to_sse(buffer.event_id(seq))
+
+    async def _record_stream(self, buffer: StreamReplayBuffer, message: str, session_id: str):
         try:
-            request = QueryRequest(user_message=message)
-            async for sse_chunk in self._stream_agentic_response(request):
-                yield sse_chunk
+            async for stream_msg in self.stream_chat_messages(message, buffer.message_id, session_id):
+                buffer.append(stream_msg)
+        finally:
+            stream_replay_service.complete(buffer)
+
+    async def stream_chat_messages(self, message: str, message_id: Optional[str] = None,
+                                   session_id: str = DEFAULT_SESSION_ID) -> AsyncGenerator[StreamMessage, None]:
+        message_id = message_id or str(uuid.uuid4())
+        try:
+            request = QueryRequest(user_message=message, session_id=session_id)
+            async for stream_msg in self._stream_agentic_response(request, message_id):
+                yield stream_msg
 
         except Exception as e:
-            message_id = str(uuid.uuid4())
-            yield f"data: {json.dumps(StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR,
-                                                    content=f"Chat service error: {str(e)}", message_id=message_id).model_dump())}\n\n"
-            yield f"data: {json.dumps(StreamMessage(response_type=LlmResponseTypes.END_OF_STREAM, content="Stream completed", message_id=message_id).model_dump())}\n\n"
+            yield StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR,
+                                content=f"Chat service error: {str(e)}", message_id=message_id)
+            yield StreamMessage(response_type=LlmResponseTypes.END_OF_STREAM, content="Stream completed",
+                                message_id=message_id)
 
-    async def _stream_agentic_response(self, request: QueryRequest) -> AsyncGenerator[str, None]:
+    async def _stream_agentic_response(self, request: QueryRequest, message_id: str) -> AsyncGenerator[
+        StreamMessage, None]:
         user_message = request.user_message
-        message_id = str(uuid.uuid4())
         channel_messages = []
         response_chunks = []
-        sources = []
+        sources = None
 
         print(f"[cyan]Generated message_id: {message_id}[/cyan]")
 
+        orchestration = None
         try:
-            asyncio.create_task(
+            orchestration = asyncio.create_task(
                 self.orchestrator_service.process_query(request)
             )
-            async for sse_message in self.stream_service.stream_messages():
+            async for stream_msg in self.stream_service.iter_messages():
                 try:
-                    message_data = json.loads(sse_message.replace("data: ", "").strip())
-                    stream_msg = StreamMessage(**message_data)
-
                     if stream_msg.response_type == LlmResponseTypes.CHANNEL_MESSAGE:
                         channel_messages = stream_msg.data.get("channels", [])
                         all_channels = [msg.get("channel", "") for msg in channel_messages]
-                        yield f"data: {json.dumps(StreamMessage(
+                        yield StreamMessage(
                             response_type=LlmResponseTypes.CHANNEL_MESSAGE,
                             content="Marketing campaign messages generated",
                             data={"channels": all_channels},
                             message_id=message_id
-                        ).model_dump())}\n\n"
+                        )
                     elif stream_msg.response_type == LlmResponseTypes.RETRIEVED_DATA:
-                        sources = stream_msg.data.get("sources", [])
+                        sources = stream_msg.data.get("sources")
                         stream_msg.message_id = message_id
-                        yield f"data: {json.dumps(stream_msg.model_dump())}\n\n"
+                        yield stream_msg
                     elif stream_msg.response_type == LlmResponseTypes.END_OF_STREAM:
                         print("[green]END_OF_STREAM received! Breaking loop...[/green]")
                         break
                     elif stream_msg.response_type == LlmResponseTypes.LLM_RESPONSE:
                         stream_msg.message_id = message_id
-                        yield f"data: {json.dumps(stream_msg.model_dump())}\n\n"
+                        yield stream_msg
                         response_chunks.append(stream_msg.content)
                     else:
                         stream_msg.message_id = message_id
-                        yield f"data: {json.dumps(stream_msg.model_dump())}\n\n"
+                        yield stream_msg
 
                 except Exception as parse_error:
-                    print(f"[yellow]Failed to parse stream message: {parse_error}[/yellow]")
-                    yield f"data: {json.dumps(StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR, content=f"Stream message parse error: {str(parse_error)}", message_id=message_id).model_dump())}\n\n"
+                    print(f"[yellow]Failed to handle stream message: {parse_error}[/yellow]")
+                    yield StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR,
+                                        content=f"Stream message handling error: {str(parse_error)}",
+                                        message_id=message_id)
 
             if response_chunks:
                 full_response = "".join(response_chunks)
                 try:
-                    self.repository.create(message_id, user_message, full_response, sources, channel_messages)
+                    chat_message = await self._save_chat_message(message_id, user_message, full_response, sources,
+                                                                 channel_messages, request.session_id)
+                    conversation_entity_index.add(chat_message, request.session_id)
+                    conversation_summary_service.schedule_update(request.session_id)
                 except Exception as save_error:
                     try:
-                        self.db.rollback()
-                        self.repository.create(message_id, request.user_message, full_response, sources,
-                                               channel_messages)
+                        chat_message = await self._save_chat_message(message_id, request.user_message,
+                                                                     full_response, sources, channel_messages,
+                                                                     request.session_id)
+                        conversation_entity_index.add(chat_message, request.session_id)
+                        conversation_summary_service.schedule_update(request.session_id)
                         print(
-                            f"[green]Chat history saved successfully after rollback.[/green]"
+                            f"[green]Chat history saved successfully on retry.[/green]"
                         )
                     except Exception as rollback_error:
                         print(f"[red]Failed to save chat history: {str(save_error)}[/red]")
-                        print(f"[red]Failed to save chat history after rollback: {str(rollback_error)}[/red]")
-                        yield f"data: {json.dumps(StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR, content=f"Failed to save chat history: {str(save_error)}", message_id=message_id).model_dump())}\n\n"
+                        print(f"[red]Failed to save chat history on retry: {str(rollback_error)}[/red]")
+                        yield StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR,
+                                            content=f"Failed to save chat history: {str(save_error)}",
+                                            message_id=message_id)
+        except asyncio.CancelledError:
+            if orchestration is not None and not orchestration.done():
+                orchestration.cancel()
+            print(f"[yellow]Chat response {message_id} cancelled, orchestration stopped[/yellow]")
+            raise
         except Exception as e:
-            yield f"data: {json.dumps(StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR, content=f"Agentic response error: {str(e)}", message_id=message_id).model_dump())}\n\n"
+            yield StreamMessage(response_type=LlmResponseTypes.SERVER_ERROR,
+                                content=f"Agentic response error: {str(e)}", message_id=message_id)
         finally:
-            yield f"data: {json.dumps(StreamMessage(response_type=LlmResponseTypes.END_OF_STREAM, content="Stream completed", message_id=message_id).model_dump())}\n\n"
+            yield StreamMessage(response_type=LlmResponseTypes.END_OF_STREAM, content="Stream completed",
+                                message_id=message_id)
+
+    @staticmethod
+    async def _save_chat_message(message_id: str, user_message: str, response: str, sources: Optional[ResultSet],
+                                 channel_messages: list, session_id: str):
+        async with AsyncSessionLocal() as db:
+            return await AsyncChatRepository(db).create(message_id, user_message, response,
+                                                        sources.to_records() if sources else [],
+                                                        channel_messages, session_id)
 
-    def get_chat_history(self):
-        return self.repository.get_history()
+    def get_chat_history(self, session_id: str = DEFAULT_SESSION_ID, limit: Optional[int] = None,
+                         before: Optional[datetime] = None, before_id: Optional[str] = None):
+        return self.repository.get_history(session_id, limit, before, before_id)
 
-    def clear_chat_history(self):
-        return self.repository.clear_history()
+    def clear_chat_history(self, session_id: str = DEFAULT_SESSION_ID):
+        conversation_entity_index.clear(session_id)
+        conversation_summary_service.cancel(session_id)
+        self.summary_repository.delete(session_id)
+        return self.repository.clear_history(session_id)
 
     def get_channel_messages(self, chat_id: str, channel: str):
         return self.repository.get_channel_messages(chat_id, channel)
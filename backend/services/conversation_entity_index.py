@@ -0,0 +1,151 @@
+import re
+import threading
+from bisect import insort
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from models.models import ChatMessage
+from models.schemas import DEFAULT_SESSION_ID
+
+_EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+_CUSTOMER_ID = re.compile(r"(?:#\d+\b|\bCUST[_-]?\d+\b|\bcustomer (?:id )?(\d+)\b)", re.IGNORECASE)
+_PHONE = re.compile(r"(?<![\w#])\+?\d[\d\s().-]{7,}\d\b")
+_NAME = re.compile(r"\b(?:customer|client|lead|named|called)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)")
+_NOT_NAMES = {"Shopify", "Website", "Crms", "CRMS", "Segment", "Data", "Details", "Profile", "Id", "With", "From"}
+
+_SINGULAR_PRONOUNS = re.compile(r"\b(he|him|his|himself|she|her|hers|herself)\b", re.IGNORECASE)
+_PLURAL_REFERENCES = re.compile(r"\b(they|them|their|theirs|themselves|those|these)\b", re.IGNORECASE)
+
+_MAX_LISTED_IDENTIFIERS = 5
+# More candidates than this for "him/her" is ambiguous and left to the LLM.
+_MAX_SINGULAR_CANDIDATES = 3
+
+
+class ConversationEntity(BaseModel):
+    kind: str  # "customer" or "result_set"
+    message_id: str
+    created_at: datetime
+    identifiers: Dict[str, Any]
+    label: str
+
+
+class ConversationEntityIndex:
+    """
+    Incremental per-conversation index of the customers and result sets each chat turn referred to.
+
+    Every saved ChatMessage contributes the customers it returned (from ``sources``) and the emails,
+    names, customer IDs and phone numbers mentioned in its text. Entities are kept in creation order so
+    "who does him/her/them refer to" is answered by scanning back from the most recent turn, without
+    sending the history to the LLM. Only the last ``max_messages`` turns of each conversation are kept.
+    """
+
+    def __init__(self, max_messages: int = 50):
+        self.max_messages = max_messages
+        self._entries: Dict[str, List[Tuple[datetime, str, List[ConversationEntity]]]] = {}
+        self._indexed: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _customer_label(record: Dict[str, Any]) -> str:
+        name = " ".join(part for part in (record.get("first_name"), record.get("last_name")) if part)
+        details = [value for value in (record.get("email"),
+                                       f"id {record['id']}" if record.get("id") is not None else None) if value]
+        if name and details:
+            return f"{name} ({', '.join(details)})"
+        return name or ", ".join(details)
+
+    def _extract(self, chat_message: ChatMessage) -> List[ConversationEntity]:
+        created_at = chat_message.created_at or datetime.utcnow()
+        entities: List[ConversationEntity] = []
+
+        def add(kind: str, identifiers: Dict[str, Any], label: str):
+            entities.append(ConversationEntity(kind=kind, message_id=chat_message.id, created_at=created_at,
+                                               identifiers=identifiers, label=label))
+
+        sources = [record for record in (chat_message.sources or []) if isinstance(record, dict)]
+        if len(sources) == 1:
+            add("customer", sources[0], self._customer_label(sources[0]))
+        elif sources:
+            listed = ", ".join(self._customer_label(record) for record in sources[:_MAX_LISTED_IDENTIFIERS])
+            more = f" and {len(sources) - _MAX_LISTED_IDENTIFIERS} more" if len(sources) > _MAX_LISTED_IDENTIFIERS \
+                else ""
+            add("result_set", {"count": len(sources), "ids": [record.get("id") for record in sources]},
+                f"the {len(sources)} customers returned for \"{chat_message.message}\" ({listed}{more})")
+
+        known_emails = {str(record.get("email")).lower() for record in sources if record.get("email")}
+        for text in (chat_message.message, chat_message.response):
+            if not text:
+                continue
+            for email in dict.fromkeys(_EMAIL.findall(text)):
+                if email.lower() not in known_emails:
+                    known_emails.add(email.lower())
+                    add("customer", {"email": email}, email)
+            for match in _CUSTOMER_ID.finditer(text):
+                add("customer", {"customer_id": match.group(1) or match.group(0)}, match.group(0))
+            for phone in dict.fromkeys(_PHONE.findall(text)):
+                add("customer", {"phone": phone.strip()}, phone.strip())
+            for name in dict.fromkeys(_NAME.findall(text)):
+                if name.split()[0] not in _NOT_NAMES:
+                    add("customer", {"name": name}, name)
+        return entities
+
+    def add(self, chat_message: ChatMessage, session_id: str = DEFAULT_SESSION_ID):
+        with self._lock:
+            indexed = self._indexed.setdefault(session_id, set())
+            if chat_message.id in indexed:
+                return
+            indexed.add(chat_message.id)
+            entries = self._entries.setdefault(session_id, [])
+            created_at = chat_message.created_at or datetime.utcnow()
+            insort(entries, (created_at, chat_message.id, self._extract(chat_message)), key=lambda e: e[:2])
+            while len(entries) > self.max_messages:
+                _, dropped_id, _ = entries.pop(0)
+                indexed.discard(dropped_id)
+
+    def sync(self, chat_history: Iterable[ChatMessage], session_id: str = DEFAULT_SESSION_ID):
+        """Indexes any messages of ``chat_history`` not seen yet, e.g. after a restart or from another worker."""
+        for chat_message in chat_history:
+            if chat_message.id not in self._indexed.get(session_id, ()):
+                self.add(chat_message, session_id)
+
+    def clear(self, session_id: Optional[str] = None):
+        with self._lock:
+            if session_id is None:
+                self._entries.clear()
+                self._indexed.clear()
+            else:
+                self._entries.pop(session_id, None)
+                self._indexed.pop(session_id, None)
+
+    def most_recent(self, kinds: Iterable[str], session_id: str = DEFAULT_SESSION_ID
+                    ) -> List[ConversationEntity]:
+        """Entities of the given kinds from the most recent turn that has any."""
+        kinds = set(kinds)
+        with self._lock:
+            for _, _, entities in reversed(self._entries.get(session_id, [])):
+                matching = [entity for entity in entities if entity.kind in kinds]
+                if matching:
+                    return matching
+        return []
+
+    def resolve(self, user_message: str, session_id: str = DEFAULT_SESSION_ID) -> Optional[str]:
+        """
+        Context for the references in ``user_message`` that the index can resolve, or ``None``
+        when the message needs the LLM (no pronoun it understands, or nothing indexed to point at).
+        """
+        latest = self.most_recent(("customer", "result_set"), session_id)
+        customers = list(dict.fromkeys(entity.label for entity in latest if entity.kind == "customer"))
+        result_sets = [entity for entity in latest if entity.kind == "result_set"]
+        if _SINGULAR_PRONOUNS.search(user_message) and 0 < len(customers) <= _MAX_SINGULAR_CANDIDATES:
+            return f"The pronoun refers to the most recently mentioned customer: {' / '.join(customers)}"
+        if _PLURAL_REFERENCES.search(user_message):
+            if result_sets:
+                return f"The reference is to {result_sets[0].label}"
+            if len(customers) > 1:
+                return f"The reference is to the most recently mentioned customers: {', '.join(customers)}"
+        return None
+
+
+conversation_entity_index = ConversationEntityIndex()
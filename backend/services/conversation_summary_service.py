@@ -0,0 +1,151 @@
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from rich import print
+
+from core.llm_handler import llm_handler
+from core.llm_scheduler import LlmPriority
+from core.settings import settings
+from models import AsyncSessionLocal
+from models.models import ChatMessage
+from models.schemas import DEFAULT_SESSION_ID
+from repositories.chat_repository import AsyncChatRepository
+from repositories.conversation_summary_repository import AsyncConversationSummaryRepository
+
+
+class ConversationSummaryService:
+    """
+    Keeps a rolling summary of each chat session up to date in the background.
+
+    After every saved chat turn ``schedule_update`` folds the turns that are not in the
+    stored summary yet into it with one low-priority LLM call, so the cost of an update
+    depends on the number of new turns, not on the length of the conversation. At most one
+    update runs per session; turns saved while it runs are picked up right after.
+    """
+
+    _SUMMARY_TEMPERATURE = 0.1
+    _SUMMARY_MAX_TOKENS = 600
+    _MAX_TURNS_PER_UPDATE = 20
+    _MAX_RESPONSE_CHARS = 500
+    _CANCEL_TIMEOUT_SECONDS = 5
+
+    def __init__(self):
+        self._running: Dict[str, asyncio.Task] = {}
+        self._dirty: Set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def schedule_update(self, session_id: str = DEFAULT_SESSION_ID):
+        if not settings.conversation_summary_enabled:
+            return
+        if session_id in self._running:
+            self._dirty.add(session_id)
+            return
+        self._loop = asyncio.get_running_loop()
+        task = asyncio.create_task(self._run(session_id))
+        self._running[session_id] = task
+        task.add_done_callback(lambda _: self._running.pop(session_id, None))
+
+    def cancel(self, session_id: Optional[str] = None):
+        """
+        Stops running updates, e.g. before the history they summarize is cleared.
+
+        The tasks belong to the event loop, so a call from another thread (a sync route in FastAPI's
+        threadpool) cancels them on that loop and waits until they have stopped.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            self._cancel(session_id)
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_and_wait(session_id), loop).result(
+                self._CANCEL_TIMEOUT_SECONDS)
+        except Exception as e:
+            print(f"[yellow]Conversation summary cancellation did not complete: {e}[/yellow]")
+
+    def _cancel(self, session_id: Optional[str]) -> List[asyncio.Task]:
+        cancelled = []
+        for cid, task in list(self._running.items()):
+            if session_id is None or cid == session_id:
+                self._dirty.discard(cid)
+                task.cancel()
+                cancelled.append(task)
+        return cancelled
+
+    async def _cancel_and_wait(self, session_id: Optional[str]):
+        await asyncio.gather(*self._cancel(session_id), return_exceptions=True)
+
+    async def _run(self, session_id: str):
+        while True:
+            self._dirty.discard(session_id)
+            try:
+                await self.update(session_id)
+            except Exception as e:
+                print(f"[yellow]Conversation summary update failed: {e}[/yellow]")
+                return
+            if session_id not in self._dirty:
+                return
+
+    async def update(self, session_id: str = DEFAULT_SESSION_ID):
+        # Each read and write gets its own short-lived session, so none is held open while the LLM summarizes.
+        while True:
+            async with AsyncSessionLocal() as db:
+                current = await AsyncConversationSummaryRepository(db).get(session_id)
+                new_turns = await AsyncChatRepository(db).get_after(
+                    session_id, current.last_message_at if current else None, limit=self._MAX_TURNS_PER_UPDATE,
+                    after_id=current.last_message_id if current else None)
+            if not new_turns:
+                return
+            summary = await self._summarize(current.summary if current else "", new_turns)
+            async with AsyncSessionLocal() as db:
+                await AsyncConversationSummaryRepository(db).save(
+                    session_id, summary, new_turns[-1], (current.message_count if current else 0) + len(new_turns))
+            print(f"[green]Conversation summary updated with {len(new_turns)} turn(s)[/green]")
+            if len(new_turns) < self._MAX_TURNS_PER_UPDATE:
+                return
+
+    async def _summarize(self, previous_summary: str, new_turns: List[ChatMessage]) -> str:
+        turns_text = "\n".join(
+            f"User: {turn.message}\nAssistant: {(turn.response or '')[:self._MAX_RESPONSE_CHARS]}\n"
+            for turn in new_turns
+        )
+        prompt = f"""You maintain a running summary of a conversation between a marketer and a customer data assistant.
+
+CURRENT SUMMARY:
+{previous_summary or "(empty - this is the start of the conversation)"}
+
+NEW TURNS (oldest first):
+{turns_text}
+
+TASK: Rewrite the summary so it also covers the new turns.
+
+INSTRUCTIONS:
+- Keep every customer identifier that was mentioned (emails, names, customer IDs, phone numbers)
+- Keep the segments, filters, data sources (Shopify, Website, CRMS), time ranges and metrics that were discussed
+- Note which request each result set answered, most recent last
+- Drop small talk and details that later turns made irrelevant
+- Stay under 250 words
+
+UPDATED SUMMARY:"""
+        response = await llm_handler.chat_completion(
+            model=settings.openai_model,
+            messages=[
+                {"role": "system",
+                 "content": "You are a precise conversation summarizer. Preserve identifiers and business context."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=self._SUMMARY_TEMPERATURE,
+            max_tokens=self._SUMMARY_MAX_TOKENS,
+            priority=LlmPriority.BACKGROUND,
+            agent="ConversationSummaryService",
+            call_site="_summarize"
+        )
+        return response.choices[0].message.content.strip()
+
+
+conversation_summary_service = ConversationSummaryService()
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from repositories.customer_repository import CustomerRepository
 from repositories.integration_repository import IntegrationRepository
 from services.data_sources_service import DataSourcesService
+from services.sql_plan_cache import sql_plan_cache
 
 
 class CustomerSyncService:
@@ -27,6 +28,7 @@ class CustomerSyncService:
         for customer_data in customers_data:
             normalized_data = self._normalize_customer_data(customer_data, data_source)
             self.customer_repo.create_or_update_customer(normalized_data)
+        sql_plan_cache.invalidate("customer_sync")
 
     def _normalize_customer_data(self, raw_data: Dict[str, Any], data_source: str) -> Dict[str, Any]:
         if data_source.upper() == "SHOPIFY":
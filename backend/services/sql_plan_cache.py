@@ -0,0 +1,168 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from rich import print
+
+from core.database_schema_prompt import get_database_schema_prompt
+from core.metrics import metrics
+from core.settings import settings
+
+_TOKEN = re.compile(r"[a-z0-9_.@']+")
+# Request phrasing that does not change which customers are selected. Negations, comparisons and
+# numbers are deliberately not listed, since they do.
+_FILLER_WORDS = {
+    "a", "an", "the", "me", "my", "us", "our", "please", "can", "could", "would", "you", "i", "we", "want", "need",
+    "to", "show", "find", "list", "get", "give", "display", "fetch", "retrieve", "return", "all", "of", "that",
+    "which", "who", "are", "is", "be", "have", "has", "and", "for", "from", "with", "in", "data", "records", "details",
+    "information",
+}
+
+_lookups = metrics.counter("sql_plan_cache_requests_total", "SQL plan cache lookups by outcome")
+_invalidations = metrics.counter("sql_plan_cache_invalidations_total", "SQL plan cache invalidations by reason")
+
+
+class CachedSqlPlan(BaseModel):
+    normalized_request: str
+    sql_query: str
+    explanation: str
+    tables_used: List[str]
+    generation_confidence: float
+    validation_confidence: float
+    created_at: float
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def normalize_request(user_message: str) -> Tuple[str, ...]:
+    """Lowercased, singularized tokens of a request without filler words, in their original order."""
+    tokens = (token.strip(".'-") for token in _TOKEN.findall(user_message.lower()))
+    return tuple(_stem(token) for token in tokens if token and token not in _FILLER_WORDS)
+
+
+# The only words a near-duplicate may add, drop or swap. Anything else, including cities, product
+# names and other filter values that no list could cover, may select different customers.
+_STOPWORDS = {_stem(word) for word in (
+    "just", "some", "any", "those", "these", "them", "their", "there", "also", "currently", "kindly", "let",
+    "know", "tell", "see", "look", "up", "what", "whose", "whom", "was", "were", "been", "do", "does", "did",
+    "it", "its", "hey", "hi", "hello", "thanks", "thank", "ok", "okay",
+)}
+
+
+def _content(key: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(token for token in key if token not in _STOPWORDS)
+
+
+class SqlPlanCache:
+    """
+    Cache of validated SQL keyed by the normalized paraphrased request.
+
+    Lookups match exactly on the normalized token sequence first, then fall back to a cached
+    request with the same tokens in the same order once stopwords are dropped on both sides, so a
+    near-duplicate differs only in words that cannot change the query. Every entry is dropped when
+    customer data is synced or removed, when the database schema prompt changes, or after ``ttl_seconds``
+    (which bounds staleness in other workers, since invalidation is per process).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, ...], CachedSqlPlan]" = OrderedDict()
+        # Stopword-free key -> the most recently stored key with that content.
+        self._keys_by_content: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self._schema_hash = self._current_schema_hash()
+
+    @staticmethod
+    def _current_schema_hash() -> str:
+        return hashlib.sha256(get_database_schema_prompt().encode()).hexdigest()
+
+    def _check_schema(self):
+        schema_hash = self._current_schema_hash()
+        if schema_hash != self._schema_hash:
+            self._schema_hash = schema_hash
+            self.invalidate("schema_changed")
+
+    def _find_similar(self, key: Tuple[str, ...]) -> Optional[CachedSqlPlan]:
+        similar_key = self._keys_by_content.get(_content(key))
+        return self._entries.get(similar_key) if similar_key else None
+
+    def _pop(self, key: Tuple[str, ...]):
+        self._entries.pop(key, None)
+        content = _content(key)
+        if self._keys_by_content.get(content) == key:
+            del self._keys_by_content[content]
+
+    def get(self, user_message: str) -> Optional[CachedSqlPlan]:
+        if not settings.sql_plan_cache_enabled:
+            return None
+        self._check_schema()
+        key = normalize_request(user_message)
+        if not key:
+            return None
+        with self._lock:
+            plan = self._entries.get(key)
+            outcome = "hit_exact"
+            if plan is None:
+                plan = self._find_similar(key)
+                outcome = "hit_similar"
+            if plan is not None and plan.created_at + self.ttl_seconds <= time.time():
+                self._pop(tuple(plan.normalized_request.split(" ")))
+                plan, outcome = None, "expired"
+            if plan is None:
+                _lookups.inc(outcome=outcome if outcome == "expired" else "miss")
+                return None
+            self._entries.move_to_end(tuple(plan.normalized_request.split(" ")))
+        _lookups.inc(outcome=outcome)
+        print(f"[green]SQL plan cache {outcome.replace('_', ' ')} for: {user_message[:80]}[/green]")
+        return plan
+
+    def set(self, user_message: str, sql_query: str, explanation: str, tables_used: List[str],
+            generation_confidence: float, validation_confidence: float):
+        if not settings.sql_plan_cache_enabled:
+            return
+        self._check_schema()
+        key = normalize_request(user_message)
+        if not key:
+            return
+        plan = CachedSqlPlan(normalized_request=" ".join(key), sql_query=sql_query, explanation=explanation,
+                             tables_used=tables_used, generation_confidence=generation_confidence,
+                             validation_confidence=validation_confidence, created_at=time.time())
+        with self._lock:
+            self._entries[key] = plan
+            self._entries.move_to_end(key)
+            if _content(key):
+                self._keys_by_content[_content(key)] = key
+            while len(self._entries) > self.max_entries:
+                self._pop(next(iter(self._entries)))
+
+    def discard(self, plan: CachedSqlPlan):
+        """Drops a single plan, e.g. one that no longer executes."""
+        with self._lock:
+            self._pop(tuple(plan.normalized_request.split(" ")))
+        _invalidations.inc(reason="execution_failed")
+
+    def invalidate(self, reason: str):
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._keys_by_content.clear()
+        _invalidations.inc(reason=reason)
+        if dropped:
+            print(f"[cyan]SQL plan cache cleared ({reason}), {dropped} plan(s) dropped[/cyan]")
+
+
+sql_plan_cache = SqlPlanCache(
+    max_entries=settings.sql_plan_cache_max_entries,
+    ttl_seconds=settings.sql_plan_cache_ttl_seconds,
+)
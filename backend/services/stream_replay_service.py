@@ -0,0 +1,155 @@
+import asyncio
+from collections import deque
+from typing import AsyncGenerator, Callable, Deque, Dict, Optional, Tuple
+
+from rich import print
+
+from core.metrics import metrics
+from core.settings import settings
+from services.stream_service import StreamMessage
+
+
+class StreamReplayBuffer:
+    """
+    Bounded, append-only record of the frames sent for one chat response.
+
+    Every frame gets a sequence number; SSE event IDs are ``<message_id>:<seq>`` so a
+    client reconnecting with ``Last-Event-ID`` can resume right after the last frame
+    it saw. Only the most recent ``max_frames`` frames are retained.
+
+    The buffer tracks its live subscribers. When the last one goes away before the
+    stream completes, ``on_abandoned`` is called after ``abandon_after_seconds``
+    unless a client has reconnected in the meantime.
+    """
+
+    def __init__(self, message_id: str, max_frames: int, abandon_after_seconds: float = 0,
+                 on_abandoned: Optional[Callable[["StreamReplayBuffer"], None]] = None):
+        self.message_id = message_id
+        self.frames: Deque[Tuple[int, StreamMessage]] = deque(maxlen=max_frames)
+        self.completed = False
+        self.producer: Optional[asyncio.Task] = None
+        self.abandon_after_seconds = abandon_after_seconds
+        self.on_abandoned = on_abandoned
+        self._last_seq = -1
+        self._waiter: Optional[asyncio.Future] = None
+        self._subscribers = 0
+        self._abandon_handle: Optional[asyncio.TimerHandle] = None
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.message_id}:{seq}"
+
+    def append(self, message: StreamMessage):
+        self._last_seq += 1
+        self.frames.append((self._last_seq, message))
+        self._notify()
+
+    def complete(self):
+        self.completed = True
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+            self._abandon_handle = None
+        self._notify()
+
+    def _attach(self):
+        self._subscribers += 1
+        if self._abandon_handle is not None:
+            self._abandon_handle.cancel()
+            self._abandon_handle = None
+
+    def _detach(self):
+        self._subscribers -= 1
+        if self._subscribers == 0 and not self.completed and self.on_abandoned is not None:
+            self._abandon_handle = asyncio.get_running_loop().call_later(self.abandon_after_seconds, self._abandon)
+
+    def _abandon(self):
+        self._abandon_handle = None
+        if self._subscribers == 0 and not self.completed:
+            self.on_abandoned(self)
+
+    def _notify(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+        self._waiter = None
+
+    async def subscribe(self, last_seq: int = -1) -> AsyncGenerator[Tuple[int, StreamMessage], None]:
+        """Yields ``(seq, message)`` for every retained frame after ``last_seq``, then follows live frames."""
+        self._attach()
+        try:
+            while True:
+                while self.frames and last_seq < self._last_seq:
+                    first_seq = self.frames[0][0]
+                    seq, message = self.frames[max(last_seq + 1 - first_seq, 0)]
+                    yield seq, message
+                    last_seq = seq
+                if self.completed:
+                    return
+                if self._waiter is None:
+                    self._waiter = asyncio.get_running_loop().create_future()
+                await asyncio.shield(self._waiter)
+        finally:
+            self._detach()
+
+
+class StreamReplayService:
+    """
+    Process-local registry of replay buffers keyed by chat ``message_id``.
+
+    Buffers are evicted ``ttl_seconds`` after their stream completes. Reconnects that
+    land on a different worker process will not find the buffer.
+
+    If every client of an unfinished stream disconnects and none reconnects within
+    ``disconnect_grace_seconds``, the stream's producer task is cancelled, which in
+    turn cancels the orchestration and any LLM call it is awaiting.
+    """
+
+    def __init__(self, max_frames: int, ttl_seconds: float, disconnect_grace_seconds: float):
+        self.max_frames = max_frames
+        self.ttl_seconds = ttl_seconds
+        self.disconnect_grace_seconds = disconnect_grace_seconds
+        self._buffers: Dict[str, StreamReplayBuffer] = {}
+        self._cancellations = metrics.counter(
+            "chat_stream_cancellations_total",
+            "Chat responses whose orchestration was cancelled because the client went away",
+        )
+
+    def create(self, message_id: str) -> StreamReplayBuffer:
+        buffer = StreamReplayBuffer(
+            message_id,
+            self.max_frames,
+            abandon_after_seconds=self.disconnect_grace_seconds,
+            on_abandoned=self._cancel_abandoned,
+        )
+        self._buffers[message_id] = buffer
+        return buffer
+
+    def _cancel_abandoned(self, buffer: StreamReplayBuffer):
+        if buffer.producer is None or buffer.producer.done():
+            return
+        print(f"[yellow]StreamReplayService: Client disconnected from {buffer.message_id}, "
+              f"cancelling orchestration[/yellow]")
+        buffer.producer.cancel()
+        self._cancellations.inc(reason="client_disconnected")
+
+    def complete(self, buffer: StreamReplayBuffer):
+        buffer.complete()
+        asyncio.get_running_loop().call_later(self.ttl_seconds, self._evict, buffer.message_id)
+
+    def _evict(self, message_id: str):
+        if self._buffers.pop(message_id, None) is not None:
+            print(f"[dim]StreamReplayService: Evicted replay buffer {message_id}[/dim]")
+
+    def resolve(self, last_event_id: str) -> Tuple[Optional[StreamReplayBuffer], int]:
+        """Maps a ``Last-Event-ID`` header to its buffer and the last sequence number the client received."""
+        message_id, _, seq = last_event_id.strip().rpartition(":")
+        try:
+            last_seq = int(seq)
+        except ValueError:
+            return None, -1
+        return self._buffers.get(message_id), last_seq
+
+
+stream_replay_service = StreamReplayService(
+    max_frames=settings.stream_replay_buffer_size,
+    ttl_seconds=settings.stream_replay_ttl_seconds,
+    disconnect_grace_seconds=settings.stream_disconnect_grace_seconds,
+)
@@ -1,13 +1,13 @@
 import asyncio
 import threading
 from datetime import datetime, timezone
-from queue import Queue, Empty
-from typing import AsyncGenerator, Dict, Any, Optional
+from typing import AsyncGenerator, Dict, Any, Optional, Tuple
 
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
 from rich import print
 
+from core.settings import settings
 from models.schemas import LlmResponseTypes
 
 
@@ -32,28 +32,66 @@ class StreamMessage(BaseModel):
         kwargs.setdefault("by_alias", True)
         return super().model_dump_json(*args, **kwargs)
 
+    def to_sse(self, event_id: Optional[str] = None) -> str:
+        if event_id is not None:
+            return f"id: {event_id}\ndata: {self.model_dump_json()}\n\n"
+        return f"data: {self.model_dump_json()}\n\n"
+
 
 class StreamService:
-    def __init__(self):
-        self.message_queue: Queue = Queue()
+    """
+    Bridges agent output to a single SSE consumer.
+
+    Messages are pushed onto an ``asyncio.Queue`` owned by the consumer's event
+    loop, so ``stream_messages`` sleeps until a message arrives instead of polling.
+    ``add_message`` may be called from any thread: calls made off the consumer's
+    loop are handed over with ``call_soon_threadsafe``.
+
+    Consecutive LLM_RESPONSE chunks are coalesced into a single frame for up to
+    ``coalesce_interval_ms`` or ``coalesce_max_bytes``, whichever comes first. Any
+    other message type flushes the pending frame immediately. An interval of 0
+    disables coalescing.
+    """
+
+    def __init__(self, coalesce_interval_ms: Optional[float] = None, coalesce_max_bytes: Optional[int] = None):
+        self.message_queue: asyncio.Queue = asyncio.Queue()
         self.is_streaming = False
         self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        if coalesce_interval_ms is None:
+            coalesce_interval_ms = settings.stream_coalesce_interval_ms
+        if coalesce_max_bytes is None:
+            coalesce_max_bytes = settings.stream_coalesce_max_bytes
+        self.coalesce_interval = max(coalesce_interval_ms, 0) / 1000
+        self.coalesce_max_bytes = coalesce_max_bytes
 
     def _start_streaming(self):
         with self._lock:
             if not self.is_streaming:
                 self.is_streaming = True
+                self._loop = asyncio.get_running_loop()
                 while not self.message_queue.empty():
-                    try:
-                        self.message_queue.get_nowait()
-                    except Empty:
-                        break
+                    self.message_queue.get_nowait()
+
+    def _put(self, message: StreamMessage):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.message_queue.put_nowait(message)
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            self.message_queue.put_nowait(message)
+        else:
+            loop.call_soon_threadsafe(self.message_queue.put_nowait, message)
 
     def add_message(self, message: StreamMessage):
         with self._lock:
             if not self.is_streaming and message.response_type != LlmResponseTypes.END_OF_STREAM:
                 return
-            self.message_queue.put(message)
+            self._put(message)
 
     def end_streaming(self):
         try:
@@ -65,7 +103,7 @@ class StreamService:
                         data=None,
                         timestamp=None
                     )
-                    self.message_queue.put(message)
+                    self._put(message)
                     print(f"[cyan]StreamService: Queue size after END_OF_STREAM: {self.message_queue.qsize()}[/cyan]")
                     self.is_streaming = False
                     print("[cyan]StreamService: Set is_streaming = False[/cyan]")
@@ -76,27 +114,62 @@ class StreamService:
             import traceback
             traceback.print_exc()
 
-    async def stream_messages(self) -> AsyncGenerator[str, None]:
+    async def _coalesce(self, first: StreamMessage) -> Tuple[StreamMessage, Optional[StreamMessage]]:
+        """
+        Merges the LLM_RESPONSE chunks that follow ``first`` into it.
+
+        Returns the merged frame and the message that interrupted the merge, if any.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.coalesce_interval
+        chunks = [first.content]
+        size = len(first.content.encode())
+        interrupted_by = None
+
+        while size < self.coalesce_max_bytes:
+            try:
+                message = self.message_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(self.message_queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if message.response_type != LlmResponseTypes.LLM_RESPONSE:
+                interrupted_by = message
+                break
+            chunks.append(message.content)
+            size += len(message.content.encode())
+
+        if len(chunks) > 1:
+            first.content = "".join(chunks)
+        return first, interrupted_by
+
+    async def iter_messages(self) -> AsyncGenerator[StreamMessage, None]:
+        """Yields queued messages as ``StreamMessage`` objects until END_OF_STREAM has been delivered."""
         self._start_streaming()
+        carried_over: Optional[StreamMessage] = None
 
         try:
             while True:
                 try:
-                    await asyncio.sleep(0.01)
+                    if carried_over is not None:
+                        message, carried_over = carried_over, None
+                    else:
+                        message = await self.message_queue.get()
+                    print(f"[blue]StreamService: Dequeued message: {message}[/blue]")
 
-                    try:
-                        message = self.message_queue.get_nowait()
-                        print(f"[blue]StreamService: Dequeued message: {message}[/blue]")
-                    except Empty:
-                        if not self.is_streaming and self.message_queue.empty():
-                            print("[green]StreamService: Streaming stopped and queue empty, exiting[/green]")
-                            break
-                        continue
+                    if message.response_type == LlmResponseTypes.LLM_RESPONSE and self.coalesce_interval > 0:
+                        message, carried_over = await self._coalesce(message)
 
-                    message_json = message.model_dump_json()
-                    sse_data = f"data: {message_json}\n\n"
+                    yield message
 
-                    yield sse_data
+                    if (message.response_type == LlmResponseTypes.END_OF_STREAM and carried_over is None
+                            and self.message_queue.empty()):
+                        print("[green]StreamService: Streaming stopped and queue empty, exiting[/green]")
+                        break
 
                 except Exception as e:
                     print(f"[red]StreamService: Exception in stream_messages loop: {e}[/red]")
@@ -104,3 +177,7 @@ class StreamService:
         finally:
             with self._lock:
                 self.is_streaming = False
+
+    async def stream_messages(self) -> AsyncGenerator[str, None]:
+        async for message in self.iter_messages():
+            yield message.to_sse()
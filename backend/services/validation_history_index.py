@@ -0,0 +1,115 @@
+import math
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.settings import settings
+from models.models import ValidationHistory
+from repositories.validation_history_repository import AsyncValidationHistoryRepository
+from services.agents import CONFIDENCE_THRESHOLD
+from services.sql_plan_cache import normalize_request
+
+
+class ValidationHistoryEntry(BaseModel):
+    id: int
+    user_message: str
+    sql_query: str
+    is_valid: bool
+    confidence_score: float
+    error_message: Optional[str] = None
+    issue: Optional[str] = None
+
+
+class ValidationHistoryIndex:
+    """
+    BM25 index over the request text of the persisted validation history.
+
+    The index lives in process but is filled from the ``validation_history`` table: every
+    search first loads the rows added since the last one (by any worker), so what the Query
+    Generator learned survives restarts and is shared. Only the latest ``max_entries`` rows
+    are indexed.
+    """
+
+    def __init__(self, max_entries: int, k1: float = 1.5, b: float = 0.75):
+        self.max_entries = max_entries
+        self.k1 = k1
+        self.b = b
+        self._entries: "OrderedDict[int, Tuple[ValidationHistoryEntry, Counter]]" = OrderedDict()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def _add(self, row: ValidationHistory):
+        entry = ValidationHistoryEntry(
+            id=row.id, user_message=row.user_message, sql_query=row.sql_query, is_valid=row.is_valid,
+            confidence_score=row.confidence_score or 0.0, error_message=row.error_message, issue=row.issue)
+        terms = Counter(normalize_request(row.user_message))
+        self._entries[entry.id] = (entry, terms)
+        self._lengths[entry.id] = sum(terms.values())
+        self._total_length += self._lengths[entry.id]
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[entry.id] = frequency
+        self._last_id = max(self._last_id, entry.id)
+        while len(self._entries) > self.max_entries:
+            dropped_id, (_, dropped_terms) = self._entries.popitem(last=False)
+            self._total_length -= self._lengths.pop(dropped_id)
+            for term in dropped_terms:
+                postings = self._postings[term]
+                postings.pop(dropped_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    async def refresh(self, db: AsyncSession):
+        rows = await AsyncValidationHistoryRepository(db).get_after(self._last_id, self.max_entries)
+        with self._lock:
+            for row in rows:
+                if row.id > self._last_id:
+                    self._add(row)
+
+    def _score(self, query_terms: List[str]) -> Dict[int, float]:
+        document_count = len(self._entries)
+        average_length = self._total_length / document_count if document_count else 0.0
+        scores: Dict[int, float] = {}
+        for term in set(query_terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for entry_id, frequency in postings.items():
+                norm = frequency + self.k1 * (1 - self.b + self.b * self._lengths[entry_id] / average_length)
+                scores[entry_id] = scores.get(entry_id, 0.0) + idf * frequency * (self.k1 + 1) / norm
+        return scores
+
+    async def search(self, db: AsyncSession, user_message: str, top_k: int
+                     ) -> Tuple[List[ValidationHistoryEntry], List[ValidationHistoryEntry]]:
+        """
+        The ``top_k`` most relevant past successes and failures for ``user_message``, best first.
+        A success is a query the orchestrator would accept: valid and at least CONFIDENCE_THRESHOLD
+        confident. Valid but low-confidence queries were retried, so they count as failures.
+        """
+        await self.refresh(db)
+        with self._lock:
+            scores = self._score(list(normalize_request(user_message)))
+            ranked = sorted(scores, key=lambda entry_id: (scores[entry_id], entry_id), reverse=True)
+            successes: List[ValidationHistoryEntry] = []
+            failures: List[ValidationHistoryEntry] = []
+            seen_queries = set()
+            for entry_id in ranked:
+                entry = self._entries[entry_id][0]
+                accepted = entry.is_valid and entry.confidence_score >= CONFIDENCE_THRESHOLD
+                bucket = successes if accepted else failures
+                if len(bucket) >= top_k or entry.sql_query in seen_queries:
+                    continue
+                seen_queries.add(entry.sql_query)
+                bucket.append(entry)
+                if len(successes) >= top_k and len(failures) >= top_k:
+                    break
+        return successes, failures
+
+
+validation_history_index = ValidationHistoryIndex(max_entries=settings.validation_history_max_entries)
@@ -524,6 +524,10 @@ const Chat: React.FC<ChatProps> = ({ chatHistory, onNewMessage }) => {
       };
 
       eventSource.onerror = (error) => {
+        if (eventSource.readyState === EventSource.CONNECTING) {
+          console.warn('SSE connection lost, resuming from last event:', error);
+          return;
+        }
         console.error('SSE error:', error);
         eventSource.close();
         setIsStreaming(false);
@@ -6,6 +6,17 @@ const api = axios.create({
   baseURL: config.backendHost,
 });
 
+const SESSION_STORAGE_KEY = 'chatSessionId';
+
+const getSessionId = (): string => {
+  let sessionId = localStorage.getItem(SESSION_STORAGE_KEY);
+  if (!sessionId) {
+    sessionId = crypto.randomUUID();
+    localStorage.setItem(SESSION_STORAGE_KEY, sessionId);
+  }
+  return sessionId;
+};
+
 export const apiService = {
   saveIntegration: async (dataSource: DataSource): Promise<Integration> => {
     const response = await api.post('/api/integrations', { dataSource });
@@ -22,17 +33,20 @@ export const apiService = {
   },
 
   getChatHistory: async (): Promise<ChatHistoryResponse> => {
-    const response = await api.get('/api/chat/history');
+    const response = await api.get('/api/chat/history', { params: { session_id: getSessionId() } });
     return response.data;
   },
 
   clearChatHistory: async (): Promise<void> => {
-    await api.delete('/api/chat/history');
+    await api.delete('/api/chat/history', { params: { session_id: getSessionId() } });
   },
 
   createChatStream: (message: string): EventSource => {
     const encodedMessage = encodeURIComponent(message);
-    return new EventSource(`${config.backendHost}/api/chat/stream?message=${encodedMessage}`);
+    const encodedSessionId = encodeURIComponent(getSessionId());
+    return new EventSource(
+      `${config.backendHost}/api/chat/stream?message=${encodedMessage}&session_id=${encodedSessionId}`
+    );
   },
 
   downloadChannelMessages: async (chatId: string, channel: string): Promise<void> => {